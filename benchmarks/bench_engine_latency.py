@@ -0,0 +1,69 @@
+"""
+Click-to-first-await latency of the engine loop.
+
+Measures the time from a button's clicked handler submitting a coroutine to the
+first line of that coroutine running on the engine thread. Uses a real Qt button
+when PyQt6 is available (offscreen), otherwise calls engine.submit() directly.
+
+Run: python benchmarks/bench_engine_latency.py [iterations]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.engine import engine
+
+
+def report(label, samples):
+    samples_us = sorted(s * 1e6 for s in samples)
+    p = lambda q: samples_us[min(len(samples_us) - 1, int(q * len(samples_us)))]
+    print(f"{label}: n={len(samples_us)} mean={statistics.mean(samples_us):.1f}us "
+          f"p50={p(0.50):.1f}us p99={p(0.99):.1f}us max={samples_us[-1]:.1f}us")
+
+
+def measure(trigger, iterations):
+    samples = []
+    started = threading.Event()
+    for _ in range(iterations):
+        started.clear()
+        stamp = {}
+
+        async def first_await():
+            stamp['t1'] = time.perf_counter()
+            started.set()
+
+        stamp['t0'] = time.perf_counter()
+        trigger(first_await)
+        started.wait(5)
+        samples.append(stamp['t1'] - stamp['t0'])
+    return samples
+
+
+def main(iterations=2000):
+    engine.start()
+    report("engine.submit", measure(lambda coro_fn: engine.submit(coro_fn()), iterations))
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt6.QtWidgets import QApplication, QPushButton
+    except ImportError:
+        print("PyQt6 not available; skipped Qt click benchmark.")
+    else:
+        app = QApplication.instance() or QApplication(sys.argv)
+        button = QPushButton("Place Order")
+        pending = {}
+        button.clicked.connect(lambda: engine.submit(pending['coro_fn']()))
+
+        def click(coro_fn):
+            pending['coro_fn'] = coro_fn
+            button.click()
+
+        report("qt click -> first await", measure(click, iterations))
+        app.processEvents()
+    engine.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
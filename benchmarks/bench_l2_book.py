@@ -0,0 +1,78 @@
+"""
+Local L2 book: replay throughput of book messages and query cost (including the pre-trade
+impact plan run on the market order path).
+
+Replays a recording of feed messages through L2Book.apply_message. Pass a JSONL file with one
+message per line (Hyperliquid l2Book messages or {"bids", "asks"} deltas) to replay a real
+capture; without one, a deterministic random-walk recording is generated.
+
+Run: python benchmarks/bench_l2_book.py [recording.jsonl]
+"""
+import json
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.l2_book import L2Book
+from core.impact import plan_market_splits
+
+TICK = 0.1
+LEVELS = 200
+
+
+def synthetic_recording(count=200_000, seed=1):
+    """A 200-level book around 100.0: mostly 1-4 level deltas, a full snapshot every 1000 messages."""
+    rng = random.Random(seed)
+    mid = 1000
+    def snapshot():
+        return {'snapshot': True,
+                'bids': [[round((mid - i) * TICK, 1), rng.uniform(0.1, 50.0)] for i in range(1, LEVELS + 1)],
+                'asks': [[round((mid + i) * TICK, 1), rng.uniform(0.1, 50.0)] for i in range(1, LEVELS + 1)]}
+    messages = [snapshot()]
+    for n in range(1, count):
+        if n % 1000 == 0:
+            messages.append(snapshot())
+            continue
+        mid += rng.choice((-1, 0, 0, 1))
+        changes = {'bids': [], 'asks': []}
+        for _ in range(rng.randint(1, 4)):
+            side = rng.choice(('bids', 'asks'))
+            distance = int(rng.expovariate(0.2)) + 1
+            price = round((mid - distance if side == 'bids' else mid + distance) * TICK, 1)
+            changes[side].append([price, 0.0 if rng.random() < 0.3 else rng.uniform(0.1, 50.0)])
+        messages.append(changes)
+    return messages
+
+
+def load_recording(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    messages = load_recording(sys.argv[1]) if len(sys.argv) > 1 else synthetic_recording()
+    book = L2Book('BENCH')
+    started = time.perf_counter()
+    for message in messages:
+        book.apply_message(message)
+    elapsed = time.perf_counter() - started
+    print(f"replayed {len(messages)} messages in {elapsed:.3f}s: {len(messages) / elapsed:,.0f} msg/s "
+          f"({elapsed / len(messages) * 1e6:.2f} us/msg)")
+    print(f"final book: {len(book.bids)} bids, {len(book.asks)} asks, mid {book.mid()}")
+
+    number = 20_000
+    for label, fn in (("best bid/ask", lambda: (book.best_bid(), book.best_ask())),
+                      ("vwap 25 (buy)", lambda: book.vwap(True, 25.0)),
+                      ("vwap 500 (sell)", lambda: book.vwap(False, 500.0)),
+                      ("price for size 500", lambda: book.price_for_size(True, 500.0)),
+                      ("pre-trade impact plan 500", lambda: plan_market_splits(book, True, 500.0)),
+                      ("levels as array", lambda: book.bids.to_array())):
+        best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(f"{label:<30} {best * 1e6:8.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Memory and copy cost of the slotted order types against the dicts they replace: a copy-trading
+fan-out of one order to N subscribers (one copy with overrides each), and the order requests
+of an N-split entry ladder built from the main entry request.
+
+Run: python benchmarks/bench_models.py [subscribers]
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.models import Order, OrderRequest
+
+ORDER = dict(symbol='BTC', side='long', order_type='limit', size=1.0, price=60000.0, leverage=10, margin_mode='cross',
+             sl=2.0, tps=[{'profit_perc': 1.0}], split_count=1, split_distribution='uniform', cloid='0x' + 'ab' * 16)
+REQUEST = dict(asset='BTC', is_buy=True, reduce_only=False, order_type={'limit': {'tif': 'Gtc'}}, sz=1.0, limit_px=60000.0,
+               cloid='0x' + 'ab' * 16, tags=('entry',))
+
+
+def allocated(build):
+    """Bytes still allocated by build()'s result."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def per_item(fn, count, number=20):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / count * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    order = Order(**ORDER)
+
+    def dict_fanout():
+        return [dict(ORDER, symbol='ETH', size=float(i), cloid=str(i)) for i in range(count)]
+
+    def order_fanout():
+        return [order.replace(symbol='ETH', size=float(i), cloid=str(i)) for i in range(count)]
+
+    request = OrderRequest('BTC', True, False, 'limit', 1.0, 60000.0, cloid='0x' + 'ab' * 16, tags=('entry',))
+
+    def dict_splits():
+        return [dict(REQUEST, sz=0.001, cloid=str(i), limit_px=float(i)) for i in range(count)]
+
+    def request_splits():
+        return [request.replace(sz=0.001, cloid=str(i), limit_px=float(i)) for i in range(count)]
+
+    print(f"{count} items              {'bytes each':>11} {'us each':>8}")
+    for label, build in (("fan-out, dict copies", dict_fanout), ("fan-out, Order.replace", order_fanout),
+                         ("splits, dict copies", dict_splits), ("splits, OrderRequest", request_splits)):
+        print(f"{label:<24} {allocated(build) / count:>11.0f} {per_item(build, count):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Split generation time: vectorized generate_splits vs the original Python loop, and book-based
+ladders planned against a 1000-level synthetic book side.
+
+Run: python benchmarks/bench_order_splitter.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.order_splitter import generate_splits, generate_book_split_arrays
+
+
+def legacy_generate_splits(entry_price, range_percent, split_count, total_size, order_type='limit'):
+    """The pre-NumPy implementation, kept here as the baseline."""
+    splits = []
+    if split_count < 1:
+        return splits
+    if order_type == 'market':
+        split_size = total_size / split_count
+        for _ in range(split_count):
+            splits.append((entry_price, split_size))
+    else:
+        min_price = entry_price * (1 - range_percent / 100)
+        max_price = entry_price * (1 + range_percent / 100)
+        remaining = total_size
+        for i in range(split_count):
+            price = random.uniform(min_price, max_price)
+            if i == split_count - 1:
+                size = remaining
+            else:
+                max_split = remaining - (split_count - i - 1) * (total_size / split_count) * 0.5
+                size = random.uniform(total_size / split_count * 0.5, max_split)
+                size = min(size, remaining)
+            splits.append((price, size))
+            remaining -= size
+    return splits
+
+
+rng = random.Random(1)
+BIDS = [[round(100.0 - 0.01 * i, 2), rng.uniform(0.1, 20.0)] for i in range(1000)]
+
+
+def bench(label, fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<45} {best * 1e6:10.1f} us/call")
+
+
+def main():
+    for n, number in ((100, 2000), (10_000, 50)):
+        print(f"--- {n} splits ---")
+        bench("legacy loop", lambda: legacy_generate_splits(100.0, 1.0, n, 10.0), number)
+        bench("numpy uniform", lambda: generate_splits(100.0, 1.0, n, 10.0, seed=1), number)
+        bench("numpy linear + tick/lot snap", lambda: generate_splits(
+            100.0, 1.0, n, 10.0, distribution='linear', tick_size=0.01, lot_size=0.00001), number)
+        bench("numpy gaussian + tick/lot snap", lambda: generate_splits(
+            100.0, 1.0, n, 10.0, distribution='gaussian', tick_size=0.01, lot_size=0.00001), number)
+        bench("book depth ladder + tick/lot snap", lambda: generate_book_split_arrays(
+            True, BIDS, 1.0, n, 10.0, distribution='depth', tick_size=0.01, lot_size=0.00001), number)
+        bench("book post-only ladder + tick/lot snap", lambda: generate_book_split_arrays(
+            True, BIDS, 1.0, n, 10.0, distribution='post_only', tick_size=0.01, lot_size=0.00001), number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Order path cost per order for 1, 5 and 100-leg actions: building the wire orders (through the
+CCXT client's precision helpers as before, and through per-symbol OrderTemplates), serializing
+the action (generic packb vs pack_action) and hashing + signing it.
+
+Legs: 1 = a plain limit entry; 5 = entry, SL and 3 TPs; 100 = a 96-split ladder, SL and 3 TPs.
+
+Run: python benchmarks/bench_order_templates.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from eth_account import Account
+from hyperliquid.ccxt import hyperliquid as HyperliquidSync
+from hyperliquid.ccxt.static_dependencies.msgpack import packb
+from core.trader import TraderAccount
+from core.signer import L1Signer, pack_action
+
+NONCE = 1700000000000
+CASES = {1: dict(split_count=1), 5: dict(split_count=1, sl=2.0, tps=[{'profit_perc': p} for p in (1, 2, 3)]),
+         100: dict(split_count=96, range_percent=1.0, sl=2.0, tps=[{'profit_perc': p} for p in (1, 2, 3)])}
+
+
+def make_client():
+    wallet = Account.from_key('0x' + '11' * 32)
+    client = HyperliquidSync({'walletAddress': wallet.address, 'privateKey': wallet.key.hex()})
+    market = {'id': '0', 'symbol': 'BTC/USDC:USDC', 'base': 'BTC', 'quote': 'USDC', 'baseId': '0', 'spot': False,
+              'precision': {'amount': 1e-05, 'price': 1.0}}
+    client.markets = {'BTC/USDC:USDC': market}
+    client.markets_by_id = {'0': [market]}
+    client.symbols = ['BTC/USDC:USDC']
+    return client
+
+
+def legacy_wire(trader, order_req, market_price=None):
+    """The pre-template wire conversion: market lookup and client formatting on every order."""
+    client = trader.client
+    market = client.market(client.coin_to_market_id(order_req.asset))
+    is_buy = order_req.is_buy
+    if order_req.kind == 'trigger':
+        trigger_px = float(f"{order_req.trigger_px:.8f}")
+        slip = 1 + trader.MARKET_SLIPPAGE if is_buy else 1 - trader.MARKET_SLIPPAGE
+        px = trigger_px * slip if order_req.is_market else float(f"{order_req.limit_px:.8f}")
+        wire_type = {"trigger": {"isMarket": order_req.is_market,
+                                 "triggerPx": client.price_to_precision(market['symbol'], trigger_px),
+                                 "tpsl": order_req.tpsl}}
+    else:
+        px = float(f"{order_req.limit_px:.8f}")
+        wire_type = {"limit": {"tif": order_req.tif}}
+    wire = {"a": int(market['baseId']), "b": is_buy, "p": client.price_to_precision(market['symbol'], px),
+            "s": client.amount_to_precision(market['symbol'], order_req.sz), "r": order_req.reduce_only,
+            "t": wire_type}
+    if order_req.cloid:
+        wire["c"] = order_req.cloid
+    return wire
+
+
+def per_order(fn, legs, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / legs * 1e6
+
+
+def main():
+    client = make_client()
+    trader = TraderAccount(client.walletAddress, client.privateKey, 0)
+    trader.client = client
+    signer = L1Signer.for_client(client)
+    loop = asyncio.new_event_loop()
+    print(f"{'legs':>4} {'build (client fmt)':>19} {'build (template)':>17} {'packb':>8} {'pack_action':>12} "
+          f"{'sign':>8}   us per order")
+    for legs, kwargs in CASES.items():
+        def build():
+            return loop.run_until_complete(trader._build_placement('BTC', 'long', 'limit', 1.0, 60000.0, cloid='0x' + 'ab' * 16,
+                                                                   split_seed=1, **kwargs))
+        with contextlib.redirect_stdout(io.StringIO()):
+            requests, wires, _ = build()
+            assert len(wires) == legs
+            assert [legacy_wire(trader, r) for r in requests] == wires
+            number = max(20, 2000 // legs)
+            template_us = per_order(build, legs, number)
+            legacy_us = template_us - per_order(lambda: [trader._order_to_wire(r) for r in requests], legs, number) \
+                + per_order(lambda: [legacy_wire(trader, r) for r in requests], legs, number)
+        action = {"type": "order", "orders": wires, "grouping": "normalTpsl" if legs > 1 else "na"}
+        packb_us = per_order(lambda: packb(action), legs, number)
+        pack_us = per_order(lambda: pack_action(action), legs, number)
+        sign_us = per_order(lambda: signer(action, NONCE), legs, max(2, number // 20))
+        print(f"{legs:>4} {legacy_us:>19.1f} {template_us:>17.1f} {packb_us:>8.1f} {pack_us:>12.1f} {sign_us:>8.1f}")
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Signing throughput: the CCXT client's sign_l1_action, L1Signer inline on one core, and a burst of
+signatures through the SignerPool. For the burst, also reports the longest event loop stall seen by
+a 1 ms heartbeat task, standing in for WebSocket processing.
+
+Run: python benchmarks/bench_signer.py [burst] [processes]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from eth_account import Account
+from hyperliquid.ccxt import hyperliquid as HyperliquidSync
+from core.signer import L1Signer, SignerPool
+
+ACTION = {'type': 'order', 'grouping': 'na',
+          'orders': [{'a': 0, 'b': True, 'p': '100000', 's': '0.001', 'r': False, 't': {'limit': {'tif': 'Gtc'}},
+                      'c': '0x' + 'a' * 32}]}
+NONCE = 1700000000000
+
+
+def rate(fn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(ACTION, NONCE + i)
+    return count / (time.perf_counter() - started)
+
+
+async def burst(sign_all, count):
+    """Run sign_all(count) while a heartbeat measures how long the loop goes without running it."""
+    stalls = []
+    done = asyncio.Event()
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+    beat = asyncio.ensure_future(heartbeat())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await sign_all(count)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await beat
+    return count / elapsed, max(stalls)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    wallet = Account.from_key('0x' + '11' * 32)
+    client = HyperliquidSync({'walletAddress': wallet.address, 'privateKey': wallet.key.hex()})
+    signer = L1Signer.for_client(client)
+
+    print(f"client sign_l1_action        {rate(client.sign_l1_action, 10):8.1f} sig/s")
+    print(f"L1Signer, one core           {rate(signer, 100):8.1f} sig/s")
+
+    async def inline(n):
+        for i in range(n):
+            signer(ACTION, NONCE + i)
+
+    pool = SignerPool(processes)
+    pool.start()
+    async def pooled(n):
+        await asyncio.gather(*(pool.sign(signer, ACTION, NONCE + i) for i in range(n)))
+
+    for label, sign_all in ((f"burst of {count}, inline", inline),
+                            (f"burst of {count}, pool x{processes}", pooled)):
+        throughput, stall = asyncio.run(burst(sign_all, count))
+        print(f"{label:<28} {throughput:8.1f} sig/s, longest loop stall {stall * 1000:8.1f} ms")
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import bisect
+import itertools
+import time
+from collections import deque
+from core.price_cache import price_cache
+
+LATENCY_SAMPLES = 1000  # Tick-to-send samples kept for latency_stats()
+
+
+class ArmedOrder:
+    """One staged entry: a trigger on one symbol and a pre-built, pre-signed placement per account."""
+    __slots__ = ('armed_id', 'symbol', 'trigger_px', 'above', 'legs', 'armed_at', 'fired_at', 'result')
+
+    def __init__(self, armed_id, symbol, trigger_px, above, legs):
+        self.armed_id = armed_id
+        self.symbol = symbol
+        self.trigger_px = trigger_px
+        self.above = above  # Fires when the mid reaches trigger_px from below (True) or from above (False)
+        self.legs = legs  # [(account, prepared placement)]
+        self.armed_at = time.time()
+        self.fired_at = None
+        self.result = None
+
+
+class ArmedOrderBook:
+    """
+    Price-triggered entries held locally. arm() does all the slow work up front: leverage, leg
+    building and signing for every account. Each symbol keeps two sorted trigger lists (fire
+    above / fire below), so a price cache tick finds every crossed trigger with one bisect and
+    fires all their accounts in parallel. Tick-to-send latency is recorded per account.
+    """
+
+    def __init__(self, prices=price_cache):
+        self.prices = prices
+        self.orders = {}  # armed_id -> ArmedOrder still waiting
+        self._above = {}  # symbol -> ([trigger prices ascending], [ArmedOrder])
+        self._below = {}
+        self._ids = itertools.count(1)
+        self._tasks = set()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # tick-to-send, microseconds
+        self.listeners = []  # Called with (ArmedOrder) once its accounts have all answered
+
+    def start(self):
+        """Attach to the price feed. Must run on the engine loop."""
+        if self.on_tick not in self.prices.listeners:
+            self.prices.listeners.append(self.on_tick)
+
+    def stop(self):
+        if self.on_tick in self.prices.listeners:
+            self.prices.listeners.remove(self.on_tick)
+        for task in self._tasks:
+            task.cancel()
+
+    async def arm(self, symbol: str, trigger_px: float, legs: list, above: bool = None) -> ArmedOrder:
+        """
+        Stage an entry. legs: [(account, place_order kwargs)]; market entries use trigger_px as their
+        reference price. above defaults to the side of the current mid the trigger is on (or, without a
+        quote, above for longs and below for shorts). Accounts that fail to prepare are left out.
+        """
+        if above is None:
+            mid = self.prices.get_mid(symbol, max_age=float('inf'))
+            if mid is not None:
+                above = trigger_px > mid
+            else:
+                above = legs[0][1].get('side', 'long').lower() == 'long' if legs else True
+        prepared = await asyncio.gather(*(account.prepare_order(**dict(kwargs, reference_price=trigger_px))
+                                          for account, kwargs in legs), return_exceptions=True)
+        ready = []
+        for (account, _), result in zip(legs, prepared):
+            if isinstance(result, Exception):
+                print(f"Account {account.account_id}: Could not arm order on {symbol}: {result}")
+            else:
+                ready.append((account, result))
+        if not ready:
+            raise RuntimeError(f"No account could arm the order on {symbol}.")
+        order = ArmedOrder(next(self._ids), symbol, trigger_px, above, ready)
+        prices, orders = (self._above if above else self._below).setdefault(symbol, ([], []))
+        index = bisect.bisect_right(prices, trigger_px)
+        prices.insert(index, trigger_px)
+        orders.insert(index, order)
+        self.orders[order.armed_id] = order
+        self.prices.subscribe(symbol)
+        print(f"ArmedOrders: #{order.armed_id} armed on {symbol} {'>=' if above else '<='} {trigger_px} for {len(ready)} account(s).")
+        return order
+
+    def disarm(self, armed_id: int) -> bool:
+        order = self.orders.pop(armed_id, None)
+        if order is None:
+            return False
+        prices, orders = (self._above if order.above else self._below)[order.symbol]
+        index = orders.index(order)
+        del prices[index], orders[index]
+        return True
+
+    def on_tick(self, symbol: str, mid: float):
+        tick_ns = time.perf_counter_ns()
+        crossed = []
+        book = self._above.get(symbol)
+        if book and book[0][0] <= mid:
+            count = bisect.bisect_right(book[0], mid)
+            crossed += book[1][:count]
+            del book[0][:count], book[1][:count]
+        book = self._below.get(symbol)
+        if book and book[0][-1] >= mid:
+            start = bisect.bisect_left(book[0], mid)
+            crossed += book[1][start:]
+            del book[0][start:], book[1][start:]
+        for order in crossed:
+            self.orders.pop(order.armed_id, None)
+            order.fired_at = tick_ns
+            task = asyncio.ensure_future(self._fire(order, tick_ns))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fire(self, order: ArmedOrder, tick_ns: int):
+        results = await asyncio.gather(*(account.fire_prepared(prepared, tick_ns) for account, prepared in order.legs),
+                                       return_exceptions=True)
+        order.result = {}
+        for (account, _), result in zip(order.legs, results):
+            if isinstance(result, Exception):
+                result = {"status": "error", "message": str(result)}
+            elif result.get("tick_to_send_us") is not None:
+                self.latencies.append(result["tick_to_send_us"])
+            order.result[account.account_id] = result
+        sends = [r["tick_to_send_us"] for r in order.result.values() if r.get("tick_to_send_us") is not None]
+        if sends:
+            print(f"ArmedOrders: #{order.armed_id} fired on {order.symbol}; tick-to-send {min(sends):.0f}-{max(sends):.0f} us.")
+        for listener in list(self.listeners):
+            try:
+                listener(order)
+            except Exception as e:
+                print(f"ArmedOrders: listener failed: {e}")
+        return order.result
+
+    def latency_stats(self) -> dict:
+        """Tick-to-send latency over the recent fires, in microseconds."""
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {"count": len(samples), "p50_us": pick(0.5), "p99_us": pick(0.99), "max_us": samples[-1]}
+
+
+# Shared instance used by the UI.
+armed_orders = ArmedOrderBook()
@@ -0,0 +1,167 @@
+import asyncio
+import random
+import time
+
+
+class AccountHealth:
+    """Connection health of one account, as seen by the ConnectionManager."""
+
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self.state = 'down'  # 'down' | 'connecting' | 'up'
+        self.last_ok = None  # time.monotonic() of the last successful connect or ping
+        self.last_latency = None  # Seconds taken by the last ping
+        self.failures = 0  # Consecutive failed attempts
+        self.last_error = None
+
+    def as_dict(self) -> dict:
+        return {
+            'account_id': self.account_id,
+            'state': self.state,
+            'last_ok': self.last_ok,
+            'last_latency': self.last_latency,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+
+class ConnectionManager:
+    """
+    Keeps every account's HTTP session warm and reconnects dropped accounts in the background.
+    Order placement only reads the health state; it never waits on a reconnect.
+    """
+
+    def __init__(self, keepalive_interval: float = 15.0, base_delay: float = 0.5, max_delay: float = 30.0,
+                 rng=random.random):
+        self.keepalive_interval = keepalive_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng
+        self.accounts = {}  # account_id -> TraderAccount
+        self.health = {}  # account_id -> AccountHealth
+        self._keepalive_tasks = {}
+        self._reconnect_tasks = {}
+
+    def register(self, account):
+        self.accounts[account.account_id] = account
+        self.health.setdefault(account.account_id, AccountHealth(account.account_id))
+        account.connection_manager = self
+
+    def get_health(self, account_id) -> AccountHealth:
+        return self.health.setdefault(account_id, AccountHealth(account_id))
+
+    def health_snapshot(self) -> dict:
+        return {account_id: health.as_dict() for account_id, health in self.health.items()}
+
+    def is_healthy(self, account) -> bool:
+        return account.is_connected and self.get_health(account.account_id).state == 'up'
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, so accounts don't reconnect in lockstep."""
+        return self._rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def request_reconnect(self, account):
+        """Schedule a background reconnect unless one is already running. Never blocks."""
+        task = self._reconnect_tasks.get(account.account_id)
+        if task is not None and not task.done():
+            return task
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        task = loop.create_task(self._reconnect_loop(account))
+        self._reconnect_tasks[account.account_id] = task
+        return task
+
+    async def _reconnect_loop(self, account):
+        health = self.get_health(account.account_id)
+        attempt = 0
+        while True:
+            health.state = 'connecting'
+            # A plain reconnect keeps the existing session; rebuild the client if that keeps failing.
+            await account.connect(force_new=attempt > 0)
+            if account.is_connected:
+                return True
+            attempt += 1
+            health.failures += 1
+            delay = self.backoff_delay(attempt)
+            print(f"Account {account.account_id}: Reconnect attempt {attempt} failed. Retrying in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+
+    def mark_up(self, account_id):
+        health = self.get_health(account_id)
+        health.state = 'up'
+        health.failures = 0
+        health.last_error = None
+        health.last_ok = time.monotonic()
+
+    def mark_down(self, account_id, error=None):
+        health = self.get_health(account_id)
+        health.state = 'down'
+        if error is not None:
+            health.last_error = str(error)
+
+    async def ping(self, account) -> bool:
+        """Send one keepalive request; marks the account down and reconnects on failure."""
+        health = self.get_health(account.account_id)
+        started = time.monotonic()
+        try:
+            await account.ping()
+        except Exception as e:
+            self.mark_down(account.account_id, e)
+            account.is_connected = False
+            self.request_reconnect(account)
+            return False
+        health.last_latency = time.monotonic() - started
+        self.mark_up(account.account_id)
+        return True
+
+    async def _keepalive_loop(self, account):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            if not account.is_connected:
+                self.request_reconnect(account)
+                continue
+            await self.ping(account)
+
+    def start(self, accounts=None):
+        """Register accounts and start their keepalive loops on the running event loop."""
+        loop = asyncio.get_running_loop()
+        for account in accounts or list(self.accounts.values()):
+            self.register(account)
+            task = self._keepalive_tasks.get(account.account_id)
+            if task is None or task.done():
+                self._keepalive_tasks[account.account_id] = loop.create_task(self._keepalive_loop(account))
+            if not account.is_connected:
+                self.request_reconnect(account)
+
+    async def prewarm_all(self, accounts=None) -> dict:
+        """
+        Connect every account and push one request through each session, concurrently,
+        so the TLS connections are open before a planned snipe. Returns the health snapshot.
+        """
+        accounts = accounts or list(self.accounts.values())
+
+        async def warm(account):
+            self.register(account)
+            if not account.is_connected:
+                await account.connect()
+                if not account.is_connected:
+                    self.request_reconnect(account)
+                    return
+            await self.ping(account)
+
+        await asyncio.gather(*(warm(account) for account in accounts))
+        return self.health_snapshot()
+
+    async def stop(self):
+        tasks = list(self._keepalive_tasks.values()) + list(self._reconnect_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._keepalive_tasks.clear()
+        self._reconnect_tasks.clear()
+
+
+# Shared instance used by all accounts in the process.
+connection_manager = ConnectionManager()
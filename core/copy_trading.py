@@ -1,27 +1,195 @@
+import asyncio
+from core.engine import engine
+from core.fanout import FanoutExecutor
+from core.equity_snapshot import equity_snapshot
+from core.price_cache import price_cache
+from core.market_registry import get_symbol_index
+from core.models import Order
+from utils.helpers import derive_cloid, order_cloids
+
+SIZING_MODES = ('copy', 'ratio', 'notional')
+# Seconds a closed order group's links are kept, for its fills and cancels still on the stream
+LINK_RETENTION = 60.0
+
 class CopyTradingManager:
-    def __init__(self, master_account, subscriber_accounts, pair_map=None):
-        self.master = master_account
+    def __init__(self, master_account, subscriber_accounts, pair_map=None, max_parallel=16,
+                 sizing='copy', fixed_notional=None, equities=None):
+        """
+        sizing: 'copy' sends the master's size unchanged, 'ratio' scales it by
+        subscriber equity / master equity, 'notional' sizes each subscriber to a fixed
+        USD notional (fixed_notional: a number, or {account_id: notional}).
+        pair_map ({subscriber_account_id: symbol}) accepts any symbol alias; it is resolved to market
+        symbols once per market load (see the pair_map property), not per order.
+        """
+        self.executor = FanoutExecutor(max_parallel=max_parallel)
+        self.fixed_notional = fixed_notional
+        self.equities = equities or equity_snapshot
+        # Master cloids (with their SL/TP/split legs) whose subscriber copies execute() placed;
+        # the fill mirror leaves fills on these alone since subscribers hold their own orders.
+        self.linked_cloids = {}  # cloid -> (parent cloid, leg parts), see utils.helpers.order_cloids
+        self._linked_groups = {}  # parent cloid -> its cloids in linked_cloids
+        self.link_retention = LINK_RETENTION
+        self.master = None
+        self._watched_store = None
+        self.configure(master_account, subscriber_accounts, pair_map, sizing)
+
+    def configure(self, master_account, subscriber_accounts, pair_map=None, sizing='copy'):
+        """
+        Change the accounts, pair map or sizing in place. Links to orders already copied survive,
+        so their fills are still recognised and not mirrored a second time.
+        """
+        if sizing not in SIZING_MODES:
+            raise ValueError(f"Unknown sizing mode: {sizing}")
         self.subscribers = subscriber_accounts
-        self.pair_map = pair_map or {}  # {subscriber_account_id: symbol}
+        self.pair_map = pair_map
+        self.sizing = sizing
+        if master_account is not self.master:
+            self.master = master_account
+            self._watch_master()
+
+    def _watch_master(self):
+        """Follow the master's order store, so links are dropped once their order group has closed."""
+        if self._watched_store is not None and self._on_master_leg in self._watched_store.leg_listeners:
+            self._watched_store.leg_listeners.remove(self._on_master_leg)
+        self._watched_store = getattr(self.master, 'order_store', None)
+        if self._watched_store is not None:
+            self._watched_store.leg_listeners.append(self._on_master_leg)
+
+    def _on_master_leg(self, leg):
+        parent = leg.get('parent')
+        if leg.get('event') != 'closed' or parent not in self._linked_groups or self._watched_store.group(parent):
+            return
+        # Every leg of the order has closed; fills and cancels for it may still be on the stream
+        try:
+            asyncio.get_running_loop().call_later(self.link_retention, self.unlink, parent)
+        except RuntimeError:
+            self.unlink(parent)
+
+    def link(self, parent: str, split_count: int = 1, tp_count: int = 0):
+        """Record a master order (and its legs) whose subscriber copies are placed by this manager."""
+        cloids = order_cloids(parent, split_count, tp_count)
+        self.linked_cloids.update(cloids)
+        self._linked_groups[parent] = list(cloids)
+
+    def unlink(self, parent: str):
+        for cloid in self._linked_groups.pop(parent, ()):
+            self.linked_cloids.pop(cloid, None)
+
+    @property
+    def pair_map(self) -> dict:
+        """
+        {subscriber_account_id: market symbol}. Resolved against the current symbol index and kept
+        until the registry's markets change, so a map configured before markets load (when every
+        alias passes through unresolved) is resolved once they arrive.
+        """
+        index = get_symbol_index()
+        if self._pair_map_index is not index:
+            self._resolved_pair_map = index.resolve_map(self._pair_map)
+            self._pair_map_index = index
+        return self._resolved_pair_map
+
+    @pair_map.setter
+    def pair_map(self, pair_map):
+        self._pair_map = dict(pair_map or {})  # As configured, aliases and all
+        self._pair_map_index = None
+        self._resolved_pair_map = None
+
+    def _notional_for(self, account_id):
+        if isinstance(self.fixed_notional, dict):
+            return self.fixed_notional.get(account_id)
+        return self.fixed_notional
+
+    async def size_subscribers(self, order_data, sizing=None) -> dict:
+        """
+        Work out every subscriber's size in one pass, before the fan-out starts.
+        Returns {account_id: size}; a subscriber whose size can't be determined maps to None.
+        sizing overrides the manager's mode for this call.
+        """
+        sizing = sizing or self.sizing
+        if sizing == 'copy':
+            return {sub.account_id: order_data['size'] for sub in self.subscribers}
+        if sizing == 'ratio':
+            equities = await self.equities.get([self.master] + list(self.subscribers))
+            master_equity = equities.get(self.master.account_id)
+            if not master_equity or master_equity <= 0:
+                return {sub.account_id: None for sub in self.subscribers}
+            return {sub.account_id: order_data['size'] * equities[sub.account_id] / master_equity
+                    if equities.get(sub.account_id) else None
+                    for sub in self.subscribers}
+        # notional
+        price = order_data.get('price') or price_cache.get_mid(order_data['symbol'])
+        if price is None:
+            price = await self.master.get_market_price(order_data['symbol'])
+        return {sub.account_id: self._notional_for(sub.account_id) / price
+                if price and self._notional_for(sub.account_id) else None
+                for sub in self.subscribers}
+
+    async def aggregate_size(self, order_data) -> float:
+        """Master size plus every subscriber size that trades the same symbol, for pre-trade impact checks."""
+        sizes = {sub.account_id: order_data['size'] for sub in self.subscribers} if self.sizing == 'copy' \
+            else await self.size_subscribers(order_data)
+        symbol = get_symbol_index().symbol(order_data['symbol'])
+        pair_map = self.pair_map
+        same_symbol = [sub.account_id for sub in self.subscribers if pair_map.get(sub.account_id, symbol) == symbol]
+        return order_data['size'] + sum(sizes.get(account_id) or 0.0 for account_id in same_symbol)
+
+    def build_subscriber_orders(self, order_data, sizes=None):
+        """
+        Returns [(subscriber, place_order kwargs)] with pair mapping and sizing applied. The copies are
+        dicts: dict(base, ...) is several times cheaper than Order.replace, once per subscriber per order.
+        """
+        order_data = Order.coerce(order_data)
+        base = dict(order_data)
+        pair_map = self.pair_map
+        legs = []
+        for sub in self.subscribers:
+            account_id = getattr(sub, 'account_id', None)
+            size = order_data.size
+            if sizes is not None:
+                size = sizes.get(account_id)
+                if not size or size <= 0:
+                    print(f"CopyTrading: Skipping account {account_id}: could not size order ({self.sizing}).")
+                    continue
+            # Map symbol if a mapping exists for this subscriber. The cloid is deterministic per
+            # subscriber, so the master's cancels can be mirrored by cloid
+            leg = dict(base, symbol=pair_map.get(account_id) or order_data.symbol, size=size)
+            if order_data.cloid:
+                leg['cloid'] = derive_cloid(order_data.cloid, account_id)
+            legs.append((sub, leg))
+        return legs
+
+    async def legs_for(self, order_data, split_count=None) -> list:
+        """
+        [(account, order_kwargs)] for the master and every sized subscriber, for callers that drive
+        the accounts themselves (armed orders, scheduled executions). The master's cloids are linked
+        as in execute(); split_count overrides order_data's for the linked entry cloids.
+        """
+        order_data = Order.coerce(order_data)
+        sizes = None if self.sizing == 'copy' else await self.size_subscribers(order_data)
+        if order_data.cloid:
+            self.link(order_data.cloid, split_count or order_data.get('split_count') or 1, len(order_data.get('tps') or []))
+        return [(self.master, order_data)] + self.build_subscriber_orders(order_data, sizes)
+
+    async def execute(self, order_data, include_master=True, cancel_on_master_failure=True):
+        """
+        Send the master order and all subscriber orders concurrently.
+        Returns the fan-out result: per-account status, result and send/ack latencies.
+        """
+        order_data = Order.coerce(order_data)
+        sizes = None if self.sizing == 'copy' else await self.size_subscribers(order_data)
+        if order_data.cloid:
+            self.link(order_data.cloid, order_data.get('split_count') or 1, len(order_data.get('tps') or []))
+        master_leg = (self.master, order_data) if include_master and self.master else None
+        result = await self.executor.run(master_leg, self.build_subscriber_orders(order_data, sizes),
+                                         cancel_on_master_failure=cancel_on_master_failure)
+        if master_leg and order_data.cloid and result['legs'][0]['status'] == 'error':
+            self.unlink(order_data.cloid)  # Nothing of the master's order will fill or cancel
+        return result
 
     def mirror_order(self, order_data):
         """
         Mirror the master order to all subscribers.
-        order_data: dict with keys like symbol, side, order_type, size, price, sl, tps, etc.
+        order_data: Order, or a dict with keys like symbol, side, order_type, size, price, sl, tps, etc.
+        Schedules execute() on the engine loop and returns its future.
         """
-        for sub in self.subscribers:
-            sub_order = order_data.copy()
-            # Map symbol if a mapping exists for this subscriber
-            mapped_symbol = self.pair_map.get(getattr(sub, 'account_id', None))
-            if mapped_symbol:
-                sub_order['symbol'] = mapped_symbol
-            # Place order for subscriber
-            import asyncio
-            async def do_order():
-                await sub.place_order(**sub_order)
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.create_task(do_order())
+        return engine.submit(self.execute(order_data))
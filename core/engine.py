@@ -0,0 +1,78 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+class EngineLoop:
+    """
+    The single asyncio event loop that runs all trading coroutines.
+    It lives on a dedicated daemon thread so the Qt main loop never blocks on network I/O,
+    and any thread can hand it work through submit().
+    """
+
+    def __init__(self, name: str = 'trading-engine'):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop thread. Safe to call more than once."""
+        with self._lock:
+            if self.running:
+                return
+            ready = threading.Event()
+            self.loop = asyncio.new_event_loop()
+
+            def run():
+                asyncio.set_event_loop(self.loop)
+                self.loop.call_soon(ready.set)
+                self.loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def in_engine_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the engine loop from any thread. Returns a thread-safe future."""
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        """Run a plain callable on the engine thread."""
+        if not self.running:
+            self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel outstanding tasks, stop the loop and join the thread."""
+        if not self.running:
+            return
+
+        async def shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"EngineLoop: Error during shutdown: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
+        self._thread = None
+        self.loop = None
+
+
+# Shared instance used by the UI and all core components.
+engine = EngineLoop()
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+
+class EquitySnapshot:
+    """
+    Account equities for every account, refreshed concurrently in one pass and cached for
+    a short TTL, so sizing an order never waits on per-account balance fetches.
+    """
+
+    def __init__(self, ttl: float = 5.0, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self.equities = {}  # account_id -> equity (None if the fetch failed)
+        self.updated_at = {}  # account_id -> clock time of the last refresh
+        self._refresh_task = None
+        self._refresh_ids = set()
+
+    def peek(self, account_id, max_age: float = None):
+        """Cached equity if fresh, else None. Never does I/O."""
+        updated = self.updated_at.get(account_id)
+        if updated is None or self._clock() - updated > (self.ttl if max_age is None else max_age):
+            return None
+        return self.equities.get(account_id)
+
+    async def refresh(self, accounts) -> dict:
+        """Fetch equity for all accounts concurrently. Overlapping refreshes share one pass."""
+        accounts = list(accounts)
+        ids = {a.account_id for a in accounts}
+        if self._refresh_task is None or self._refresh_task.done() or not ids <= self._refresh_ids:
+            self._refresh_task = asyncio.ensure_future(self._do_refresh(accounts))
+            self._refresh_ids = ids
+        await asyncio.shield(self._refresh_task)
+        return {a.account_id: self.equities.get(a.account_id) for a in accounts}
+
+    async def _do_refresh(self, accounts):
+        results = await asyncio.gather(*(a.get_account_equity() for a in accounts), return_exceptions=True)
+        now = self._clock()
+        for account, equity in zip(accounts, results):
+            self.equities[account.account_id] = None if isinstance(equity, BaseException) else equity
+            self.updated_at[account.account_id] = now
+
+    async def get(self, accounts, max_age: float = None) -> dict:
+        """Equities for accounts, served from cache when every entry is fresh."""
+        accounts = list(accounts)
+        limit = self.ttl if max_age is None else max_age
+        now = self._clock()
+        if all(now - self.updated_at.get(a.account_id, float('-inf')) <= limit for a in accounts):
+            return {a.account_id: self.equities.get(a.account_id) for a in accounts}
+        return await self.refresh(accounts)
+
+
+# Shared instance used by the controls panel and copy trading.
+equity_snapshot = EquitySnapshot()
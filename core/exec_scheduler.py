@@ -0,0 +1,320 @@
+import asyncio
+import itertools
+import time
+from core.models import Order
+from core.split_executor import response_statuses
+from utils.helpers import derive_cloid, new_cloid
+
+SCHEDULE_MODES = ('twap', 'iceberg')
+CHILD_TIMEOUT = 10.0  # Iceberg: send the next slice anyway if a child's close never arrives on the stream
+MAX_CHILD_ERRORS = 3  # Rejected or failed child sends before a schedule gives up
+SIZE_EPSILON = 1e-9
+
+
+class Timer:
+    __slots__ = ('due', 'callback', 'args', 'cancelled')
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel driven by one asyncio task. Timers land in slot (due tick % slots), so
+    scheduling and cancelling are O(1) and each tick only looks at one slot. The task sleeps
+    while no timers are pending.
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 512, clock=time.monotonic):
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]
+        self._clock = clock
+        self._current = None  # Last tick processed
+        self._pending = 0
+        self._wake = None
+        self._task = None
+
+    def _tick_of(self, t: float) -> int:
+        return int(t / self.tick)
+
+    def call_later(self, delay: float, callback, *args) -> Timer:
+        """Run callback(*args) on the engine loop after delay seconds (rounded up to the tick)."""
+        now = self._tick_of(self._clock())
+        if self._current is None or self._pending == 0:
+            self._current = now - 1
+        timer = Timer(max(now + int(-(-delay // self.tick)), self._current + 1), callback, args)
+        self._slots[timer.due % len(self._slots)].append(timer)
+        self._pending += 1
+        self._ensure_running()
+        return timer
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            if self._pending == 0:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            target = self._tick_of(self._clock())
+            while self._current < target:
+                self._current += 1
+                self._advance(self._current)
+            await asyncio.sleep(max(0.0, (self._current + 1) * self.tick - self._clock()))
+
+    def _advance(self, tick: int):
+        slot = self._slots[tick % len(self._slots)]
+        if not slot:
+            return
+        due = [t for t in slot if t.due <= tick]
+        slot[:] = [t for t in slot if t.due > tick]
+        self._pending -= len(due)
+        for timer in due:
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                print(f"TimerWheel: timer callback failed: {e}")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for slot in self._slots:
+            slot.clear()
+        self._pending = 0
+
+
+class Schedule:
+    """One account's share of a scheduled execution: market slices of a parent order, sent over time."""
+    __slots__ = ('schedule_id', 'group_id', 'account', 'order', 'mode', 'slices', 'interval', 'parent',
+                 'total', 'filled', 'in_flight', 'sent', 'errors', 'status', 'timer', 'children', 'started_at',
+                 'caught_up')
+
+    def __init__(self, schedule_id, group_id, account, order, mode, slices, interval):
+        self.schedule_id = schedule_id
+        self.group_id = group_id
+        self.account = account
+        self.order = order  # Order for the whole size
+        self.mode = mode
+        self.slices = slices
+        self.interval = interval
+        self.parent = order.cloid or new_cloid()
+        self.total = float(order.size)
+        self.filled = 0.0
+        self.in_flight = {}  # child cloid -> size sent and not yet closed
+        self.sent = 0  # Slices sent so far
+        self.errors = 0
+        self.status = 'running'
+        self.timer = None
+        self.children = []
+        self.started_at = time.time()
+        self.caught_up = False  # TWAP gets one extra slice for what its last slices left unfilled
+
+    @property
+    def remaining(self) -> float:
+        """Size neither filled nor in flight."""
+        return self.total - self.filled - sum(self.in_flight.values())
+
+    def summary(self) -> dict:
+        return {'schedule_id': self.schedule_id, 'account_id': self.account.account_id, 'mode': self.mode,
+                'status': self.status, 'total': self.total, 'filled': self.filled,
+                'sent': self.sent, 'slices': self.slices, 'errors': self.errors}
+
+
+class ExecutionScheduler:
+    """
+    Spreads market entries over a horizon on every account at once.
+    'twap' sends a slice every horizon / slices seconds, each sized as the unfilled rest divided by
+    the slices left, so short fills are made up by later slices. 'iceberg' keeps one slice in flight
+    and sends the next when the stream reports it closed (after refill_delay).
+    All schedules share one TimerWheel; fills arrive through each account's order store leg events.
+    The first slice goes through place_order, setting leverage and the SL/TP legs for the full size.
+    """
+
+    def __init__(self, wheel: TimerWheel = None):
+        self.wheel = wheel or TimerWheel()
+        self.schedules = {}  # schedule_id -> Schedule
+        self.groups = {}  # group_id -> [schedule_id]
+        self._children = {}  # child cloid -> Schedule
+        self._listening = {}  # account_id -> (account, listener)
+        self._ids = itertools.count(1)
+        self._tasks = set()
+        self.listeners = []  # Called with (Schedule) when a schedule finishes, fails or is cancelled
+
+    def submit(self, legs: list, mode: str = 'twap', horizon: float = 60.0, slices: int = 10,
+               refill_delay: float = 0.0) -> int:
+        """
+        Start a scheduled execution. legs: [(account, place_order kwargs)], as for copy trading.
+        Returns the group id used by cancel() and status(). Must run on the engine loop.
+        """
+        if mode not in SCHEDULE_MODES:
+            raise ValueError(f"Unknown schedule mode: {mode}")
+        slices = max(1, int(slices))
+        interval = horizon / slices if mode == 'twap' else refill_delay
+        group_id = next(self._ids)
+        self.groups[group_id] = []
+        for account, order in legs:
+            self._listen(account)
+            schedule = Schedule(next(self._ids), group_id, account, Order.coerce(order).copy(), mode, slices, interval)
+            self.schedules[schedule.schedule_id] = schedule
+            self.groups[group_id].append(schedule.schedule_id)
+            self._send_next(schedule)
+        print(f"ExecutionScheduler: group {group_id} started: {mode} over {slices} slices on {len(legs)} account(s).")
+        return group_id
+
+    def cancel(self, group_id: int) -> int:
+        """Stop sending further slices of a group. Children already sent (IOC) finish on their own."""
+        cancelled = 0
+        for schedule_id in self.groups.get(group_id, ()):
+            schedule = self.schedules.get(schedule_id)
+            if schedule and schedule.status == 'running':
+                self._finish(schedule, 'cancelled')
+                cancelled += 1
+        return cancelled
+
+    def cancel_all(self) -> int:
+        return sum(self.cancel(group_id) for group_id in list(self.groups))
+
+    def status(self, group_id: int) -> list:
+        return [self.schedules[i].summary() for i in self.groups.get(group_id, ()) if i in self.schedules]
+
+    def _listen(self, account):
+        if account.account_id in self._listening:
+            return
+        listener = lambda leg: self.on_leg_event(leg)
+        account.order_store.leg_listeners.append(listener)
+        self._listening[account.account_id] = (account, listener)
+
+    # --- sending ---
+
+    def _send_next(self, schedule: Schedule):
+        schedule.timer = None
+        if schedule.status != 'running':
+            return
+        slices_left = schedule.slices - schedule.sent
+        remaining = schedule.remaining
+        if remaining <= SIZE_EPSILON or slices_left <= 0:
+            if not schedule.in_flight:
+                self._finish(schedule, 'done')
+            elif schedule.mode == 'twap' and slices_left > 0:
+                # Everything is in flight; look again next interval in case a child fills short
+                schedule.timer = self.wheel.call_later(schedule.interval, self._send_next, schedule)
+            return
+        size = remaining if slices_left == 1 else remaining / slices_left
+        index = schedule.sent
+        cloid = schedule.parent if index == 0 else derive_cloid(schedule.parent, 'e', index + 1)
+        schedule.sent += 1
+        schedule.in_flight[cloid] = size
+        schedule.children.append(cloid)
+        self._children[cloid] = schedule
+        task = asyncio.ensure_future(self._send(schedule, cloid, size, index))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if schedule.mode == 'twap' and schedule.sent < schedule.slices:
+            schedule.timer = self.wheel.call_later(schedule.interval, self._send_next, schedule)
+
+    async def _send(self, schedule: Schedule, cloid: str, size: float, index: int):
+        order = schedule.order
+        try:
+            if index == 0:
+                result = await schedule.account.place_order(**order.replace(size=size, cloid=cloid, split_count=1,
+                                                                            leg_size=schedule.total))
+            else:
+                result = await schedule.account.send_market_slice(order.symbol, order.side.lower() == 'long', size,
+                                                                  cloid, schedule.parent, order.reduce_only or False)
+        except Exception as e:
+            result = {'status': 'error', 'message': str(e)}
+        statuses = response_statuses(result) if isinstance(result, dict) and result.get('status') == 'ok' else []
+        entry_status = statuses[0] if statuses else None
+        if not isinstance(result, dict) or result.get('status') in ('error', 'err') \
+                or (isinstance(entry_status, dict) and 'error' in entry_status):
+            schedule.errors += 1
+            print(f"Account {schedule.account.account_id}: Schedule {schedule.schedule_id} slice {index + 1} failed: {result}")
+            self._child_closed(schedule, cloid, 0.0)
+        elif isinstance(entry_status, dict) and 'filled' in entry_status:
+            # IOC acks carry the fill; the stream's close for this child is then ignored
+            self._child_closed(schedule, cloid, float(entry_status['filled'].get('totalSz') or 0.0))
+        elif schedule.mode == 'iceberg' and cloid in schedule.in_flight:
+            # Fallback for a close that never arrives on the stream: assume the slice filled
+            schedule.timer = self.wheel.call_later(CHILD_TIMEOUT, self._child_timed_out, schedule, cloid)
+
+    def _child_timed_out(self, schedule: Schedule, cloid: str):
+        schedule.timer = None
+        if cloid in schedule.in_flight:
+            self._child_closed(schedule, cloid, schedule.in_flight[cloid])
+
+    # --- fills from the stream ---
+
+    def on_leg_event(self, leg: dict):
+        if leg['event'] != 'closed':
+            return
+        schedule = self._children.get(leg['cloid'])
+        if schedule is None or leg['cloid'] not in schedule.in_flight:
+            return
+        filled = leg.get('filled')
+        if filled is None:
+            filled = schedule.in_flight[leg['cloid']] if leg['status'] == 'closed' else 0.0
+        self._child_closed(schedule, leg['cloid'], float(filled))
+
+    def _child_closed(self, schedule: Schedule, cloid: str, filled: float):
+        schedule.in_flight.pop(cloid, None)
+        self._children.pop(cloid, None)
+        schedule.filled += filled
+        if schedule.status != 'running':
+            return
+        if schedule.errors >= MAX_CHILD_ERRORS:
+            self._finish(schedule, 'error')
+            return
+        if schedule.mode == 'iceberg':
+            if schedule.timer:
+                schedule.timer.cancel()
+                schedule.timer = None
+            if schedule.interval > 0:
+                schedule.timer = self.wheel.call_later(schedule.interval, self._send_next, schedule)
+            else:
+                self._send_next(schedule)
+        elif schedule.sent >= schedule.slices and not schedule.in_flight:
+            if schedule.remaining > SIZE_EPSILON and not schedule.caught_up:
+                schedule.caught_up = True
+                schedule.slices += 1
+                self._send_next(schedule)
+            else:
+                self._finish(schedule, 'done')
+
+    def _finish(self, schedule: Schedule, status: str):
+        schedule.status = status
+        if schedule.timer:
+            schedule.timer.cancel()
+            schedule.timer = None
+        print(f"Account {schedule.account.account_id}: Schedule {schedule.schedule_id} {status}: "
+              f"{schedule.filled:.8g}/{schedule.total:.8g} filled in {schedule.sent} slice(s).")
+        for listener in list(self.listeners):
+            try:
+                listener(schedule)
+            except Exception as e:
+                print(f"ExecutionScheduler: listener failed: {e}")
+
+    def stop(self):
+        self.cancel_all()
+        self.wheel.stop()
+        for account, listener in self._listening.values():
+            if listener in account.order_store.leg_listeners:
+                account.order_store.leg_listeners.remove(listener)
+        self._listening = {}
+
+
+
+# Shared instance used by the UI.
+execution_scheduler = ExecutionScheduler()
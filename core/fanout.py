@@ -0,0 +1,128 @@
+import asyncio
+import time
+from core.split_executor import response_statuses
+from utils.helpers import new_cloid, order_cloids
+
+DEFAULT_MAX_PARALLEL = 16
+
+
+def is_failed_result(result) -> bool:
+    """place_order reports failures as {"status": "error"} (ours) or {"status": "err"} (exchange)."""
+    return isinstance(result, dict) and result.get('status') in ('error', 'err')
+
+
+class FanoutExecutor:
+    """
+    Sends the master order and every subscriber order concurrently under bounded parallelism,
+    so N accounts cost roughly one round trip. Each leg reports its send and ack latency.
+    If the master leg fails, subscriber legs still waiting for a slot are not sent ('cancelled').
+    Legs already in flight are never interrupted mid-request: they finish, and whatever they placed
+    is then cancelled by cloid ('sent_then_cancelled'). An entry that filled before it could be
+    cancelled leaves a position; that leg keeps its SL/TP and is reported 'filled_not_cancellable'.
+    """
+
+    def __init__(self, max_parallel: int = DEFAULT_MAX_PARALLEL):
+        self.max_parallel = max_parallel
+
+    async def run(self, master_leg, subscriber_legs, cancel_on_master_failure: bool = True) -> dict:
+        """
+        master_leg / subscriber_legs: (account, order_kwargs) pairs; master_leg may be None.
+        Returns {"status", "elapsed", "legs": [per-account result dicts]} with the master first.
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        started = time.perf_counter()
+        legs = ([('master', master_leg)] if master_leg else []) + [('subscriber', leg) for leg in subscriber_legs]
+        reports = [self._new_report(role, account) for role, (account, _) in legs]
+        master_failed = asyncio.Event()
+
+        async def send(report, account, order_kwargs):
+            async with semaphore:
+                if master_failed.is_set() and report['role'] == 'subscriber':
+                    report['status'] = 'cancelled'
+                    return
+                sent = time.perf_counter()
+                report['send_latency'] = sent - started
+                try:
+                    result = await account.place_order(**order_kwargs)
+                except Exception as e:
+                    report['status'], report['error'] = 'error', str(e)
+                else:
+                    report['result'] = result
+                    report['status'] = 'error' if is_failed_result(result) else 'ok'
+                report['ack_latency'] = time.perf_counter() - sent
+                if report['role'] == 'master' and report['status'] == 'error' and cancel_on_master_failure:
+                    master_failed.set()  # Before the slot is released, so no queued subscriber is sent
+
+        if master_leg and cancel_on_master_failure:
+            # Subscriber legs need a cloid to be cancelled if the master fails after they are sent
+            legs = legs[:1] + [(role, (account, kwargs if kwargs.get('cloid') else self._with_cloid(kwargs)))
+                               for role, (account, kwargs) in legs[1:]]
+        tasks = [asyncio.ensure_future(send(report, account, kwargs))
+                 for report, (_, (account, kwargs)) in zip(reports, legs)]
+
+        if master_leg and cancel_on_master_failure:
+            await asyncio.wait([tasks[0]])
+            if master_failed.is_set():
+                await asyncio.gather(*tasks[1:], return_exceptions=True)
+                sent = [(report, account, kwargs) for report, (_, (account, kwargs)) in zip(reports[1:], legs[1:])
+                        if report['status'] == 'ok']
+                await asyncio.gather(*(self._cancel_sent(*leg) for leg in sent))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        statuses = {report['status'] for report in reports}
+        status = 'ok' if statuses <= {'ok'} else ('error' if 'ok' not in statuses else 'partial')
+        return {'status': status, 'elapsed': time.perf_counter() - started, 'legs': reports}
+
+    @staticmethod
+    def _with_cloid(order_kwargs):
+        if hasattr(order_kwargs, 'replace'):
+            return order_kwargs.replace(cloid=new_cloid())
+        return dict(order_kwargs, cloid=new_cloid())
+
+    @staticmethod
+    async def _cancel_sent(report, account, order_kwargs):
+        """
+        Cancel a subscriber order placed before the master failed: the entries (or splits) first, then,
+        if none of them had filled, the SL/TP legs. A filled entry keeps its legs to protect the position.
+        """
+        split_count = order_kwargs.get('split_count') or 1
+        cloids = order_cloids(order_kwargs['cloid'], split_count, len(order_kwargs.get('tps') or []))
+        entries = [c for c, (_, parts) in cloids.items() if parts[:1] == ('e',) or (not parts and split_count <= 1)]
+        legs = [c for c in cloids if c not in entries]
+        placed = report['result'] if isinstance(report['result'], dict) else {}
+        statuses = placed.get('statuses') or response_statuses(placed)
+        filled = any(isinstance(s, dict) and 'filled' in s for s in statuses)
+        symbol = order_kwargs['symbol']
+        try:
+            cancelled = await account.cancel_by_cloid(symbol, entries)  # Also any resting rest of a ladder
+            report['cancel'] = [cancelled]
+            if is_failed_result(cancelled):
+                raise RuntimeError(cancelled.get('response') or cancelled.get('message'))
+            # A resting entry that can no longer be cancelled filled in the meantime
+            missed = any(isinstance(s, dict) and 'error' in s for s in response_statuses(cancelled))
+            rested = not statuses or any(isinstance(s, dict) and 'resting' in s for s in statuses)
+            if filled or (missed and rested):
+                report['status'] = 'filled_not_cancellable'
+                report['error'] = "Master failed after this order filled; the position stays open with its SL/TP."
+                return
+            if legs:
+                cancelled = await account.cancel_by_cloid(symbol, legs)
+                report['cancel'].append(cancelled)
+                if is_failed_result(cancelled):
+                    raise RuntimeError(cancelled.get('response') or cancelled.get('message'))
+            report['status'] = 'sent_then_cancelled'
+        except Exception as e:
+            report['status'], report['error'] = 'error', f"Master failed; cancelling the sent order failed: {e}"
+
+    @staticmethod
+    def _new_report(role, account) -> dict:
+        return {
+            'account_id': getattr(account, 'account_id', None),
+            'role': role,
+            'status': 'pending',
+            'result': None,
+            'cancel': None,  # Cancel results (entries, then SL/TP legs), for a leg sent before the master failed
+            'error': None,
+            'send_latency': None,  # Seconds from fan-out start until this leg was sent
+            'ack_latency': None,  # Seconds from send until the exchange answered
+        }
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import OrderedDict
+from core.models import Fill, Order
+from utils.helpers import derive_cloid
+
+SEEN_LIMIT = 10000  # Handled fill/cancel keys remembered for replay protection
+
+
+class FillMirror:
+    """
+    Copies the master's fills, partial fills and cancels to subscribers as they arrive on the
+    master's user-event stream, so trades from any source (web, TP/SL triggers) are mirrored.
+    Each fill becomes a market order per subscriber whose cloid is derived from the fill id,
+    and handled keys are remembered, so stream replays after a reconnect never send twice.
+    Orders placed through CopyTradingManager.execute() are skipped: subscribers already hold
+    their own copies, which fill on their own. Cancels of those orders are mirrored by cloid.
+    """
+
+    def __init__(self, manager, seen_limit: int = SEEN_LIMIT, clock=time.time):
+        self.manager = manager
+        self.seen_limit = seen_limit
+        self._clock = clock
+        self._seen = OrderedDict()
+        self._order_cloids = {}  # master oid -> cloid, for fills that arrive without one
+        self._tasks = set()
+        self._listen_task = None
+        self.started_at_ms = None
+        self.stats = {'fills': 0, 'mirrored': 0, 'cancels': 0, 'skipped': 0}
+
+    def start(self):
+        """Subscribe to the master's stream. Must run on the engine loop."""
+        if self._listen_task and not self._listen_task.done():
+            return self._listen_task
+        # The stream opens with a snapshot of past fills; only fills after this point are copied
+        self.started_at_ms = self._clock() * 1000
+        self._listen_task = asyncio.ensure_future(self.manager.master.listen_order_updates(self.handle_update))
+        print(f"FillMirror: Mirroring fills from account {self.manager.master.account_id} "
+              f"to {len(self.manager.subscribers)} subscriber(s).")
+        return self._listen_task
+
+    async def stop(self):
+        tasks = [t for t in [self._listen_task, *self._tasks] if t and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listen_task = None
+
+    async def restart(self):
+        """Re-subscribe after the manager's master changed; mirroring already under way finishes."""
+        if self._listen_task and not self._listen_task.done():
+            self._listen_task.cancel()
+            await asyncio.gather(self._listen_task, return_exceptions=True)
+        self._listen_task = None
+        return self.start()
+
+    def _first_time(self, key) -> bool:
+        """True the first time key is seen; bounded so a long session doesn't grow without limit."""
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.seen_limit:
+            self._seen.popitem(last=False)
+        return True
+
+    def handle_update(self, update):
+        """Listener for TraderAccount.listen_order_updates; schedules the mirroring work."""
+        data = update.get('data') or {}
+        if update.get('type') == 'fill':
+            work = self.mirror_fill(data)
+        elif update.get('type') == 'order':
+            if data.get('id') and data.get('clientOrderId'):
+                self._order_cloids[data['id']] = data['clientOrderId']
+            if data.get('status') != 'canceled':
+                return
+            work = self.mirror_cancel(data)
+        else:
+            return
+        task = asyncio.ensure_future(work)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def mirror_fill(self, fill):
+        """Send one master fill to every subscriber. Returns the fan-out result, or None if skipped."""
+        key = f"fill:{fill.get('id')}"
+        if not self._first_time(key):
+            return None
+        self.stats['fills'] += 1
+        fill = Fill.from_ccxt(fill)
+        cloid = fill.cloid or self._order_cloids.get(fill.order)
+        if (fill.timestamp is not None and self.started_at_ms is not None and fill.timestamp < self.started_at_ms) \
+                or (cloid and cloid in self.manager.linked_cloids):
+            self.stats['skipped'] += 1
+            return None
+
+        order_data = Order(fill.symbol, 'long' if fill.side == 'buy' else 'short', 'market', fill.amount,
+                           reduce_only=fill.dir.startswith('Close'))
+        # Per-fill sizes can't be held to a fixed notional, so that mode scales by equity here
+        sizing = 'ratio' if self.manager.sizing == 'notional' else self.manager.sizing
+        sizes = None if sizing == 'copy' else await self.manager.size_subscribers(order_data, sizing=sizing)
+        legs = self.manager.build_subscriber_orders(order_data, sizes)
+        for sub, order in legs:
+            order['cloid'] = derive_cloid(key, sub.account_id)
+        result = await self.manager.executor.run(None, legs)
+        self.stats['mirrored'] += 1
+        print(f"FillMirror: {order_data.side} {order_data.size} {order_data.symbol} -> "
+              f"{result['status']} in {result['elapsed'] * 1000:.0f} ms")
+        return result
+
+    async def mirror_cancel(self, order):
+        """Cancel the subscriber copies of a cancelled master order placed through execute()."""
+        cloid = order.get('clientOrderId')
+        if not cloid or cloid not in self.manager.linked_cloids or not self._first_time(f"cancel:{cloid}"):
+            return None
+        self.stats['cancels'] += 1
+
+        parent, parts = self.manager.linked_cloids[cloid]
+
+        async def cancel(sub):
+            symbol = self.manager.pair_map.get(sub.account_id) or order['symbol']
+            # The subscriber's copy of this leg hangs off its own parent cloid
+            sub_cloid = derive_cloid(derive_cloid(parent, sub.account_id), *parts) if parts \
+                else derive_cloid(parent, sub.account_id)
+            return await sub.cancel_by_cloid(symbol, [sub_cloid])
+
+        results = await asyncio.gather(*(cancel(sub) for sub in self.manager.subscribers), return_exceptions=True)
+        return {sub.account_id: result for sub, result in zip(self.manager.subscribers, results)}
@@ -0,0 +1,42 @@
+import math
+from utils.validators import MAX_MARKET_SPLITS
+
+DEFAULT_MAX_SLIPPAGE_BPS = 20.0  # Expected slippage vs the touch above which a market order is flagged
+
+
+def estimate_impact(book, is_buy: bool, size: float) -> dict:
+    """
+    Expected result of taking size at market from a local L2Book, with no network access.
+    slippage_bps is the average fill's distance from the touch (the best price on the side
+    taken), in basis points; complete is False when the visible book is thinner than size.
+    """
+    side = book.side(is_buy)
+    best = side.best()
+    if best is None:
+        return {'size': size, 'filled': 0.0, 'vwap': None, 'touch': None, 'worst_price': None,
+                'slippage_bps': None, 'complete': False}
+    touch = best[0]
+    vwap, filled = side.vwap(size)
+    worst = side.price_for_size(size)
+    slippage_bps = abs(vwap - touch) / touch * 1e4 if vwap is not None else None
+    return {'size': size, 'filled': filled, 'vwap': vwap, 'touch': touch, 'worst_price': worst,
+            'slippage_bps': slippage_bps, 'complete': filled >= size}
+
+
+def plan_market_splits(book, is_buy: bool, size: float, max_slippage_bps: float = DEFAULT_MAX_SLIPPAGE_BPS,
+                       max_splits: int = MAX_MARKET_SPLITS) -> dict:
+    """
+    Estimate the impact of size and, when it exceeds max_slippage_bps, the number of market
+    splits (at most max_splits) that keeps each split within the depth resting inside the
+    threshold. Returns the estimate with 'splits' (1 when no split is needed) and 'exceeds'.
+    """
+    estimate = estimate_impact(book, is_buy, size)
+    slippage = estimate['slippage_bps']
+    exceeds = not estimate['complete'] or (slippage is not None and slippage > max_slippage_bps)
+    splits = 1
+    if exceeds and estimate['touch'] is not None:
+        sign = 1 if is_buy else -1
+        limit = estimate['touch'] * (1 + sign * max_slippage_bps / 1e4)
+        within = book.side(is_buy).size_to_price(limit)
+        splits = max_splits if within <= 0 else min(max_splits, max(1, math.ceil(size / within)))
+    return dict(estimate, splits=splits, exceeds=exceeds, max_slippage_bps=max_slippage_bps)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from core.fanout import is_failed_result
+
+DEFAULT_DEADLINE = 5.0  # Seconds before an account's flatten is abandoned and reported as timed out
+
+
+async def flatten_account(account, close_positions: bool = True) -> dict:
+    """One account: a single batched cancel action, then one batched reduce-only close."""
+    cancel = await account.cancel_all_orders()
+    close = await account.close_all_positions() if close_positions else None
+    return {'cancel': cancel, 'close': close}
+
+
+async def flatten_all(accounts, deadline: float = DEFAULT_DEADLINE, close_positions: bool = True) -> dict:
+    """
+    Emergency kill switch: flattens every account concurrently under a hard deadline, so N
+    accounts take one account's round trips of wall time rather than a serial sweep.
+    close_positions=False only cancels orders.
+    Returns {"status", "elapsed", "accounts": [{account_id, status, elapsed, cancel, close, error}]}.
+    """
+    started = time.perf_counter()
+
+    async def run(account):
+        report = {'account_id': account.account_id, 'status': 'ok', 'elapsed': None,
+                  'cancel': None, 'close': None, 'error': None}
+        try:
+            report.update(await asyncio.wait_for(flatten_account(account, close_positions), deadline))
+            if is_failed_result(report['cancel']) or is_failed_result(report['close']):
+                report['status'] = 'error'
+        except asyncio.TimeoutError:
+            report['status'], report['error'] = 'timeout', f"Not flat after {deadline:.1f}s"
+        except Exception as e:
+            report['status'], report['error'] = 'error', str(e)
+        report['elapsed'] = time.perf_counter() - started
+        return report
+
+    reports = await asyncio.gather(*(run(account) for account in accounts))
+    statuses = {report['status'] for report in reports}
+    status = 'ok' if statuses <= {'ok'} else ('error' if 'ok' not in statuses else 'partial')
+    return {'status': status, 'elapsed': time.perf_counter() - started, 'accounts': reports}
@@ -0,0 +1,157 @@
+import bisect
+import numpy as np
+
+
+class BookSide:
+    """
+    One side of a book as two parallel lists sorted best first: sort keys (price for asks,
+    -price for bids) and sizes. A level is found by bisect in O(log n), but inserting or removing
+    one shifts the levels behind it, so set() is O(n) (a memmove, cheap at book depths of tens
+    of levels). replace() sorts its snapshot, which is O(n) for the already sorted feed levels.
+    Reads walk the lists from the best level.
+    """
+    __slots__ = ('is_bid', 'keys', 'sizes')
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.keys = []
+        self.sizes = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def _price(self, key: float) -> float:
+        return -key if self.is_bid else key
+
+    def set(self, price: float, size: float):
+        """Set the size at price; size 0 removes the level."""
+        key = self._key(price)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if size > 0:
+                self.sizes[i] = size
+            else:
+                del self.keys[i], self.sizes[i]
+        elif size > 0:
+            self.keys.insert(i, key)
+            self.sizes.insert(i, size)
+
+    def replace(self, levels):
+        """Load a snapshot: [[price, size, ...], ...] in any order."""
+        pairs = sorted((self._key(float(level[0])), float(level[1])) for level in levels if float(level[1]) > 0)
+        self.keys = [k for k, _ in pairs]
+        self.sizes = [s for _, s in pairs]
+
+    def best(self):
+        """(price, size) of the best level, or None."""
+        return (self._price(self.keys[0]), self.sizes[0]) if self.keys else None
+
+    def levels(self, depth: int = None) -> list:
+        """[[price, size], ...] best first, optionally only the top depth levels."""
+        keys, sizes = self.keys[:depth], self.sizes[:depth]
+        return [[self._price(k), s] for k, s in zip(keys, sizes)]
+
+    def to_array(self, depth: int = None) -> np.ndarray:
+        """Levels as an (n, 2) array of price, size, best first."""
+        keys = np.array(self.keys[:depth], dtype=float)
+        return np.column_stack((-keys if self.is_bid else keys, np.array(self.sizes[:depth], dtype=float)))
+
+    def size_to_price(self, price: float) -> float:
+        """Total size resting from the best level through price."""
+        return sum(self.sizes[:bisect.bisect_right(self.keys, self._key(price))])
+
+    def price_for_size(self, size: float):
+        """Price of the level at which the cumulative size reaches size, or None if the side is thinner."""
+        remaining = size
+        for key, level_size in zip(self.keys, self.sizes):
+            remaining -= level_size
+            if remaining <= 0:
+                return self._price(key)
+        return None
+
+    def vwap(self, size: float):
+        """
+        Average price of taking size from this side, walking levels from the best.
+        Returns (vwap, filled); filled < size when the side is thinner than size.
+        """
+        remaining, cost = size, 0.0
+        for key, level_size in zip(self.keys, self.sizes):
+            take = level_size if level_size < remaining else remaining
+            cost += take * self._price(key)
+            remaining -= take
+            if remaining <= 0:
+                break
+        filled = size - remaining
+        return (cost / filled if filled > 0 else None), filled
+
+
+class L2Book:
+    """
+    Local L2 book for one symbol, fed by snapshots (apply_snapshot) or level deltas
+    (apply_deltas). Hyperliquid's l2Book feed sends a full snapshot in every message, so the
+    live book is replaced on each update; deltas are for feeds that send them. Takers buy from
+    asks and sell into bids: vwap(is_buy=True, ...) walks the asks.
+    """
+    __slots__ = ('symbol', 'bids', 'asks', 'timestamp', 'updates')
+
+    def __init__(self, symbol: str = None):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.timestamp = None  # Exchange time of the last message, when it carries one
+        self.updates = 0
+
+    def apply_snapshot(self, bids, asks, timestamp=None):
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.timestamp = timestamp
+        self.updates += 1
+
+    def apply_deltas(self, bids=(), asks=(), timestamp=None):
+        """Apply changed levels, [[price, size], ...] per side; size 0 deletes the level."""
+        for level in bids:
+            self.bids.set(float(level[0]), float(level[1]))
+        for level in asks:
+            self.asks.set(float(level[0]), float(level[1]))
+        self.timestamp = timestamp
+        self.updates += 1
+
+    def apply_message(self, message: dict):
+        """
+        Apply one feed message. Hyperliquid's l2Book channel sends {"levels": [bids, asks]} with
+        {"px", "sz"} entries and a full snapshot each time; {"bids": ..., "asks": ...} messages
+        carry only changed levels unless "snapshot" is set.
+        """
+        data = message.get('data', message)
+        if 'levels' in data:
+            bids, asks = ([[level['px'], level['sz']] for level in side] for side in data['levels'])
+            self.apply_snapshot(bids, asks, data.get('time'))
+        elif data.get('snapshot'):
+            self.apply_snapshot(data.get('bids') or [], data.get('asks') or [], data.get('time'))
+        else:
+            self.apply_deltas(data.get('bids') or (), data.get('asks') or (), data.get('time'))
+
+    def best_bid(self):
+        best = self.bids.best()
+        return best[0] if best else None
+
+    def best_ask(self):
+        best = self.asks.best()
+        return best[0] if best else None
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    def side(self, is_buy: bool) -> BookSide:
+        """The side a taker of is_buy consumes."""
+        return self.asks if is_buy else self.bids
+
+    def vwap(self, is_buy: bool, size: float):
+        return self.side(is_buy).vwap(size)
+
+    def price_for_size(self, is_buy: bool, size: float):
+        return self.side(is_buy).price_for_size(size)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import time
+import weakref
+from pathlib import Path
+from core.rate_limiter import LANE_DATA
+from core.symbols import SymbolIndex
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / 'cache'
+DEFAULT_TTL = 6 * 60 * 60  # Market metadata changes rarely; refresh every 6 hours.
+MARKETS_WEIGHT = 40  # fetch_markets makes two info requests (perp and spot metadata), 20 each
+
+
+class MarketRegistry:
+    """
+    Market metadata shared by every account on one exchange.
+    Markets are downloaded once, persisted to a local snapshot and injected into each
+    account's client, so startup and reconnects never repeat load_markets per account.
+    """
+
+    def __init__(self, exchange_id: str, snapshot_path=None, ttl: float = DEFAULT_TTL, clock=time.time):
+        self.exchange_id = exchange_id
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else DEFAULT_SNAPSHOT_DIR / f"markets_{exchange_id}.json"
+        self.ttl = ttl
+        self._clock = clock
+        self.markets = None  # List of parsed ccxt market structures
+        self.symbols = SymbolIndex()  # Alias and asset lookups, rebuilt whenever markets change
+        self.updated_at = 0.0
+        self._refresh_task = None
+        self._clients = weakref.WeakSet()
+
+    def is_stale(self) -> bool:
+        return self.markets is None or self._clock() - self.updated_at > self.ttl
+
+    def load_snapshot(self) -> bool:
+        """Load markets from the local snapshot. Returns True if markets were loaded."""
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if snapshot.get('exchange') != self.exchange_id or not snapshot.get('markets'):
+            return False
+        self._set_markets(snapshot['markets'])
+        self.updated_at = float(snapshot.get('saved_at', 0))
+        return True
+
+    def _set_markets(self, markets):
+        self.markets = markets
+        self.symbols = SymbolIndex(markets)
+
+    def save_snapshot(self):
+        if self.markets is None:
+            return
+        os.makedirs(self.snapshot_path.parent, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'exchange': self.exchange_id, 'saved_at': self.updated_at, 'markets': self.markets}, f)
+        os.replace(tmp_path, self.snapshot_path)  # Atomic so a crash never leaves a half-written snapshot
+
+    async def refresh(self, client, request=None):
+        """
+        Download markets with the given client. Concurrent callers share a single download.
+        request: the account's rate-limited call path (TraderAccount._request), used when given.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._do_refresh(client, request))
+        await asyncio.shield(self._refresh_task)
+
+    async def _do_refresh(self, client, request=None):
+        if request is not None:
+            markets = await request(LANE_DATA, MARKETS_WEIGHT, client.fetch_markets)
+        else:
+            markets = await client.fetch_markets()
+        self._set_markets(markets)
+        self.updated_at = self._clock()
+        try:
+            self.save_snapshot()
+        except OSError as e:
+            print(f"MarketRegistry: Could not write snapshot {self.snapshot_path}: {e}")
+        for known_client in list(self._clients):
+            known_client.set_markets(self.markets)
+
+    async def ensure_loaded(self, client, request=None):
+        """
+        Make markets available, preferring memory, then the disk snapshot, then the network.
+        A stale snapshot is still served immediately and refreshed in the background.
+        """
+        if self.markets is None:
+            self.load_snapshot()
+        if self.markets is None:
+            await self.refresh(client, request)
+        elif self.is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.ensure_future(self._background_refresh(client, request))
+
+    async def _background_refresh(self, client, request=None):
+        try:
+            await self._do_refresh(client, request)
+        except Exception as e:
+            print(f"MarketRegistry: Background refresh for {self.exchange_id} failed: {e}")
+
+    def inject(self, client):
+        """Hand the already-parsed markets to a client so its load_markets() is a no-op."""
+        if self.markets is None:
+            return False
+        client.set_markets(self.markets)
+        self._clients.add(client)
+        return True
+
+
+_registries = {}
+
+def get_market_registry(exchange_id: str = 'hyperliquid') -> MarketRegistry:
+    """Returns the process-wide registry for an exchange."""
+    registry = _registries.get(exchange_id)
+    if registry is None:
+        registry = _registries[exchange_id] = MarketRegistry(exchange_id)
+    return registry
+
+def get_symbol_index(exchange_id: str = 'hyperliquid') -> SymbolIndex:
+    """Returns the symbol index of the exchange's current markets (empty until they are loaded)."""
+    return get_market_registry(exchange_id).symbols
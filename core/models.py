@@ -0,0 +1,235 @@
+"""
+Slotted types for the order path: a fraction of the memory of the equivalent dicts. Copying with
+overrides (Order.replace) costs about 1.2 µs against 0.3 µs for dict(order, ...), as an Order's
+slots are copied one by one, so per-copy hot paths (the subscriber copies of copy trading) copy
+into dicts instead. Order and Position also answer dict-style reads (Order is a mapping of the
+place_order arguments it carries; Position reads like a CCXT position), so code written against
+the dicts keeps working.
+"""
+from core.order_templates import LIMIT_TYPES
+
+_UNSET = None  # Order fields left unset are not passed on, so place_order's defaults apply
+
+ORDER_FIELDS = ('symbol', 'side', 'order_type', 'size', 'price', 'leverage', 'margin_mode', 'sl', 'tps', 'cloid',
+                'range_percent', 'split_count', 'split_seed', 'split_distribution', 'reduce_only', 'trail_percent',
+                'leg_size')
+
+
+class Order:
+    """
+    One order as the UI, copy trading and the fill mirror pass it around: the keyword arguments
+    of TraderAccount.place_order. Unset (None) fields are left out, so place_order(**order) and
+    dict(order) see the same keys a dict of the set fields would have.
+    """
+    __slots__ = ORDER_FIELDS
+
+    def __init__(self, symbol=None, side=None, order_type=None, size=None, **fields):
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.size = size
+        for name in ORDER_FIELDS[4:]:
+            setattr(self, name, fields.pop(name, _UNSET))
+        if fields:
+            raise TypeError(f"Unknown order field(s): {', '.join(fields)}")
+
+    @classmethod
+    def coerce(cls, order):
+        """order as an Order; a dict of place_order arguments is converted."""
+        return order if isinstance(order, cls) else cls(**order)
+
+    def replace(self, **overrides) -> 'Order':
+        """Copy with some fields changed, e.g. a subscriber's symbol, size and cloid."""
+        copy = Order.__new__(Order)
+        copy.symbol, copy.side, copy.order_type, copy.size = self.symbol, self.side, self.order_type, self.size
+        copy.price, copy.leverage, copy.margin_mode, copy.sl = self.price, self.leverage, self.margin_mode, self.sl
+        copy.tps, copy.cloid, copy.range_percent, copy.split_count = self.tps, self.cloid, self.range_percent, self.split_count
+        copy.split_seed, copy.split_distribution = self.split_seed, self.split_distribution
+        copy.reduce_only, copy.trail_percent, copy.leg_size = self.reduce_only, self.trail_percent, self.leg_size
+        for name, value in overrides.items():
+            setattr(copy, name, value)
+        return copy
+
+    def copy(self) -> 'Order':
+        return self.replace()
+
+    # Mapping interface, for place_order(**order), dict(order) and order['size'] reads
+    def keys(self):
+        return [name for name in ORDER_FIELDS if getattr(self, name) is not _UNSET]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, name):
+        return name in ORDER_FIELDS and getattr(self, name) is not _UNSET
+
+    def __getitem__(self, name):
+        if name not in ORDER_FIELDS or getattr(self, name) is _UNSET:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        if name not in ORDER_FIELDS:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def get(self, name, default=None):
+        value = getattr(self, name, _UNSET) if name in ORDER_FIELDS else _UNSET
+        return default if value is _UNSET else value
+
+    def __eq__(self, other):
+        return dict(self) == dict(other) if isinstance(other, (Order, dict)) else NotImplemented
+
+    def __repr__(self):
+        return f"Order({', '.join(f'{name}={getattr(self, name)!r}' for name in self.keys())})"
+
+
+class OrderRequest:
+    """
+    One wire order of a placement before formatting: the entry, an entry split, the SL or a TP.
+    kind is 'limit' (with tif), 'market' (sent as an IOC bounded by the slippage price) or
+    'trigger' (trigger_px, is_market, tpsl). tags and meta are registered with the leg, not sent.
+    """
+    __slots__ = ('asset', 'is_buy', 'reduce_only', 'kind', 'tif', 'sz', 'limit_px', 'trigger_px', 'is_market',
+                 'tpsl', 'cloid', 'tags', 'meta')
+
+    def __init__(self, asset, is_buy, reduce_only, kind, sz, limit_px=None, tif='Gtc', trigger_px=None,
+                 is_market=False, tpsl=None, cloid=None, tags=(), meta=None):
+        self.asset = asset
+        self.is_buy = is_buy
+        self.reduce_only = reduce_only
+        self.kind = kind
+        self.tif = tif
+        self.sz = sz
+        self.limit_px = limit_px
+        self.trigger_px = trigger_px
+        self.is_market = is_market
+        self.tpsl = tpsl
+        self.cloid = cloid
+        self.tags = tags
+        self.meta = meta
+
+    def replace(self, **overrides) -> 'OrderRequest':
+        copy = OrderRequest.__new__(OrderRequest)
+        copy.asset, copy.is_buy, copy.reduce_only, copy.kind, copy.tif = self.asset, self.is_buy, self.reduce_only, self.kind, self.tif
+        copy.sz, copy.limit_px, copy.trigger_px, copy.is_market = self.sz, self.limit_px, self.trigger_px, self.is_market
+        copy.tpsl, copy.cloid, copy.tags, copy.meta = self.tpsl, self.cloid, self.tags, self.meta
+        for name, value in overrides.items():
+            setattr(copy, name, value)
+        return copy
+
+    def to_wire(self, template, market_price: float = None, slippage: float = 0.0) -> dict:
+        """The exchange wire order, formatted by the symbol's OrderTemplate."""
+        slip = 1 + slippage if self.is_buy else 1 - slippage
+        if self.kind == 'market':
+            # The exchange has no market type: send an IOC limit bounded by the slippage price
+            if not market_price:
+                raise ValueError("Market orders need a reference price to bound slippage.")
+            px = market_price * slip
+            wire_type = LIMIT_TYPES["Ioc"]
+        elif self.kind == 'trigger':
+            px = self.trigger_px * slip if self.is_market else self.limit_px
+            wire_type = {"trigger": {"isMarket": self.is_market, "triggerPx": template.format_price(self.trigger_px),
+                                     "tpsl": self.tpsl}}
+        else:
+            px = self.limit_px
+            wire_type = LIMIT_TYPES[self.tif]
+        return template.wire(self.is_buy, px, self.sz, self.reduce_only, wire_type, self.cloid)
+
+    def __repr__(self):
+        return (f"OrderRequest({self.kind} {'buy' if self.is_buy else 'sell'} {self.sz} {self.asset} "
+                f"px={self.limit_px} trigger={self.trigger_px} cloid={self.cloid} tags={self.tags})")
+
+
+class Leg:
+    """A registered leg in an OrderStore: where it trades, its parent order and its wire order as last sent."""
+    __slots__ = ('cloid', 'symbol', 'parent', 'wire', 'meta')
+
+    def __init__(self, cloid, symbol, parent, wire=None, meta=None):
+        self.cloid = cloid
+        self.symbol = symbol
+        self.parent = parent
+        self.wire = wire
+        self.meta = meta
+
+
+class Fill:
+    """One of the account's fills, read once from the CCXT trade dict of the user-event stream."""
+    __slots__ = ('id', 'order', 'symbol', 'side', 'amount', 'price', 'timestamp', 'cloid', 'dir')
+
+    def __init__(self, id, order, symbol, side, amount, price, timestamp=None, cloid=None, dir=''):
+        self.id = id
+        self.order = order
+        self.symbol = symbol
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.timestamp = timestamp
+        self.cloid = cloid
+        self.dir = dir  # Exchange direction, e.g. "Open Long", "Close Short"
+
+    @classmethod
+    def from_ccxt(cls, trade: dict) -> 'Fill':
+        info = trade.get('info') or {}
+        price = trade.get('price')
+        return cls(trade.get('id'), trade.get('order'), trade['symbol'], trade['side'], float(trade['amount']),
+                   float(price) if price is not None else None, trade.get('timestamp'), info.get('cloid'),
+                   str(info.get('dir', '')))
+
+    @property
+    def signed_amount(self) -> float:
+        return self.amount if self.side == 'buy' else -self.amount
+
+
+_POSITION_KEYS = {'symbol': 'symbol', 'side': 'side', 'contracts': 'contracts', 'entryPrice': 'entry_price',
+                  'unrealizedPnl': 'unrealized_pnl', 'leverage': 'leverage', 'liquidationPrice': 'liquidation_price'}
+
+
+class Position:
+    """
+    An open position. Keeps only the CCXT position fields that are read (the PnL, leverage and
+    liquidation price come with REST snapshots), and reads like that position for them:
+    position['entryPrice'] and position.get('unrealizedPnl') work.
+    """
+    __slots__ = ('symbol', 'side', 'contracts', 'entry_price', 'unrealized_pnl', 'leverage', 'liquidation_price')
+
+    def __init__(self, symbol, side, contracts, entry_price=None, unrealized_pnl=None, leverage=None,
+                 liquidation_price=None):
+        self.symbol = symbol
+        self.side = side
+        self.contracts = contracts
+        self.entry_price = entry_price
+        self.unrealized_pnl = unrealized_pnl
+        self.leverage = leverage
+        self.liquidation_price = liquidation_price
+
+    @classmethod
+    def from_ccxt(cls, position: dict) -> 'Position':
+        def number(key):
+            value = position.get(key)
+            return float(value) if value is not None else None
+        return cls(position['symbol'], position.get('side'), abs(float(position['contracts'])), number('entryPrice'),
+                   number('unrealizedPnl'), number('leverage'), number('liquidationPrice'))
+
+    @property
+    def signed_size(self) -> float:
+        return self.contracts if self.side == 'long' else -self.contracts
+
+    def __getitem__(self, key):
+        name = _POSITION_KEYS.get(key)
+        if name is None:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"Position({self.side} {self.contracts} {self.symbol} @ {self.entry_price})"
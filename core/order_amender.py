@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+
+class OrderAmender:
+    """
+    Turns SL/TP marker moves into in-place modifies on every account holding that leg.
+    A move is sent as soon as no other move of the same leg is in flight; moves arriving
+    meanwhile are coalesced, so a fast drag costs one request per round trip per account
+    and only the latest price is sent.
+    """
+
+    def __init__(self, accounts, debounce: float = 0.0):
+        self.accounts = accounts  # List of accounts, or a callable returning one
+        self.debounce = debounce  # Extra wait before each send, to gather more moves
+        self._pending = {}  # (tag, symbol) -> latest requested price
+        self._flushers = {}  # (tag, symbol) -> task sending moves for that leg
+
+    def _accounts(self):
+        return self.accounts() if callable(self.accounts) else self.accounts
+
+    async def amend(self, tag: str, price: float, symbol: str = None, all_symbols: bool = False) -> dict:
+        """
+        Move leg tag ("sl", "tp1".."tp5") of symbol to price on all accounts; every symbol's only with
+        all_symbols. Must run on the engine loop.
+        Returns the result of the send that carried this price or a later one that superseded it.
+        """
+        if not symbol and not all_symbols:
+            raise ValueError(f"No symbol to move {tag} orders on.")
+        key = (tag, symbol, all_symbols)
+        self._pending[key] = price
+        task = self._flushers.get(key)
+        if task is None or task.done():
+            task = self._flushers[key] = asyncio.ensure_future(self._flush(key))
+        return await asyncio.shield(task)
+
+    async def _flush(self, key) -> dict:
+        result = None
+        while key in self._pending:
+            if self.debounce:
+                await asyncio.sleep(self.debounce)
+            price = self._pending.pop(key)
+            tag, symbol, all_symbols = key
+            accounts = self._accounts()
+            started = time.perf_counter()
+            results = await asyncio.gather(*(a.amend_tagged(tag, price, symbol, all_symbols) for a in accounts),
+                                           return_exceptions=True)
+            result = {
+                'tag': tag,
+                'price': price,
+                'elapsed': time.perf_counter() - started,
+                'accounts': {a.account_id: r for a, r in zip(accounts, results)},
+            }
+        return result
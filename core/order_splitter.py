@@ -1,34 +1,157 @@
-import random
+import numpy as np
 from typing import List, Tuple
 
-def generate_splits(entry_price: float, range_percent: float, split_count: int, total_size: float, order_type: str = 'limit') -> List[Tuple[float, float]]:
+DISTRIBUTIONS = ('uniform', 'linear', 'geometric', 'gaussian')
+# Distributions laid out against the order book instead of a price formula (see generate_book_split_arrays)
+BOOK_DISTRIBUTIONS = ('depth', 'post_only')
+
+
+def _allocate_lots(weights: np.ndarray, total_lots: int) -> np.ndarray:
     """
-    Generate split orders within a range around the entry price.
-    Returns a list of (price, size) tuples.
-    For 'limit': randomize price and size within range.
-    For 'market': sequential splits at entry price.
+    Split an integer number of lots by weight (largest remainder), giving every split at
+    least one lot when there are enough lots to go round. The result sums to total_lots exactly.
+    """
+    n = len(weights)
+    floor_lots = 1 if total_lots >= n else 0
+    spare = total_lots - floor_lots * n
+    raw = weights / weights.sum() * spare
+    lots = np.floor(raw).astype(np.int64)
+    short = spare - int(lots.sum())
+    if short > 0:
+        lots[np.argsort(raw - lots)[::-1][:short]] += 1
+    return lots + floor_lots
+
+
+def generate_split_arrays(entry_price: float, range_percent: float, split_count: int, total_size: float,
+                          order_type: str = 'limit', distribution: str = 'uniform', seed=None,
+                          tick_size: float = None, lot_size: float = None, geometric_ratio: float = 1.1):
+    """
+    Vectorized split generator. Returns (prices, sizes) as NumPy arrays.
+    distribution (limit orders):
+      'uniform'   - random prices across the range, randomized sizes (the original behaviour)
+      'linear'    - evenly spaced prices, size growing linearly with distance from entry (edges get 2x)
+      'geometric' - evenly spaced prices, size growing by geometric_ratio per step away from entry
+      'gaussian'  - evenly spaced prices, size concentrated around the entry price
+    seed makes the random draws reproducible for audit. tick_size/lot_size snap prices and sizes
+    to the symbol's increments; sizes then sum to total_size rounded to whole lots.
     """
-    splits = []
     if split_count < 1:
-        return splits
+        return np.empty(0), np.empty(0)
     if order_type == 'market':
-        split_size = total_size / split_count
-        for _ in range(split_count):
-            splits.append((entry_price, split_size))
+        # All at the entry price in equal parts; the distribution only shapes limit ladders
+        prices = np.full(split_count, float(entry_price))
+        weights = np.ones(split_count)
     else:  # limit
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown split distribution: {distribution}")
         min_price = entry_price * (1 - range_percent / 100)
         max_price = entry_price * (1 + range_percent / 100)
-        remaining = total_size
-        for i in range(split_count):
-            # Random price within range
-            price = random.uniform(min_price, max_price)
-            # Random size, but ensure total adds up
-            if i == split_count - 1:
-                size = remaining
-            else:
-                max_split = remaining - (split_count - i - 1) * (total_size / split_count) * 0.5
-                size = random.uniform(total_size / split_count * 0.5, max_split)
-                size = min(size, remaining)
-            splits.append((price, size))
-            remaining -= size
-    return splits
+        if distribution == 'uniform':
+            rng = np.random.default_rng(seed)
+            prices = rng.uniform(min_price, max_price, split_count)
+            weights = rng.uniform(0.5, 1.5, split_count)
+        else:
+            prices = np.linspace(min_price, max_price, split_count)
+            # Distance from entry, 0 at the entry price and 1 at either edge of the range
+            half_range = max(max_price - entry_price, entry_price - min_price)
+            distance = np.abs(prices - entry_price) / half_range if half_range > 0 else np.zeros(split_count)
+            if distribution == 'linear':
+                weights = 1.0 + distance
+            elif distribution == 'geometric':
+                weights = geometric_ratio ** (distance * (split_count - 1) / 2)
+            else:  # gaussian, sigma = half the range
+                weights = np.exp(-0.5 * (distance / 0.5) ** 2)
+        if tick_size:
+            lo = np.ceil(min_price / tick_size) * tick_size
+            hi = np.floor(max_price / tick_size) * tick_size
+            prices = np.clip(np.round(prices / tick_size) * tick_size, lo, hi)
+
+    if lot_size:
+        lots = _allocate_lots(weights, int(round(total_size / lot_size)))
+        keep = lots > 0
+        prices, sizes = prices[keep], lots[keep] * lot_size
+    else:
+        sizes = weights / weights.sum() * total_size
+        sizes[-1] = total_size - sizes[:-1].sum()  # Absorb float error so the total is exact
+    return prices, sizes
+
+
+def generate_book_split_arrays(is_buy: bool, levels, range_percent: float, split_count: int, total_size: float,
+                               entry_price: float = None, touch: float = None, distribution: str = 'depth',
+                               tick_size: float = None, lot_size: float = None):
+    """
+    Lay a passive ladder out against the resting book on our side (bids for a buy, asks for a sell).
+    levels: [[price, size], ...] best first. The ladder starts at the entry price or the touch,
+    whichever is further from the spread, and reaches range_percent deeper, so no split lands
+    in the spread or across it.
+      'depth'     - equal-liquidity ladder: split i joins the level where the cumulative resting
+                    size from the start reaches (i + 0.5) / split_count of the depth in range; equal sizes.
+      'post_only' - evenly spaced prices, each sized by the resting depth around it; meant to go
+                    out as post-only (ALO) orders that stay behind the touch.
+    Returns (prices, sizes) as NumPy arrays, best price first.
+    """
+    if split_count < 1:
+        return np.empty(0), np.empty(0)
+    if distribution not in BOOK_DISTRIBUTIONS:
+        raise ValueError(f"Unknown book split distribution: {distribution}")
+    book = np.asarray(levels, dtype=float).reshape(-1, 2)
+    if touch is None:
+        if not len(book):
+            raise ValueError("Book-based splits need the touch price or at least one book level.")
+        touch = book[0, 0]
+    sign = 1.0 if is_buy else -1.0  # Prices get worse for us (deeper) as sign * price falls
+    start = touch if entry_price is None else sign * min(sign * entry_price, sign * touch)
+    end = start * (1 - sign * range_percent / 100)
+    in_range = book[(sign * book[:, 0] <= sign * start) & (sign * book[:, 0] >= sign * end)]
+    depth_prices, depth = in_range[:, 0], in_range[:, 1]
+
+    if distribution == 'depth' and depth.sum() > 0:
+        # Each split joins the level at which the cumulative resting size reaches its target
+        cumulative = np.cumsum(depth)
+        targets = (np.arange(split_count) + 0.5) / split_count * cumulative[-1]
+        prices = depth_prices[np.minimum(np.searchsorted(cumulative, targets), len(depth_prices) - 1)]
+        weights = np.ones(split_count)
+    else:
+        prices = np.linspace(start, end, split_count)
+        weights = np.ones(split_count)
+        if depth.sum() > 0:
+            # Resting size in each split's bucket; a floor keeps empty buckets in the ladder
+            half_step = abs(start - end) / max(split_count - 1, 1) / 2
+            edges = np.concatenate((prices + sign * half_step, [prices[-1] - sign * half_step]))
+            order = np.argsort(edges)
+            bucket, _ = np.histogram(depth_prices, bins=edges[order], weights=depth)
+            bucket = bucket if sign < 0 else bucket[::-1]  # Back to ladder order, best first
+            weights = bucket + depth.sum() / split_count * 0.1
+    if tick_size:
+        # Snap away from the spread so rounding never moves a split past the touch
+        prices = (np.floor(prices / tick_size) if is_buy else np.ceil(prices / tick_size)) * tick_size
+
+    if lot_size:
+        lots = _allocate_lots(weights, int(round(total_size / lot_size)))
+        keep = lots > 0
+        prices, sizes = prices[keep], lots[keep] * lot_size
+    else:
+        sizes = weights / weights.sum() * total_size
+        sizes[-1] = total_size - sizes[:-1].sum()
+    return prices, sizes
+
+
+def generate_splits(entry_price: float, range_percent: float, split_count: int, total_size: float, order_type: str = 'limit',
+                    distribution: str = 'uniform', seed=None, tick_size: float = None,
+                    lot_size: float = None, is_buy: bool = True, levels=None,
+                    touch: float = None) -> List[Tuple[float, float]]:
+    """
+    Generate split orders within a range around the entry price.
+    Returns a list of (price, size) tuples.
+    For 'limit': prices and sizes laid out by the chosen distribution (see generate_split_arrays);
+    'depth' and 'post_only' lay the ladder out against levels, our side of the book (see generate_book_split_arrays).
+    For 'market': equal splits at the entry price, whatever the distribution.
+    """
+    if distribution in BOOK_DISTRIBUTIONS and order_type != 'market':
+        prices, sizes = generate_book_split_arrays(is_buy, levels if levels is not None else [], range_percent,
+                                                   split_count, total_size, entry_price=entry_price, touch=touch,
+                                                   distribution=distribution, tick_size=tick_size, lot_size=lot_size)
+        return list(zip(prices.tolist(), sizes.tolist()))
+    prices, sizes = generate_split_arrays(entry_price, range_percent, split_count, total_size, order_type,
+                                          distribution=distribution, seed=seed, tick_size=tick_size, lot_size=lot_size)
+    return list(zip(prices.tolist(), sizes.tolist()))
@@ -0,0 +1,299 @@
+import asyncio
+import time
+from collections import defaultdict, OrderedDict
+from core.models import Fill, Leg, Position
+from core.rate_limiter import LANE_DATA
+
+CLOSED_STATUSES = ('closed', 'canceled', 'rejected', 'expired')
+RETIRED_LIMIT = 2048  # Wire orders of closed legs kept for lookups such as "price of the previous TP"
+
+
+class OrderStore:
+    """
+    One account's open orders and positions, held in memory.
+    Seeded once from REST snapshots, then kept current from the account's user-event stream,
+    so order and position reads never go to the network. Orders are indexed by oid, cloid,
+    symbol and tag. place_order registers every leg (entry, sl, tp1..tp5) by cloid before it is
+    sent, grouped under its parent order, so legs can be found and cancelled before they are acked.
+    """
+
+    def __init__(self, account, clock=time.monotonic):
+        self.account = account
+        self._clock = clock
+        self.orders = {}  # oid -> CCXT order
+        self.positions = {}  # symbol -> Position
+        self._by_cloid = {}  # cloid -> oid
+        self._by_symbol = defaultdict(set)  # symbol -> oids
+        self._by_tag = defaultdict(set)  # tag -> oids
+        self._cloid_tags = {}  # cloid -> tags, registered before the order exists
+        self._tag_cloids = defaultdict(set)  # tag -> registered cloids still pending or open
+        self._legs = {}  # cloid -> Leg; its wire order is used to build in-place modifies
+        self._retired = OrderedDict()  # cloid -> wire order of a leg that has closed
+        self.leg_listeners = []  # Called with leg events: "registered" and "closed"
+        self._groups = defaultdict(set)  # parent cloid -> leg cloids
+        self.seeded_at = None
+        self.positions_at = None  # When positions last came from a REST snapshot
+        self.updated_at = None
+        self.live = False  # True while the user-event stream is feeding the store
+        self._seeding = False
+        self._seed_started_ms = None
+        self._buffer = []
+        self._task = None
+        self._resync = None
+
+    # --- reads (no I/O) ---
+
+    def get(self, oid):
+        return self.orders.get(oid)
+
+    def get_by_cloid(self, cloid):
+        oid = self._by_cloid.get(cloid)
+        return self.orders.get(oid) if oid is not None else None
+
+    def open_orders(self, symbol: str = None, tag: str = None) -> list:
+        """Open orders, optionally filtered by symbol and/or tag."""
+        if symbol is None and tag is None:
+            return list(self.orders.values())
+        oids = None
+        if symbol is not None:
+            oids = set(self._by_symbol.get(symbol, ()))
+        if tag is not None:
+            tagged = self._by_tag.get(tag, set())
+            oids = set(tagged) if oids is None else oids & tagged
+        return [self.orders[oid] for oid in oids if oid in self.orders]
+
+    def group(self, parent: str) -> dict:
+        """Legs of one parent order that are still pending or open: {cloid: tags}."""
+        return {cloid: set(self._cloid_tags.get(cloid, ())) for cloid in self._groups.get(parent, ())}
+
+    def tagged_cloids(self, tag: str, parent: str = None) -> list:
+        """[(symbol, cloid)] for registered legs with tag that are not known to be closed."""
+        cloids = self._tag_cloids.get(tag, ())
+        if parent is not None:
+            cloids = [c for c in cloids if c in self._groups.get(parent, ())]
+        return [(self._legs[c].symbol, c) for c in cloids if c in self._legs]
+
+    def leg_wire(self, cloid: str):
+        """Wire order of a leg as last sent; also answers for recently closed legs."""
+        leg = self._legs.get(cloid)
+        return leg.wire if leg is not None and leg.wire is not None else self._retired.get(cloid)
+
+    def leg(self, cloid: str):
+        """Leg event dict for a registered leg that is still pending or open, else None."""
+        leg = self._legs.get(cloid)
+        if leg is None:
+            return None
+        return {'cloid': cloid, 'symbol': leg.symbol, 'parent': leg.parent, 'tags': set(self._cloid_tags.get(cloid, ())),
+                'wire': leg.wire, 'meta': leg.meta}
+
+    def update_wire(self, cloid: str, wire: dict):
+        """Record a leg's wire order after a successful modify."""
+        leg = self._legs.get(cloid)
+        if leg is not None:
+            leg.wire = wire
+
+    def position(self, symbol: str):
+        return self.positions.get(symbol)
+
+    def positions_fresh(self, max_age: float = None) -> bool:
+        """True when positions can be trusted: streaming live, or snapshotted within max_age seconds."""
+        if self.live:
+            return True
+        return self.positions_at is not None and max_age is not None and self._clock() - self.positions_at <= max_age
+
+    # --- writes ---
+
+    def register(self, cloid: str, symbol: str, parent: str, *tags, wire: dict = None, meta: dict = None):
+        """Record a leg before it is sent: its symbol, parent order, tags (e.g. "tp", "tp1") and wire order."""
+        self._legs[cloid] = Leg(cloid, symbol, parent, wire, meta)
+        self._groups[parent].add(cloid)
+        self.tag(cloid, *tags)
+        self._emit('registered', self.leg(cloid))
+
+    def _emit(self, event: str, leg: dict, status: str = None):
+        for listener in list(self.leg_listeners):
+            try:
+                listener(dict(leg, event=event, status=status))
+            except Exception as e:
+                print(f"Account {self.account.account_id}: Leg listener failed: {e}")
+
+    def tag(self, cloid: str, *tags):
+        """Attach tags (e.g. "tp1") to an order by cloid; works before or after it is acknowledged."""
+        self._cloid_tags.setdefault(cloid, set()).update(tags)
+        for t in tags:
+            self._tag_cloids[t].add(cloid)
+        oid = self._by_cloid.get(cloid)
+        if oid is not None:
+            for t in tags:
+                self._by_tag[t].add(oid)
+
+    def upsert_order(self, order: dict):
+        oid = order.get('id')
+        if oid is None:
+            return
+        if order.get('status') in CLOSED_STATUSES:
+            leg = self.leg(order.get('clientOrderId'))
+            self.remove_order(oid)
+            self.forget(order.get('clientOrderId'))  # Also covers orders that closed before we saw them open
+            if leg is not None:
+                leg['filled'] = order.get('filled')  # Filled amount, so schedules can carry the unfilled rest
+                self._emit('closed', leg, order.get('status'))
+            return
+        self.orders[oid] = order
+        cloid = order.get('clientOrderId')
+        if cloid:
+            self._by_cloid[cloid] = oid
+            for t in self._cloid_tags.get(cloid, ()):
+                self._by_tag[t].add(oid)
+        self._by_symbol[order.get('symbol')].add(oid)
+        self.updated_at = self._clock()
+
+    def remove_order(self, oid):
+        order = self.orders.pop(oid, None)
+        if order is None:
+            return
+        cloid = order.get('clientOrderId')
+        if cloid:
+            self._by_cloid.pop(cloid, None)
+            self.forget(cloid)
+        self._discard(self._by_symbol, order.get('symbol'), oid)
+        for t in [t for t, oids in self._by_tag.items() if oid in oids]:
+            self._discard(self._by_tag, t, oid)
+        self.updated_at = self._clock()
+
+    def forget(self, cloid):
+        """Drop a leg's registration and tags once its order is closed."""
+        if not cloid:
+            return
+        for t in self._cloid_tags.pop(cloid, ()):
+            self._discard(self._tag_cloids, t, cloid)
+        leg = self._legs.pop(cloid, None)
+        if leg is None:
+            return
+        if leg.wire is not None:
+            self._retired[cloid] = leg.wire
+            if len(self._retired) > RETIRED_LIMIT:
+                self._retired.popitem(last=False)
+        self._discard(self._groups, leg.parent, cloid)
+
+    @staticmethod
+    def _discard(index, key, oid):
+        oids = index.get(key)
+        if oids is not None:
+            oids.discard(oid)
+            if not oids:
+                del index[key]
+
+    def set_positions(self, positions: list):
+        """Replace positions from a REST snapshot (CCXT positions)."""
+        self.positions = {p['symbol']: Position.from_ccxt(p) for p in positions if p.get('contracts')}
+        self.positions_at = self.updated_at = self._clock()
+
+    def apply_fill(self, fill):
+        """Move the position by one fill: adds average into the entry, reductions keep it, flips reset it."""
+        if not isinstance(fill, Fill):
+            fill = Fill.from_ccxt(fill)
+        symbol, price, delta = fill.symbol, fill.price, fill.signed_amount
+        current = self.positions.get(symbol)
+        size = 0.0
+        entry = price
+        if current:
+            size = current.signed_size
+            entry = current.entry_price or price
+        new_size = size + delta
+        if abs(new_size) < 1e-12:
+            self.positions.pop(symbol, None)
+        else:
+            if size == 0 or (size > 0) != (new_size > 0):
+                entry = price  # Opened or flipped
+            elif abs(new_size) > abs(size):
+                entry = (entry * abs(size) + price * abs(delta)) / abs(new_size)
+            if current is None:
+                self.positions[symbol] = current = Position(symbol, None, 0.0)
+            current.side = 'long' if new_size > 0 else 'short'
+            current.contracts = abs(new_size)
+            current.entry_price = entry
+        self.updated_at = self._clock()
+
+    def apply(self, update: dict):
+        """Listener for TraderAccount.listen_order_updates. Updates during seeding are replayed after it."""
+        if self._seeding:
+            self._buffer.append(update)
+            return
+        data = update.get('data') or {}
+        if update.get('type') == 'resync':
+            # The stream dropped and came back; events may have been missed, so reload from REST
+            if self.seeded_at is not None:
+                self._resync = asyncio.ensure_future(self._reseed())
+        elif update.get('type') == 'order':
+            self.upsert_order(data)
+        elif update.get('type') == 'fill':
+            self.apply_fill(data)
+
+    # --- lifecycle ---
+
+    async def seed(self):
+        """Load open orders and positions from REST, then replay stream updates that arrived meanwhile."""
+        self._seeding = True
+        self._seed_started_ms = time.time() * 1000
+        try:
+            # Through the account's rate limiter: a reconnect storm reseeds every account at once
+            client, request = self.account.client, self.account._request
+            orders, positions = await asyncio.gather(request(LANE_DATA, 20, client.fetch_open_orders),
+                                                     request(LANE_DATA, 2, client.fetch_positions))
+            # Rebuild the indexes; tags registered by cloid survive and are re-attached
+            self.orders.clear()
+            self._by_cloid.clear()
+            self._by_symbol.clear()
+            self._by_tag.clear()
+            for order in orders:
+                self.upsert_order(order)
+            self.set_positions(positions)
+            self.seeded_at = self._clock()
+        finally:
+            self._seeding = False
+            buffered, self._buffer = self._buffer, []
+        for update in buffered:
+            if update.get('type') == 'resync':
+                continue  # This seed already covers the gap
+            fill_time = (update.get('data') or {}).get('timestamp')
+            # Fills from before the snapshot request are already in the REST positions
+            if update.get('type') == 'fill' and fill_time is not None and fill_time < self._seed_started_ms:
+                continue
+            self.apply(update)
+
+    async def _reseed(self):
+        try:
+            await self.seed()
+        except Exception as e:
+            print(f"Account {self.account.account_id}: Order store resync failed: {e}")
+
+    def start(self):
+        """Subscribe to user events and seed from REST once connected. Must run on the engine loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def _run(self):
+        listen = asyncio.ensure_future(self.account.listen_order_updates(self.apply))
+        try:
+            attempt = 0
+            while True:
+                if self.account.client and self.account.is_connected:
+                    try:
+                        await self.seed()
+                        break
+                    except Exception as e:
+                        print(f"Account {self.account.account_id}: Order store seed failed: {e}")
+                await asyncio.sleep(self.account.connection_manager.backoff_delay(attempt))
+                attempt += 1
+            self.live = True
+            await listen
+        finally:
+            self.live = False
+            listen.cancel()
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
@@ -0,0 +1,66 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+PRICE_SIG_FIGS = 5  # Prices carry at most 5 significant figures (more only for the integer part)
+_ONE = Decimal(1)
+
+# Wire order types shared by every order that uses them; treat as read-only
+LIMIT_TYPES = {tif: {"limit": {"tif": tif}} for tif in ("Gtc", "Ioc", "Alo")}
+
+
+def _strip(text: str) -> str:
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+class OrderTemplate:
+    """
+    Everything about one symbol's wire orders that doesn't change between orders: asset index,
+    tick and lot size and the price/size rounding rules, resolved once from the loaded market.
+    Formatting gives the same strings as the CCXT client's price_to_precision/amount_to_precision,
+    computed directly rather than through its generic precision code. Markets without the
+    precision fields fall back to the client's methods.
+    """
+    __slots__ = ('symbol', 'asset', 'tick_size', 'lot_size', 'max_decimals',
+                 '_lot', '_half_lot', '_size_quantum', '_price_quantum', '_client')
+
+    def __init__(self, client, market: dict):
+        self._client = client
+        self.symbol = market['symbol']  # Market symbol, e.g. "BTC/USDC:USDC"
+        self.asset = int(market['baseId'])
+        precision = market.get('precision') or {}
+        self.tick_size = precision.get('price')
+        self.lot_size = precision.get('amount')
+        self.max_decimals = None
+        self._lot = None
+        if isinstance(self.lot_size, (int, float)) and self.lot_size > 0 and 'spot' in market:
+            self._lot = Decimal(str(self.lot_size))
+            self._half_lot = self.lot_size / 2  # Float threshold, compared exactly as the client does
+            self._size_quantum = self._lot.normalize() if self._lot < 1 else _ONE
+            lot_decimals = max(0, -self._size_quantum.as_tuple().exponent)
+            self.max_decimals = (8 if market['spot'] else 6) - lot_decimals
+            self._price_quantum = _ONE.scaleb(-self.max_decimals)
+
+    def format_price(self, px: float) -> str:
+        if self._lot is None:
+            return self._client.price_to_precision(self.symbol, px)
+        d = Decimal(str(px))
+        if d:
+            figures = max(PRICE_SIG_FIGS, len(str(int(px))))
+            d = d.quantize(_ONE.scaleb(d.adjusted() - figures + 1), ROUND_HALF_UP)
+        return _strip(format(d.quantize(self._price_quantum, ROUND_HALF_UP), 'f'))
+
+    def format_size(self, sz: float) -> str:
+        if self._lot is None:
+            return self._client.amount_to_precision(self.symbol, sz)
+        d = Decimal(str(sz))
+        missing = abs(d) % self._lot
+        if missing:
+            d = d - missing + self._lot if missing >= self._half_lot else d - missing
+        return _strip(format(d.quantize(self._size_quantum, ROUND_HALF_UP), 'f'))
+
+    def wire(self, is_buy: bool, px: float, sz: float, reduce_only: bool, order_type: dict, cloid: str = None) -> dict:
+        """One wire order. Key order matters: the action is hashed as serialized."""
+        wire = {"a": self.asset, "b": is_buy, "p": self.format_price(px), "s": self.format_size(sz),
+                "r": reduce_only, "t": order_type}
+        if cloid:
+            wire["c"] = cloid
+        return wire
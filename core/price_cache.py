@@ -0,0 +1,124 @@
+import asyncio
+import time
+from hyperliquid.ccxt.pro.hyperliquid import hyperliquid as HyperliquidWs
+from core.l2_book import L2Book
+
+
+class PriceCache:
+    """
+    Process-wide mid/BBO cache shared by every TraderAccount.
+    Each symbol is fed by a single WebSocket order book subscription, so price
+    lookups on the order path are in-memory reads. The feed also maintains a local
+    L2Book per symbol for depth and VWAP queries; each feed message is a full snapshot
+    that replaces it. Entries older than max_age
+    seconds are treated as stale and callers fall back to REST.
+    """
+
+    def __init__(self, max_age: float = 2.0, clock=time.monotonic):
+        self.max_age = max_age
+        self._clock = clock
+        self._quotes = {}  # symbol -> (bid, ask, mid, ts)
+        self._books = {}  # symbol -> (L2Book, ts of its last update)
+        self._tasks = {}  # symbol -> asyncio.Task running the watch loop
+        self.ws = None
+        self.listeners = []  # Called as listener(symbol, mid) on every quote update
+
+    def update(self, symbol: str, bid: float = None, ask: float = None, mid: float = None):
+        """Store a quote. mid is derived from bid/ask when not given."""
+        if mid is None:
+            if bid is None or ask is None:
+                return
+            mid = (bid + ask) / 2
+        self._quotes[symbol] = (bid, ask, mid, self._clock())
+        for listener in self.listeners:
+            try:
+                listener(symbol, mid)
+            except Exception as e:
+                print(f"PriceCache: listener failed for {symbol}: {e}")
+
+    def update_book(self, symbol: str, bids: list, asks: list, deltas: bool = False):
+        """
+        Apply book levels ([[price, size], ...]) to the symbol's local L2 book: a full snapshot, or
+        with deltas=True only the changed levels (size 0 deletes). The quote follows the top of book.
+        """
+        entry = self._books.get(symbol)
+        book = entry[0] if entry else L2Book(symbol)
+        if deltas:
+            book.apply_deltas(bids, asks)
+        else:
+            book.apply_snapshot(bids, asks)
+        self._books[symbol] = (book, self._clock())
+        bid, ask = book.best_bid(), book.best_ask()
+        if bid is not None and ask is not None:
+            self.update(symbol, bid, ask)
+
+    def get_book(self, symbol: str, max_age: float = None):
+        """Returns the symbol's L2Book if it was updated within max_age seconds, else None."""
+        entry = self._books.get(symbol)
+        if entry is None or self._clock() - entry[1] > (self.max_age if max_age is None else max_age):
+            return None
+        return entry[0]
+
+    def get_quote(self, symbol: str, max_age: float = None):
+        """Returns (bid, ask, mid) if a fresh quote is cached, else None."""
+        quote = self._quotes.get(symbol)
+        if quote is None:
+            return None
+        if self._clock() - quote[3] > (self.max_age if max_age is None else max_age):
+            return None
+        return quote[:3]
+
+    def get_mid(self, symbol: str, max_age: float = None) -> float | None:
+        quote = self.get_quote(symbol, max_age)
+        return quote[2] if quote else None
+
+    def is_subscribed(self, symbol: str) -> bool:
+        task = self._tasks.get(symbol)
+        return task is not None and not task.done()
+
+    def subscribe(self, symbol: str):
+        """Start the WebSocket feed for symbol unless one is already running."""
+        if self.is_subscribed(symbol):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop yet; the next lookup from inside the engine will subscribe.
+        self._tasks[symbol] = loop.create_task(self._watch(symbol))
+
+    async def _watch(self, symbol: str):
+        if self.ws is None:
+            self.ws = HyperliquidWs({})
+        delay = 0.5
+        while True:
+            try:
+                book = await self.ws.watch_order_book(symbol)
+                # l2Book messages carry the whole book (no deltas), so each one replaces the local book
+                self.update_book(symbol, book.get('bids') or [], book.get('asks') or [])
+                delay = 0.5
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"PriceCache: feed error for {symbol}: {e}. Retrying in {delay:.1f}s.")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def unsubscribe(self, symbol: str):
+        task = self._tasks.pop(symbol, None)
+        if task:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def close(self):
+        for symbol in list(self._tasks):
+            await self.unsubscribe(symbol)
+        if self.ws:
+            await self.ws.close()
+            self.ws = None
+
+
+# Shared instance used by all accounts in the process.
+price_cache = PriceCache()
@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+# Priority lanes, served in this order when requests are queued
+LANE_CANCEL = 0  # Cancels, closes (reduce-only orders) and stop modifies: reduce risk first
+LANE_ORDER = 1  # New orders and other exchange actions
+LANE_DATA = 2  # Market data and account polling
+LANE_NAMES = {LANE_CANCEL: 'cancel', LANE_ORDER: 'order', LANE_DATA: 'data'}
+
+# Hyperliquid allows 1200 request weight per minute per IP across REST requests
+IP_CAPACITY = 1200.0
+IP_RATE = 20.0
+# Address limits grow with traded volume (10k request buffer plus 1 per USDC traded); a steady
+# budget well inside that keeps one busy account from locking itself out
+ACCOUNT_CAPACITY = 1000.0
+ACCOUNT_RATE = 10.0
+DEFAULT_IP = 'local'
+
+MIN_RATE_FACTOR = 0.05  # A throttled bucket never slows below this fraction of its base rate
+RECOVERY_STEP = 0.05  # Fraction of the base rate won back per successful request after throttling
+THROTTLE_MARKERS = ('429', 'rate limit', 'too many requests')
+
+
+def action_weight(action: dict) -> int:
+    """Exchange action weight: 1 + floor(orders / 40) for batched actions."""
+    batch = action.get('orders') or action.get('cancels') or action.get('modifies') or ()
+    return 1 + len(batch) // 40
+
+
+def action_lane(action: dict) -> int:
+    kind = action.get('type')
+    if kind in ('cancel', 'cancelByCloid', 'batchModify', 'modify'):
+        return LANE_CANCEL
+    if kind == 'order' and action.get('orders') and all(o.get('r') for o in action['orders']):
+        return LANE_CANCEL  # Reduce-only orders close positions
+    return LANE_ORDER
+
+
+def is_throttle_error(error) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return 'ratelimit' in text.replace(' ', '') or any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """Token bucket whose refill rate halves on throttling and recovers additively on success."""
+    __slots__ = ('capacity', 'base_rate', 'rate', 'tokens', 'updated', 'consumed', 'throttled')
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.base_rate = rate
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+        self.consumed = 0.0
+        self.throttled = 0
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, weight: float, now: float) -> float:
+        """Seconds until weight tokens are available (0 if they are now)."""
+        self.refill(now)
+        missing = min(weight, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, weight: float):
+        self.tokens -= min(weight, self.capacity)
+        self.consumed += weight
+
+    def throttle(self):
+        self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        self.throttled += 1
+
+    def recover(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def metrics(self, now: float) -> dict:
+        self.refill(now)
+        return {'tokens': round(self.tokens, 3), 'capacity': self.capacity, 'rate': self.rate,
+                'base_rate': self.base_rate, 'utilization': round(1 - max(self.tokens, 0.0) / self.capacity, 4),
+                'consumed': self.consumed, 'throttled': self.throttled}
+
+
+class RateLimiter:
+    """
+    Outbound request scheduler: every request takes weight from its account address bucket and
+    from its IP bucket. While tokens are available a request goes straight through; otherwise it
+    queues, and queued requests are served by lane (cancels/closes, then orders, then data) and
+    arrival. A request blocked on the IP bucket holds back everything behind it; one blocked on
+    its address only holds back that address. Throttled responses slow the buckets involved.
+    """
+
+    def __init__(self, ip_capacity: float = IP_CAPACITY, ip_rate: float = IP_RATE,
+                 account_capacity: float = ACCOUNT_CAPACITY, account_rate: float = ACCOUNT_RATE,
+                 clock=time.monotonic):
+        self.ip_capacity, self.ip_rate = ip_capacity, ip_rate
+        self.account_capacity, self.account_rate = account_capacity, account_rate
+        self._clock = clock
+        self.ips = {}  # ip -> TokenBucket
+        self.accounts = {}  # address -> TokenBucket
+        self._waiters = []  # heap of [lane, seq, address, ip, weight, future, queued_at]
+        self._seq = itertools.count()
+        self._wake = None
+        self._task = None
+        self.lane_stats = {lane: {'granted': 0, 'queued': 0, 'waited': 0.0, 'max_wait': 0.0} for lane in LANE_NAMES}
+
+    def _ip(self, ip: str) -> TokenBucket:
+        bucket = self.ips.get(ip)
+        if bucket is None:
+            bucket = self.ips[ip] = TokenBucket(self.ip_capacity, self.ip_rate, self._clock())
+        return bucket
+
+    def _account(self, address: str) -> TokenBucket:
+        bucket = self.accounts.get(address)
+        if bucket is None:
+            bucket = self.accounts[address] = TokenBucket(self.account_capacity, self.account_rate, self._clock())
+        return bucket
+
+    async def acquire(self, address: str, weight: float = 1, lane: int = LANE_ORDER, ip: str = DEFAULT_IP) -> float:
+        """Wait for weight tokens from both buckets. Returns the seconds spent queued."""
+        now = self._clock()
+        ip_bucket, account_bucket = self._ip(ip), self._account(address)
+        if not self._waiters and ip_bucket.wait_time(weight, now) == 0 and account_bucket.wait_time(weight, now) == 0:
+            ip_bucket.take(weight)
+            account_bucket.take(weight)
+            self.lane_stats[lane]['granted'] += 1
+            return 0.0
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [lane, next(self._seq), address, ip, weight, future, now])
+        self.lane_stats[lane]['queued'] += 1
+        self._kick()
+        return await future
+
+    def _kick(self):
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._dispatch())
+        else:
+            self._wake.set()
+
+    async def _dispatch(self):
+        while self._waiters:
+            now = self._clock()
+            blocked_ips, blocked_addresses = set(), set()
+            waiting, next_wait = [], None
+            for entry in sorted(self._waiters):
+                lane, _, address, ip, weight, future, queued_at = entry
+                if future.done():
+                    continue  # Caller gave up
+                if ip in blocked_ips or address in blocked_addresses:
+                    waiting.append(entry)
+                    continue
+                ip_bucket, account_bucket = self._ip(ip), self._account(address)
+                ip_wait, account_wait = ip_bucket.wait_time(weight, now), account_bucket.wait_time(weight, now)
+                if ip_wait == 0 and account_wait == 0:
+                    ip_bucket.take(weight)
+                    account_bucket.take(weight)
+                    waited = now - queued_at
+                    stats = self.lane_stats[lane]
+                    stats['granted'] += 1
+                    stats['waited'] += waited
+                    stats['max_wait'] = max(stats['max_wait'], waited)
+                    future.set_result(waited)
+                    continue
+                if ip_wait > 0:
+                    blocked_ips.add(ip)
+                blocked_addresses.add(address)
+                wait = max(ip_wait, account_wait)
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                waiting.append(entry)
+            heapq.heapify(waiting)
+            self._waiters = waiting
+            if not waiting:
+                break
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), next_wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def reset(self):
+        """Forget all buckets, queued requests and stats."""
+        if self._task and not self._task.done() and not self._task.get_loop().is_closed():
+            self._task.cancel()
+        self.__init__(self.ip_capacity, self.ip_rate, self.account_capacity, self.account_rate, self._clock)
+
+    def throttled(self, address: str, ip: str = DEFAULT_IP):
+        """The exchange throttled a request: slow both buckets it used."""
+        self._account(address).throttle()
+        self._ip(ip).throttle()
+        print(f"RateLimiter: throttled on {address[:10]}; rates now {self._account(address).rate:.2f}/s account, "
+              f"{self._ip(ip).rate:.2f}/s IP.")
+
+    def succeeded(self, address: str, ip: str = DEFAULT_IP):
+        self._account(address).recover()
+        self._ip(ip).recover()
+
+    def metrics(self) -> dict:
+        """Bucket utilization per IP and account address, and queueing per lane."""
+        now = self._clock()
+        queued = {lane: 0 for lane in LANE_NAMES}
+        for entry in self._waiters:
+            if not entry[5].done():
+                queued[entry[0]] += 1
+        return {
+            'ips': {ip: bucket.metrics(now) for ip, bucket in self.ips.items()},
+            'accounts': {address: bucket.metrics(now) for address, bucket in self.accounts.items()},
+            'lanes': {LANE_NAMES[lane]: dict(stats, waiting=queued[lane],
+                                             avg_wait=stats['waited'] / stats['granted'] if stats['granted'] else 0.0)
+                      for lane, stats in self.lane_stats.items()},
+        }
+
+
+# Shared instance: every account in the process goes out through the same IP.
+rate_limiter = RateLimiter()
@@ -0,0 +1,274 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from eth_account.messages import encode_typed_data
+from eth_keys import keys
+from eth_utils import keccak
+from hyperliquid.ccxt.static_dependencies.msgpack import packb
+
+MAX_BATCH = 50  # Signatures per job handed to a worker
+AGENT_DOMAIN = {'chainId': 1337, 'name': 'Exchange', 'verifyingContract': '0x' + '0' * 40, 'version': '1'}
+AGENT_TYPES = {'Agent': [{'name': 'source', 'type': 'string'}, {'name': 'connectionId', 'type': 'bytes32'}]}
+MAX_CACHED_STRINGS = 4096  # Encoded keys and short values ("a", "limit", "Gtc", prices) kept for reuse
+CACHED_STRING_LENGTH = 16  # Longer values (cloids) are encoded each time
+
+_strings = {}
+_local = threading.local()
+
+
+def _pack_str(text: str, out: bytearray, cache: bool):
+    packed = _strings.get(text)
+    if packed is None:
+        raw = text.encode()
+        n = len(raw)
+        if n < 32:
+            packed = bytes((0xa0 | n,)) + raw
+        elif n < 0x100:
+            packed = b'\xd9' + bytes((n,)) + raw
+        elif n < 0x10000:
+            packed = b'\xda' + struct.pack('>H', n) + raw
+        else:
+            packed = b'\xdb' + struct.pack('>I', n) + raw
+        if cache and len(_strings) < MAX_CACHED_STRINGS:
+            _strings[text] = packed
+    out += packed
+
+
+def _pack(obj, out: bytearray):
+    kind = type(obj)
+    if kind is str:
+        _pack_str(obj, out, len(obj) <= CACHED_STRING_LENGTH)
+    elif kind is dict:
+        n = len(obj)
+        out += bytes((0x80 | n,)) if n < 16 else b'\xde' + struct.pack('>H', n)
+        for key, value in obj.items():
+            if type(key) is str:
+                _pack_str(key, out, True)
+            else:
+                _pack(key, out)
+            _pack(value, out)
+    elif kind is bool:
+        out.append(0xc3 if obj else 0xc2)
+    elif kind is int and 0 <= obj < 1 << 64:
+        if obj < 0x80:
+            out.append(obj)
+        elif obj < 0x100:
+            out += b'\xcc' + bytes((obj,))
+        elif obj < 0x10000:
+            out += b'\xcd' + struct.pack('>H', obj)
+        elif obj < 1 << 32:
+            out += b'\xce' + struct.pack('>I', obj)
+        else:
+            out += b'\xcf' + struct.pack('>Q', obj)
+    elif kind is list or kind is tuple:
+        n = len(obj)
+        out += bytes((0x90 | n,)) if n < 16 else b'\xdc' + struct.pack('>H', n)
+        for item in obj:
+            _pack(item, out)
+    elif obj is None:
+        out.append(0xc0)
+    else:
+        out += packb(obj)  # Floats, negative or huge ints: rare in actions, left to the generic packer
+
+
+def pack_action(action: dict) -> bytes:
+    """
+    msgpack encoding of an action, byte for byte what packb produces for the types actions use,
+    written into a per-thread buffer that is reused between calls, with keys and short strings
+    encoded once.
+    """
+    out = getattr(_local, 'buffer', None)
+    if out is None:
+        out = _local.buffer = bytearray()
+    del out[:]
+    _pack(action, out)
+    return bytes(out)
+
+
+class NonceAllocator:
+    """
+    Nonces for one signing address: unique and increasing across every coroutine and thread using
+    it. A block of count nonces is contiguous, so actions sent together keep their order.
+    """
+
+    def __init__(self):
+        self.last = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, now_ms: int, count: int = 1) -> int:
+        """Reserve count nonces at or after now_ms; returns the first."""
+        with self._lock:
+            first = max(int(now_ms), self.last + 1)
+            self.last = first + count - 1
+        return first
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def nonce_allocator(address: str) -> NonceAllocator:
+    """The allocator shared by everything signing for address (e.g. one key loaded as two accounts)."""
+    key = address.lower()
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = _allocators[key] = NonceAllocator()
+    return allocator
+
+
+class L1Signer:
+    """
+    Signs Hyperliquid L1 actions (the same signatures as the CCXT client's sign_l1_action) with a
+    key parsed once rather than on every call. Picklable, so it can run in a worker process.
+    """
+
+    def __init__(self, private_key: str, is_testnet: bool = False):
+        self.private_key = private_key
+        self.is_testnet = is_testnet
+        self._key = None
+
+    @classmethod
+    def for_client(cls, client):
+        """An L1Signer with the client's key, or None when the client keeps no usable key."""
+        private_key = getattr(client, 'privateKey', None)
+        if not isinstance(private_key, str) or len(private_key.removeprefix('0x')) != 64:
+            return None
+        options = getattr(client, 'options', None) or {}
+        return cls(private_key, bool(options.get('sandboxMode', False)))
+
+    def __getstate__(self):
+        return {'private_key': self.private_key, 'is_testnet': self.is_testnet, '_key': None}
+
+    def __call__(self, action: dict, nonce: int, vault_address: str = None) -> dict:
+        if self._key is None:
+            self._key = keys.PrivateKey(bytes.fromhex(self.private_key.removeprefix('0x')))
+        data = pack_action(action) + nonce.to_bytes(8, 'big')
+        data += b'\x00' if vault_address is None else b'\x01' + bytes.fromhex(vault_address.removeprefix('0x'))
+        agent = {'source': 'b' if self.is_testnet else 'a', 'connectionId': keccak(data)}
+        message = encode_typed_data(AGENT_DOMAIN, AGENT_TYPES, agent)
+        signature = self._key.sign_msg_hash(keccak(b'\x19\x01' + message.header + message.body))
+        return {'r': '0x' + signature.r.to_bytes(32, 'big').hex(),
+                's': '0x' + signature.s.to_bytes(32, 'big').hex(),
+                'v': 27 + signature.v}
+
+
+def _sign_batch(signer, items):
+    return [signer(action, nonce) for action, nonce in items]
+
+
+class SignerPool:
+    """
+    Runs signing off the event loop. Signatures requested in the same loop iteration are gathered
+    and handed out in batches: L1Signers to a process pool (signing is CPU-bound Python, so threads
+    would still hold the GIL), any other signer (e.g. a client's own sign method) to a thread.
+    processes=0 keeps everything on threads.
+    Each batch pickles its L1Signer, private key included, to a spawned worker process of this
+    machine; the key never leaves it, but it does live in every worker's memory.
+    """
+
+    def __init__(self, processes: int = None):
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self._process_pool = None
+        self._thread_pool = None
+        self._start_lock = threading.Lock()
+        self._started = None  # Future for start() running in a thread, shared by every caller on the loop
+        self._pending = []  # (signer, action, nonce, future)
+        self._flush_loop = None  # Loop with a flush scheduled
+        self.signed = 0
+        self.batches = 0
+
+    def start(self):
+        """
+        Create the worker processes now, so the first burst doesn't pay for starting them.
+        Blocks until they are up; on the event loop use ensure_started() instead.
+        """
+        with self._start_lock:  # Concurrent callers would each create a pool and leak all but one
+            if self.processes > 0 and self._process_pool is None:
+                # spawn: forking a process that runs Qt and network threads is unsafe
+                pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+                for future in [pool.submit(int) for _ in range(self.processes)]:
+                    future.result()
+                self._process_pool = pool
+
+    def ensure_started(self) -> asyncio.Future:
+        """Run start() once in a thread; every caller on the loop awaits the same future."""
+        if self._started is None or (self._started.done() and self._process_pool is None):  # Failed or shut down
+            self._started = asyncio.get_running_loop().run_in_executor(None, self.start)
+        return self._started
+
+    def _executor(self, signer):
+        if isinstance(signer, L1Signer) and self.processes > 0:
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max(1, self.processes), thread_name_prefix='signer')
+        return self._thread_pool
+
+    def sign(self, signer, action: dict, nonce: int) -> asyncio.Future:
+        """Future for signer(action, nonce), computed in the pool."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((signer, action, nonce, future))
+        if self._flush_loop is not loop:
+            self._flush_loop = loop
+            loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        self._flush_loop = None
+        pending, self._pending = self._pending, []
+        groups = {}
+        for signer, action, nonce, future in pending:
+            if not future.done():
+                groups.setdefault(id(signer), (signer, []))[1].append((action, nonce, future))
+        for signer, items in groups.values():
+            if isinstance(signer, L1Signer) and self.processes > 0 and self._process_pool is None:
+                # Workers are still spawning: dispatch once they are up rather than block the loop
+                started = self.ensure_started()
+                started.add_done_callback(lambda started, signer=signer, items=items: self._after_start(started, signer, items))
+            else:
+                self._dispatch(signer, items)
+
+    def _after_start(self, started, signer, items):
+        error = started.exception() if not started.cancelled() else asyncio.CancelledError()
+        if error is None and self._process_pool is not None:
+            self._dispatch(signer, items)
+            return
+        for _, _, future in items:
+            if not future.done():
+                future.set_exception(error or RuntimeError('Signer pool was shut down'))
+
+    def _dispatch(self, signer, items):
+        executor = self._executor(signer)
+        size = min(MAX_BATCH, math.ceil(len(items) / max(1, self.processes)))
+        for start in range(0, len(items), size):
+            batch = items[start:start + size]
+            job = asyncio.wrap_future(executor.submit(_sign_batch, signer, [(a, n) for a, n, _ in batch]))
+            job.add_done_callback(lambda job, batch=batch: self._resolve(job, batch))
+            self.batches += 1
+
+    def _resolve(self, job, batch):
+        error = job.exception() if not job.cancelled() else asyncio.CancelledError()
+        for i, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(job.result()[i])
+                self.signed += 1
+
+    def shutdown(self):
+        for pool in (self._process_pool, self._thread_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._process_pool = self._thread_pool = None
+        self._started = None
+
+
+# Shared instance: one set of signing workers for every account.
+signer_pool = SignerPool()
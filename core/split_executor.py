@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+# Orders per exchange action. Hyperliquid weighs a batch as 1 + floor(n / 40), so 40 keeps
+# each request at weight 2 while a 100-split ladder still lands in 3 requests.
+MAX_ORDERS_PER_ACTION = 40
+# Chunks of one ladder in flight at once; keeps a burst inside the account's rate budget.
+MAX_IN_FLIGHT = 4
+
+
+def chunk_orders(wire_orders: list, chunk_size: int = MAX_ORDERS_PER_ACTION) -> list:
+    """Split wire orders into consecutive chunks of at most chunk_size."""
+    return [wire_orders[i:i + chunk_size] for i in range(0, len(wire_orders), chunk_size)]
+
+
+def build_actions(wire_orders: list, tpsl_start: int = None, chunk_size: int = MAX_ORDERS_PER_ACTION) -> list:
+    """
+    Order actions for wire orders, chunk_size orders each. Orders from index tpsl_start onward are
+    SL/TP legs. When the entries and their legs fit in one action it uses the normalTpsl grouping,
+    so the exchange links the legs to the entries they bracket. Otherwise the entries go out in na
+    chunks and the legs in action(s) of their own, last (see leg_actions_start): they are sized for
+    the whole ladder, so they must not be linked to one chunk's entries.
+    """
+    if tpsl_start is None or tpsl_start >= len(wire_orders):
+        return [{"type": "order", "orders": orders, "grouping": "na"} for orders in chunk_orders(wire_orders, chunk_size)]
+    if len(wire_orders) <= chunk_size:
+        return [{"type": "order", "orders": wire_orders, "grouping": "normalTpsl"}]
+    return [{"type": "order", "orders": orders, "grouping": "na"}
+            for orders in chunk_orders(wire_orders[:tpsl_start], chunk_size) + chunk_orders(wire_orders[tpsl_start:], chunk_size)]
+
+
+def leg_actions_start(wire_count: int, tpsl_start: int = None, chunk_size: int = MAX_ORDERS_PER_ACTION) -> int:
+    """Index of the first SL/TP-only action build_actions makes; the action count if there is none."""
+    if tpsl_start is None or tpsl_start >= wire_count:
+        return -(-wire_count // chunk_size)  # No legs
+    if wire_count <= chunk_size:
+        return 1  # The legs share the entries' normalTpsl action
+    return -(-tpsl_start // chunk_size)
+
+
+def response_statuses(response) -> list:
+    """Per-order statuses from an exchange response, e.g. [{"resting": {"oid": 1}}, {"error": "..."}]."""
+    if not isinstance(response, dict):
+        return []
+    data = (response.get('response') or {}).get('data') or {}
+    return data.get('statuses') or []
+
+
+async def submit_chunked(trader, wire_orders: list, tpsl_start: int = None,
+                         chunk_size: int = MAX_ORDERS_PER_ACTION, max_in_flight: int = MAX_IN_FLIGHT) -> dict:
+    """
+    Send wire orders as batched order actions, chunk_size orders per request, with up to
+    max_in_flight requests pipelined concurrently. Orders from index tpsl_start onward are
+    SL/TP legs, grouped as build_actions does; legs in actions of their own are sent once the
+    entries are acknowledged, so the reduce-only legs never reach the exchange before them.
+    Returns one aggregated result with per-chunk acks and per-order statuses in input order.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def send(index, action):
+        orders = action["orders"]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await trader.submit_action(action)
+                error = None
+            except Exception as e:
+                response, error = None, str(e)
+            latency = time.perf_counter() - started
+        return {"index": index, "orders": len(orders), "latency": latency, "response": response, "error": error}
+
+    actions = build_actions(wire_orders, tpsl_start, chunk_size)
+    legs_start = leg_actions_start(len(wire_orders), tpsl_start, chunk_size)
+    acks = await asyncio.gather(*(send(i, action) for i, action in enumerate(actions[:legs_start])))
+    acks += await asyncio.gather(*(send(i, action) for i, action in enumerate(actions[legs_start:], legs_start)))
+
+    statuses, errors = [], []
+    for ack in acks:
+        if ack["error"] is not None:
+            errors.append(f"chunk {ack['index']}: {ack['error']}")
+            statuses.extend({"error": ack["error"]} for _ in range(ack["orders"]))
+            continue
+        if isinstance(ack["response"], dict) and ack["response"].get("status") == "err":
+            # The whole chunk was rejected: every order in it failed, as for a single action
+            error = ack["response"].get("response")
+            errors.append(f"chunk {ack['index']}: {error}")
+            statuses.extend({"error": error} for _ in range(ack["orders"]))
+            continue
+        chunk_statuses = response_statuses(ack["response"])
+        statuses.extend(chunk_statuses + [None] * (ack["orders"] - len(chunk_statuses)))
+
+    failed = len(errors)
+    status = "ok" if failed == 0 else ("error" if failed == len(acks) else "partial")
+    return {"status": status, "requests": len(acks), "statuses": statuses, "errors": errors, "chunks": acks}
@@ -0,0 +1,151 @@
+import asyncio
+import re
+from core.price_cache import price_cache
+
+TP_TAG = re.compile(r'^tp(\d+)$')
+MIN_STEP_PERCENT = 0.05  # Smallest trailing move worth a modify, as a percentage of the stop price
+
+
+class Trailer:
+    """Trailing state for one SL leg. Everything a tick needs is a field, so a tick is O(1)."""
+    __slots__ = ('account', 'symbol', 'cloid', 'is_long', 'factor', 'best', 'stop', 'target', 'in_flight')
+
+    def __init__(self, account, symbol, cloid, is_long, trail_percent, best, stop):
+        self.account = account
+        self.symbol = symbol
+        self.cloid = cloid
+        self.is_long = is_long
+        self.factor = 1 - trail_percent / 100.0 if is_long else 1 + trail_percent / 100.0
+        self.best = best  # Most favourable price seen since trailing started
+        self.stop = stop  # Stop price last sent (or queued)
+        self.target = None  # Latest stop waiting for the in-flight modify to finish
+        self.in_flight = False
+
+
+class StopManager:
+    """
+    Manages SL legs from the fill stream and the price feed:
+    - when TPn of an order fills, the SL moves to TP(n-1), or to breakeven after TP1;
+    - SL legs registered with trail_percent trail the best price seen by that percentage.
+    Trailing is evaluated on every price cache update in O(1) per trailed position; at most one
+    modify per leg is in flight and moves arriving meanwhile collapse into the latest stop.
+    """
+
+    def __init__(self, accounts, min_step_percent: float = MIN_STEP_PERCENT, prices=price_cache):
+        self.accounts = list(accounts)
+        self.min_step = min_step_percent / 100.0
+        self.prices = prices
+        self.trailers = {}  # symbol -> {sl cloid: Trailer}
+        self._tasks = set()
+        self._listeners = []
+
+    def start(self):
+        """Attach to every account's order store and to the price feed. Must run on the engine loop."""
+        for account in self.accounts:
+            listener = lambda leg, account=account: self.on_leg_event(account, leg)
+            account.order_store.leg_listeners.append(listener)
+            self._listeners.append((account, listener))
+        self.prices.listeners.append(self.on_tick)
+
+    def stop(self):
+        for account, listener in self._listeners:
+            if listener in account.order_store.leg_listeners:
+                account.order_store.leg_listeners.remove(listener)
+        self._listeners = []
+        if self.on_tick in self.prices.listeners:
+            self.prices.listeners.remove(self.on_tick)
+        for task in self._tasks:
+            task.cancel()
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # --- fill-driven SL moves ---
+
+    def on_leg_event(self, account, leg):
+        if leg['event'] == 'registered':
+            meta = leg.get('meta') or {}
+            if 'sl' in leg['tags'] and meta.get('trail_percent'):
+                self.trail(account, leg['symbol'], leg['cloid'], meta['trail_percent'], meta.get('reference_price'))
+            return
+        # closed
+        if 'sl' in leg['tags']:
+            self.untrail(leg['symbol'], leg['cloid'])
+            return
+        if leg['status'] != 'closed':  # Cancelled or rejected TPs don't move the stop
+            return
+        for tag in leg['tags']:
+            match = TP_TAG.match(tag)
+            if match:
+                self._spawn(self._move_after_tp(account, int(match.group(1)), leg['parent'], leg['symbol']))
+                return
+
+    async def _move_after_tp(self, account, tp_index, parent, symbol):
+        result = await account.move_sl_to_previous_tp(tp_index, parent, symbol)
+        # A trailed SL continues from where the TP logic put it, never back below it
+        for trailer in self.trailers.get(symbol, {}).values():
+            wire = account.order_store.leg_wire(trailer.cloid) if trailer.account is account else None
+            if wire is not None:
+                moved = float(wire['t']['trigger']['triggerPx'])
+                trailer.stop = max(trailer.stop, moved) if trailer.is_long else min(trailer.stop, moved)
+        return result
+
+    # --- percentage trailing ---
+
+    def trail(self, account, symbol, sl_cloid, trail_percent, reference_price=None):
+        """Start trailing an SL leg by trail_percent from the best price seen."""
+        wire = account.order_store.leg_wire(sl_cloid)
+        if wire is None:
+            return None
+        is_long = not wire['b']  # The SL sells to close a long
+        stop = float(wire['t']['trigger']['triggerPx'])
+        best = reference_price or self.prices.get_mid(symbol, max_age=float('inf')) or stop
+        trailer = Trailer(account, symbol, sl_cloid, is_long, trail_percent, best, stop)
+        # The feed reports quotes under the symbol it was subscribed with, the leg's own symbol
+        self.trailers.setdefault(symbol, {})[sl_cloid] = trailer
+        self.prices.subscribe(symbol)
+        return trailer
+
+    def untrail(self, symbol, sl_cloid):
+        trailers = self.trailers.get(symbol)
+        if trailers is not None:
+            trailers.pop(sl_cloid, None)
+            if not trailers:
+                del self.trailers[symbol]
+
+    def on_tick(self, symbol, mid):
+        trailers = self.trailers.get(symbol)
+        if not trailers:
+            return
+        for trailer in trailers.values():
+            if trailer.is_long:
+                if mid <= trailer.best:
+                    continue
+                trailer.best = mid
+                candidate = mid * trailer.factor
+                if candidate < trailer.stop * (1 + self.min_step):
+                    continue
+            else:
+                if mid >= trailer.best:
+                    continue
+                trailer.best = mid
+                candidate = mid * trailer.factor
+                if candidate > trailer.stop * (1 - self.min_step):
+                    continue
+            trailer.stop = candidate
+            if trailer.in_flight:
+                trailer.target = candidate
+            else:
+                trailer.in_flight = True
+                self._spawn(self._send(trailer, candidate))
+
+    async def _send(self, trailer, stop):
+        try:
+            while stop is not None:
+                await trailer.account.amend_legs([(trailer.symbol, trailer.cloid)], stop, label="trailing sl")
+                stop, trailer.target = trailer.target, None
+        finally:
+            trailer.in_flight = False
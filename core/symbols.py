@@ -0,0 +1,83 @@
+QUOTE_ALIASES = ('USDC', 'USDT', 'USD')  # Quotes users type for perps; every perp settles in USDC
+
+
+class SymbolInfo:
+    """One market's identity and precision: exchange coin, CCXT symbol, asset index, tick and lot size."""
+    __slots__ = ('coin', 'symbol', 'asset', 'tick_size', 'lot_size', 'spot')
+
+    def __init__(self, coin, symbol, asset, tick_size=None, lot_size=None, spot=False):
+        self.coin = coin  # Exchange coin as the API names it, e.g. "BTC", "kPEPE", "@107"
+        self.symbol = symbol  # CCXT market symbol, e.g. "BTC/USDC:USDC"
+        self.asset = asset
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.spot = spot
+
+    @classmethod
+    def from_market(cls, market: dict) -> 'SymbolInfo':
+        spot = bool(market.get('spot'))
+        info = market.get('info') or {}
+        coin = market.get('id') if spot else (info.get('name') or market.get('base'))
+        precision = market.get('precision') or {}
+        asset = market.get('baseId')
+        return cls(coin or market['symbol'], market['symbol'], int(asset) if asset is not None else None,
+                   precision.get('price'), precision.get('amount'), spot)
+
+    def __repr__(self):
+        return f"SymbolInfo({self.symbol}, coin={self.coin}, asset={self.asset})"
+
+
+class SymbolIndex:
+    """
+    Every accepted way of writing a symbol ("BTC", "btc", "BTC/USDT", "BTCUSDT", "BTC-PERP",
+    "BTC/USDC:USDC") mapped to its market's SymbolInfo, and asset index back to SymbolInfo, built
+    once from the market list so lookups are a single dict read. Aliases are case-insensitive.
+    Exact market symbols and ids win over derived aliases, and perps over spot for bare coins.
+    """
+
+    def __init__(self, markets=()):
+        self._aliases = {}  # Upper-cased alias -> SymbolInfo
+        self._assets = {}  # Asset index -> SymbolInfo
+        infos = [(market, SymbolInfo.from_market(market)) for market in markets or () if market.get('symbol')]
+        for market, info in infos:
+            for alias in (info.symbol, market.get('id'), info.coin):
+                if alias is not None:
+                    self._aliases.setdefault(str(alias).upper(), info)
+            if info.asset is not None:
+                self._assets[info.asset] = info
+        for market, info in sorted(infos, key=lambda pair: pair[1].spot):
+            base, quote = market.get('base'), market.get('quote')
+            if not base or not quote:
+                continue
+            quotes = (quote,) if info.spot else (quote,) + QUOTE_ALIASES
+            aliases = [] if info.spot else [base, f"{base}-PERP"]
+            for q in quotes:
+                aliases += [f"{base}/{q}", f"{base}{q}", f"{base}-{q}"]
+            for alias in aliases:
+                self._aliases.setdefault(alias.upper(), info)
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __contains__(self, alias):
+        return self.resolve(alias) is not None
+
+    def resolve(self, alias):
+        """SymbolInfo for any accepted alias or asset index, or None if unknown."""
+        if isinstance(alias, int):
+            return self._assets.get(alias)
+        if not alias:
+            return None
+        return self._aliases.get(alias.strip().upper())
+
+    def by_asset(self, asset: int):
+        return self._assets.get(asset)
+
+    def symbol(self, alias: str) -> str:
+        """Canonical market symbol for alias; unknown symbols are returned unchanged."""
+        info = self.resolve(alias)
+        return info.symbol if info is not None else alias
+
+    def resolve_map(self, symbols: dict) -> dict:
+        """{key: symbol} with every symbol made canonical, e.g. a copy-trading pair map."""
+        return {key: self.symbol(symbol) for key, symbol in symbols.items()}
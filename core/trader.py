@@ -1,9 +1,28 @@
 import asyncio
+import random
+import time
 from hyperliquid.ccxt.async_support.hyperliquid import hyperliquid as HyperliquidAsync
 from hyperliquid.ccxt.pro.hyperliquid import hyperliquid as HyperliquidWs
 from eth_account import Account
+from core.price_cache import price_cache
+from core.market_registry import get_market_registry, get_symbol_index
+from core.connection_manager import connection_manager
+from core.order_splitter import generate_splits, BOOK_DISTRIBUTIONS
+from core.split_executor import submit_chunked, build_actions, leg_actions_start, response_statuses, MAX_ORDERS_PER_ACTION
+from core.order_store import OrderStore
+from core.order_templates import OrderTemplate
+from core.models import OrderRequest
+from core.signer import L1Signer, nonce_allocator, signer_pool
+from core.rate_limiter import rate_limiter, action_lane, action_weight, is_throttle_error, LANE_DATA
+from utils.helpers import derive_cloid, new_cloid
 
 class TraderAccount:
+    MARKET_SLIPPAGE = 0.05 # Worst-price bound for market (IOC) orders and market triggers, as a fraction
+    # The exchange accepts a nonce while it is above the lowest of the account's 100 highest nonces and
+    # within a day or two of now; a pre-signed action is re-signed at fire time once either is in doubt.
+    PRESIGN_NONCE_HORIZON = 80
+    PRESIGN_MAX_AGE = 12 * 3600.0
+
     def __init__(self, api_key: str, api_secret: str, account_id: int):
         self.api_key = api_key # This is the account address (public key)
         self.api_secret = api_secret # This is the private key
@@ -12,36 +31,67 @@ class TraderAccount:
             # Standard CCXT initialization:
             # Pass apiKey (address) and secret (private key) in the config.
             # The HyperliquidAsync wrapper should handle wallet creation and address assignment.
-            self.client = HyperliquidAsync({
-                'apiKey': self.api_key,
-                'secret': self.api_secret,
-                # 'verbose': True, # Optional: for debugging CCXT calls
-            })
+            self.client = self._build_client()
         except Exception as e:
             print(f"Error initializing HyperliquidAsync in __init__: {e}")
             self.client = None # Ensure client is None if init fails
         self.ws = None
         self.connected = False
-        self.position = None
+        self.order_store = OrderStore(self) # Local open orders and positions, kept current from user events
         self.is_connected = False  # Track connection status
+        self.connection_manager = connection_manager
+        connection_manager.register(self)
+        self._submit_path = None # Cached exchange submission path, probed once per client
+        self._submit_path_client = None
+        self.nonces = nonce_allocator(api_key) # Concurrent actions signed for this address need distinct, increasing nonces
+        self.signer_pool = signer_pool
+        self._signer = None # Signing callable for the current client
+        self._signer_client = None
+        self._templates = {} # symbol -> OrderTemplate for the current client
+        self._templates_client = None
+        self._signed_count = 0 # Actions signed so far; tells how many nonces followed a pre-signed one
+        self._update_listeners = [] # Callbacks sharing this account's user-event stream
+        self._update_task = None
+        self.rate_limiter = rate_limiter # Shared per-IP budget; this account's address gets its own bucket
+
+    def _build_client(self):
+        return HyperliquidAsync({
+            'apiKey': self.api_key,
+            'secret': self.api_secret,
+            # The CCXT Hyperliquid client signs exchange actions with these
+            'walletAddress': self.api_key,
+            'privateKey': self.api_secret,
+            # 'verbose': True, # Optional: for debugging CCXT calls
+        })
+
+    async def connect(self, force_new: bool = False):
+        """
+        Connects the account, reusing the existing client (and its warm HTTP session) when possible.
+        Pass force_new=True to close the current client and build a fresh one.
+        """
+        if self.client and force_new:
+            try:
+                await self.client.close()
+            except Exception as close_e:
+                print(f"Account {self.account_id}: Error closing client before reconnect: {close_e}")
+            self.client = None
 
-    async def connect(self):
-        if self.client:
-            await self.client.close()
-        
-        # Re-initialize the client using the standard CCXT config pattern
         try:
-            self.client = HyperliquidAsync({
-                'apiKey': self.api_key,
-                'secret': self.api_secret,
-            })
+            if self.client is None:
+                # Re-initialize the client using the standard CCXT config pattern
+                self.client = self._build_client()
             print(f"Account {self.account_id}: Connection initiated with address {self.api_key}.")
-            await self.client.load_markets()
+            # Markets come from the shared registry (memory or disk snapshot) instead of a per-account download
+            registry = get_market_registry(self.client.id)
+            await registry.ensure_loaded(self.client, self._request)
+            registry.inject(self.client)
             print(f"Account {self.account_id}: Connection successful. Markets loaded.")
             self.is_connected = True
+            self.connection_manager.mark_up(self.account_id)
         except Exception as e:
             print(f"Account {self.account_id}: Failed to connect or verify connection: {e}")
             self.is_connected = False
+            self.connection_manager.mark_down(self.account_id, e)
             if self.client:
                 try:
                     await self.client.close() # Ensure client is closed on failure
@@ -49,36 +99,65 @@ class TraderAccount:
                     print(f"Account {self.account_id}: Error closing client during connect failure: {close_e}")
             self.client = None
 
-    async def get_market_price(self, symbol: str) -> float | None:
-        """Fetches the current market price for a given symbol."""
+    async def ping(self):
+        """Lightweight info request used by the connection manager to keep the session warm."""
+        return await self._request(LANE_DATA, 20, self.client.public_post_info, {'type': 'userRateLimit', 'user': self.api_key})
+
+    async def _request(self, lane: int, weight: int, call, *args, **kwargs):
+        """
+        Make one REST call once the rate limiter grants weight in lane. Throttled responses
+        (a rate-limit exception or an "err" status saying so) slow this account and the IP down.
+        """
+        await self.rate_limiter.acquire(self.api_key, weight, lane)
+        try:
+            result = await call(*args, **kwargs)
+        except Exception as e:
+            if is_throttle_error(e):
+                self.rate_limiter.throttled(self.api_key)
+            raise
+        if isinstance(result, dict) and result.get("status") == "err" and is_throttle_error(result.get("response")):
+            self.rate_limiter.throttled(self.api_key)
+        else:
+            self.rate_limiter.succeeded(self.api_key)
+        return result
+
+    async def get_market_price(self, symbol: str, max_age: float = None) -> float | None:
+        """
+        Returns the current market price for a given symbol.
+        Served from the shared WebSocket price cache when the feed is fresh (max_age seconds);
+        falls back to REST only when the cached quote is missing or stale.
+        Aliases are resolved first, so the cache and its feed are keyed by the market symbol.
+        """
+        symbol = self.resolve_symbol(symbol)
+        cached_mid = price_cache.get_mid(symbol, max_age)
+        if cached_mid is not None:
+            return cached_mid
+        price_cache.subscribe(symbol)
+
         if not self.client or not self.is_connected:
-            print(f"Account {self.account_id}: Not connected. Cannot fetch market price.")
-            # Attempt to reconnect
-            await self.connect()
-            if not self.client or not self.is_connected:
-                return None
+            print(f"Account {self.account_id}: Not connected. Cannot fetch market price; reconnecting in background.")
+            self.connection_manager.request_reconnect(self)
+            return None
 
         try:
-            # Ensure the symbol is in the format expected by the exchange (e.g., 'BTC/USDT')
-            # The Hyperliquid SDK might use its own symbol format, adjust if necessary.
-            # Common ccxt practice is 'BASE/QUOTE', e.g., 'ETH/USD'
-            # If the SDK uses 'ETHUSD', you might need a mapping or ensure input is correct.
-            # For Hyperliquid, symbols are often like "ETH" or "BTC" (for perps against USDC)
-            # Let's assume the symbol passed is already in the correct format for the SDK.
-            
             # The ccxt fetch_ticker method is standard.
-            ticker = await self.client.fetch_ticker(symbol)
+            ticker = await self._request(LANE_DATA, 20, self.client.fetch_ticker, symbol)
             if ticker and 'last' in ticker and ticker['last'] is not None:
-                return float(ticker['last'])
+                last_price = float(ticker['last'])
+                price_cache.update(symbol, mid=last_price) # Share with other callers until the feed takes over
+                return last_price
             elif ticker and 'close' in ticker and ticker['close'] is not None: # Some exchanges use 'close' for last price
-                return float(ticker['close'])
+                last_price = float(ticker['close'])
+                price_cache.update(symbol, mid=last_price)
+                return last_price
             else:
                 print(f"Account {self.account_id}: Could not find 'last' or 'close' price in ticker for {symbol}: {ticker}")
                 # Fallback: try fetching order book and using mid-price
-                order_book = await self.client.fetch_order_book(symbol, limit=1)
+                order_book = await self._request(LANE_DATA, 2, self.client.fetch_order_book, symbol, limit=1)
                 if order_book and order_book['bids'] and order_book['asks']:
                     bid = order_book['bids'][0][0]
                     ask = order_book['asks'][0][0]
+                    price_cache.update(symbol, bid, ask)
                     return (bid + ask) / 2
                 print(f"Account {self.account_id}: Could not determine price for {symbol} from ticker or order book.")
                 return None
@@ -86,6 +165,27 @@ class TraderAccount:
             print(f"Account {self.account_id}: Error fetching market price for {symbol}: {e}")
             return None
 
+    async def get_order_book(self, symbol: str, max_age: float = None, limit: int = 100):
+        """
+        (bids, asks) level arrays of price, size, best first: from the local L2 book kept by the
+        WebSocket feed when fresh, else one REST snapshot (which then seeds the local book).
+        """
+        symbol = self.resolve_symbol(symbol)
+        book = price_cache.get_book(symbol, max_age)
+        if book is None:
+            price_cache.subscribe(symbol)
+            order_book = await self._request(LANE_DATA, 2, self.client.fetch_order_book, symbol, limit=limit)
+            price_cache.update_book(symbol, order_book['bids'], order_book['asks'])
+            book = price_cache.get_book(symbol, max_age=float('inf'))
+        return book.bids.to_array(), book.asks.to_array()
+
+    @staticmethod
+    def calculate_position_size(margin: float, leverage: float, price: float) -> float:
+        """Asset size bought by allocating margin at the given leverage and price."""
+        if not price or price <= 0:
+            return 0.0
+        return margin * leverage / price
+
     async def get_account_equity(self, asset_symbol: str = 'USDC') -> float | None:
         """Fetches the account equity, typically the balance of the collateral asset (e.g., USDC)."""
         if not self.client or not self.is_connected:
@@ -99,7 +199,7 @@ class TraderAccount:
             return None
         
         try:
-            balance_info = await self.client.fetch_balance()
+            balance_info = await self._request(LANE_DATA, 2, self.client.fetch_balance)
             # print(f"Account {self.account_id}: Balance info: {balance_info}") # Debugging line
 
             # Attempt to find total portfolio value in the base currency (asset_symbol)
@@ -153,264 +253,504 @@ class TraderAccount:
 
     async def place_order(self, symbol: str, side: str, order_type: str, size: float,
                           price: float = None, leverage: int = 10, margin_mode: str = 'cross',
-                          sl: float = None, tps: list = None, cloid: str = None):
+                          sl: float = None, tps: list = None, cloid: str = None,
+                          range_percent: float = None, split_count: int = 1, split_seed: int = None,
+                          split_distribution: str = 'uniform', reduce_only: bool = False,
+                          trail_percent: float = None, leg_size: float = None):
+        """
+        Places the entry with its SL and TP legs.  Leg cloids are derived from cloid (see
+        utils.helpers.order_cloids), so every order of one placement can be traced to its parent.
+        trail_percent marks the SL for percentage trailing by the stop manager. With split_count > 1 the entry is laid out as a
+        range ladder by generate_splits (range_percent around the entry) and sent in chunked batches.
+        split_distribution 'depth' or 'post_only' lays the ladder out against the local order book
+        (post_only splits go out as ALO). split_seed reproduces a ladder; when omitted a seed is drawn and logged for audit.
+        leg_size sizes the SL/TP legs when they must cover more than this entry (e.g. a scheduled execution's first slice).
+        """
         if not self.is_connected:
-            print(f"Account {self.account_id}: Not connected. Attempting to connect before placing order.")
-            await self.connect()
-            if not self.is_connected:
-                print(f"Account {self.account_id}: Connection failed. Cannot place order.")
-                return {"status": "error", "message": "Connection failed."}
+            # Never block the order on a reconnect; fail fast and let the manager restore the session.
+            print(f"Account {self.account_id}: Not connected. Cannot place order; reconnecting in background.")
+            self.connection_manager.request_reconnect(self)
+            return {"status": "error", "message": "Not connected; reconnecting in background."}
 
+        symbol = self.resolve_symbol(symbol)
+        if cloid is None:
+            cloid = new_cloid() # Legs derive their cloids from the parent, so every placement needs one
         print(f"Account {self.account_id}: Preparing to place order: Symbol={symbol}, Side={side}, Type={order_type}, Size={size}, Price={price}, Lev={leverage}, Margin={margin_mode}, SL={sl}%, TPs={tps}")
 
         try:
             await self.set_leverage(symbol, leverage, is_cross=(margin_mode.lower() == 'cross'))
 
-            order_requests = []
-            main_is_buy = side.lower() == 'long'
-            
-            # Determine reference price for SL/TP calculations
-            reference_price_for_sl_tp = price # Default to entry price for limit orders
-            if order_type.lower() == 'market':
-                # For market orders, SL/TP should ideally be based on fill price.
-                # Fetch current market price as a proxy.
-                current_market_price = await self.get_market_price(symbol)
-                if current_market_price:
-                    reference_price_for_sl_tp = current_market_price
-                    print(f"Account {self.account_id}: Using fetched market price {reference_price_for_sl_tp} for SL/TP on market order.")
-                else:
-                    print(f"Account {self.account_id}: Warning - Could not fetch market price for SL/TP on market order. SL/TP might be inaccurate or fail.")
-                    # If `price` was passed (e.g. from chart click even for market), it might be used as a fallback.
-                    if not reference_price_for_sl_tp: # if price was None
-                        print(f"Account {self.account_id}: SL/TP cannot be calculated for market order without a reference price.")
-                        # Do not proceed with SL/TP if no reference_price_for_sl_tp
-            
-            # 1. Construct Main Order
-            main_order_type_details: dict
-            main_limit_px_str = "0.0" # Hyperliquid expects string for prices
-            if order_type.lower() == 'limit':
-                if price is None:
-                    raise ValueError("Price must be provided for limit orders.")
-                main_order_type_details = {"limit": {"tif": "Gtc"}}
-                main_limit_px_str = f"{price:.8f}" # Format price to string with precision
-            elif order_type.lower() == 'market':
-                main_order_type_details = {"market": {}}
-                # For market orders, limit_px is not used for matching but might be required by API structure.
-                # Hyperliquid's `OrderRequest` has `limit_px` at the top level.
-            else:
-                raise ValueError(f"Unsupported order_type: {order_type}")
-
-            main_order_req = {
-                "asset": symbol,
-                "is_buy": main_is_buy,
-                "reduce_only": False,
-                "order_type": main_order_type_details,
-                "sz": size, # Size should be float
-                "limit_px": main_limit_px_str, 
-                "cloid": cloid
-            }
-            
-            # Handle SL: Attach to main order via tp_sl_spec if possible
-            # Hyperliquid's `OrderRequest` can take a `tp_sl_spec` for the main order.
-            # This is for a single SL/TP attached to the main order.
-            # If multiple TPs are needed, they must be separate trigger orders.
-            # We will prioritize separate trigger orders for TPs for flexibility.
-            # SL can be a trigger order too, or attached if only one SL is used.
-            # For simplicity, let's try to attach SL to the main order if only SL is present (no TPs or only one TP that could also be in tp_sl_spec)
-
-            sl_spec_for_main_order = {}
-            if sl is not None and sl > 0 and reference_price_for_sl_tp is not None:
-                calculated_sl_price = 0.0
-                if main_is_buy: # Long position, SL is below entry
-                    calculated_sl_price = reference_price_for_sl_tp * (1 - sl / 100.0)
-                else:  # Short position, SL is above entry
-                    calculated_sl_price = reference_price_for_sl_tp * (1 + sl / 100.0)
-                
-                if calculated_sl_price > 0:
-                    sl_spec_for_main_order = {
-                        "trigger_px": f"{calculated_sl_price:.8f}",
-                        "is_market": True, # SL typically triggers a market order
-                        "tpsl": "sl"
-                    }
-                    # main_order_req["tp_sl_spec"] = {"sl": sl_spec_for_main_order} # Old structure
-                    # New structure: SL is a trigger order if not part of a combined tpSl on main order
-                    # For Hyperliquid, if we want SL on the main order itself, it's part of a more complex `trigger` field within `order_type`
-                    # or a separate `tp_sl_spec` field. The `tp_sl_spec` is simpler.
-                    # Let's assume `tp_sl_spec` is for a single SL and/or a single TP.
-                    # If we have multiple TPs, we must use separate trigger orders for TPs.
-                    # We can still try to put SL on the main order.
-                    main_order_req["trigger"] = sl_spec_for_main_order # This might be the way for a simple SL trigger on main order
-                                                                      # Or, it might need to be a separate order.
-                                                                      # The SDK docs are key here.
-                                                                      # Let's assume for now we make SL a separate trigger order for consistency with multiple TPs.
-                    # Re-evaluating: The original code had `tp_sl_spec_dict` which implies it's possible.
-                    # Let's try to use the `tp_sl_spec` field on the main order for SL.
-                    # The `tp_sl_spec` in Hyperliquid is for stop-loss and take-profit that are *not* trigger orders themselves,
-                    # but rather conditions on the main order.
-                    # This is usually for exchanges that support OCO or SL/TP directly on the order.
-                    # Hyperliquid's `OrderRequest` has `trigger: Optional[Trigger]`
-                    # `Trigger` has `trigger_px`, `is_market`, `tpsl: Literal[\'tp\', \'sl\']`
-                    # This means the main order itself can be a trigger order.
-                    # This is not what we want for a simple SL on a non-trigger main order.
-
-                    # Let's stick to creating SL as a separate trigger order if `reference_price_for_sl_tp` is valid.
-                    # This makes it consistent with how multiple TPs are handled.
-                    sl_trigger_order_req = {
-                        "asset": symbol,
-                        "is_buy": not main_is_buy, # SL order is opposite to main order to close
-                        "reduce_only": True,
-                        "order_type": {
-                            "trigger": {
-                                "trigger_px": f"{calculated_sl_price:.8f}",
-                                "is_market": True, # SL triggers a market order to ensure fill
-                                "tpsl": "sl"
-                            }
-                        },
-                        "sz": size, # SL closes the full size
-                        "limit_px": "0.0", # Not used for market trigger
-                        "cloid": f"{cloid}_sl" if cloid else None
-                    }
-                    order_requests.append(sl_trigger_order_req)
-                    print(f"Account {self.account_id}: Prepared SL trigger order: {sl_trigger_order_req}")
-
-
-            order_requests.insert(0, main_order_req) # Main order first
-
-            # 2. Construct TP Orders (as separate trigger orders)
-            if tps and len(tps) > 0 and reference_price_for_sl_tp is not None:
-                num_tps = len(tps)
-                # Ensure total TP size does not exceed main order size.
-                # For simplicity, let's assume tps are for portions of the main order.
-                # A common strategy: each TP closes a fraction of the initial position.
-                tp_size_each = round(size / num_tps, 8) # Distribute size, round to sensible precision for size
-                if tp_size_each == 0 and size > 0 : # Avoid 0 size if main size is >0
-                    print(f"Account {self.account_id}: Warning - TP size per order is 0 due to many TPs or small main size. Adjusting. This might lead to issues.")
-                    # Potentially adjust logic: maybe first few TPs get slightly larger size, or error out.
-                    # For now, we proceed, but this is a sign of potential issue with too many TPs for small size.
-
-
-                for i, tp_item in enumerate(tps):
-                    profit_perc = tp_item.get('profit_perc')
-                    if profit_perc is None or profit_perc <= 0:
-                        print(f"Account {self.account_id}: Skipping TP {i+1} with invalid profit_perc: {tp_item}")
-                        continue
-
-                    calculated_tp_price = 0.0
-                    if main_is_buy: # Long position, TP is above entry
-                        calculated_tp_price = reference_price_for_sl_tp * (1 + profit_perc / 100.0)
-                    else:  # Short position, TP is below entry
-                        calculated_tp_price = reference_price_for_sl_tp * (1 - profit_perc / 100.0)
-                    
-                    if calculated_tp_price <= 0:
-                        print(f"Account {self.account_id}: Skipping TP {i+1} with invalid calculated price: {calculated_tp_price}")
-                        continue
-
-                    # TP order is a trigger limit order (common practice)
-                    # Hyperliquid: "trigger": {"trigger_px": "...", "is_market": False, "tpsl": "tp", "limit_px": "..."}
-                    # The `limit_px` inside trigger is the price for the limit order placed when trigger_px is hit.
-                    # The top-level `limit_px` for the OrderRequest should be set for the triggered limit order.
-                    tp_trigger_limit_price_str = f"{calculated_tp_price:.8f}" # Fill at this price or better
-
-                    tp_order_req = {
-                        "asset": symbol,
-                        "is_buy": not main_is_buy, # TP orders are opposite to main order
-                        "reduce_only": True,
-                        "order_type": {
-                            "trigger": {
-                                "trigger_px": f"{calculated_tp_price:.8f}",
-                                "is_market": False, 
-                                "tpsl": "tp"
-                                # "limit_px": tp_trigger_limit_price_str # This seems to be how HL wants it for triggered limit
-                            }
-                        },
-                        "sz": tp_size_each, 
-                        "limit_px": tp_trigger_limit_price_str, # This is the limit price for the order once triggered
-                        "cloid": f"{cloid}_tp_{i+1}" if cloid else None
-                    }
-                    order_requests.append(tp_order_req)
-                    print(f"Account {self.account_id}: Prepared TP trigger order {i+1}: {tp_order_req}")
-            
+            order_requests, wire_orders, entry_count = await self._build_placement(
+                symbol, side, order_type, size, price, sl, tps, cloid, range_percent, split_count, split_seed,
+                split_distribution, reduce_only, trail_percent, leg_size=leg_size)
+
             if not order_requests:
                 print(f"Account {self.account_id}: No valid orders to place after processing inputs.")
                 return {"status": "error", "message": "No valid orders to place."}
 
-            print(f"Account {self.account_id}: Sending order request(s): {order_requests}")
-            
-            # Using self.client.order for batch placement, assuming it takes List[OrderRequest]
-            # This was the structure used in the original snippet that was working for single orders.
-            # The Hyperliquid SDK's `order` method on the `Exchange` class takes:
-            # `orders: List[OrderRequest], grouping: Grouping`
-            # So we need to wrap `order_requests` if `self.client` is the `Exchange` instance.
-            # However, the ccxt wrapper `HyperliquidAsync` might expose `order` differently.
-            # The previous working version was `result = await self.client.order(order_requests)`
-            # where order_requests was a list containing a single dict.
-            # Let's assume the ccxt wrapper's `order` method can indeed take a list of these dicts.
-            
-            # If `self.client.order` is from the raw SDK `Exchange` class, it needs `grouping`.
-            # If it's a CCXT adaptation, it might simplify this.
-            # Given the context, `self.client` is `HyperliquidAsync` from `hyperliquid.ccxt.async_support.hyperliquid`
-            # CCXT typically uses `create_order` for single orders. For batch, it might be `create_orders` or a private method.
-            # Let's check for `create_orders` or fall back to `private_post_exchange` with the action.
-
-            result = None
-            if hasattr(self.client, 'create_orders') and callable(getattr(self.client, 'create_orders')) :
-                # This would be the ideal CCXT way if supported for Hyperliquid by the wrapper
-                # The structure of objects for create_orders needs to be CCXT standard.
-                # This is unlikely to match `order_requests` directly.
-                # For now, let's assume the direct `order` or `private_post_exchange` is what's intended.
-                print(f"Account {self.account_id}: `create_orders` found, but structure might mismatch. Sticking to `order` or private call.")
-
-
-            # The original code used `await self.client.order(order_requests)` where `order_requests` was a list of dicts.
-            # This implies `self.client.order` (from ccxt async_support wrapper) can handle this.
-            if hasattr(self.client, 'order') and callable(getattr(self.client, 'order')):
-                try:
-                    # This is the most likely path given previous successful single order placements.
-                    # The `order` method in `hyperliquid.py` (ccxt wrapper) seems to be a direct pass-through
-                    # to the `exchange.order` method of the underlying SDK, which expects the action format.
-                    action = {"type": "order", "orders": order_requests, "grouping": "normal"}
-                    print(f"Account {self.account_id}: Attempting batch order with action: {action}")
-                    result = await self.client.order(action) # Pass the full action structure
-                except Exception as e_order_action:
-                    print(f"Account {self.account_id}: Error calling self.client.order with action structure: {e_order_action}. Trying list of orders directly.")
-                    # Fallback: try sending the list of orders directly, if the wrapper handles it.
-                    # This was implied by the original `place_order` taking `order_requests` (a list)
-                    try:
-                        result = await self.client.order(order_requests)
-                    except Exception as e_order_list:
-                        print(f"Account {self.account_id}: Error calling self.client.order with list of orders: {e_order_list}.")
-                        raise # Re-raise the last error if both attempts fail
-
-            elif hasattr(self.client, 'private_post_exchange') and callable(getattr(self.client, 'private_post_exchange')):
-                 action = {"type": "order", "orders": order_requests, "grouping": "normal"}
-                 print(f"Account {self.account_id}: Attempting batch order with private_post_exchange and action: {action}")
-                 result = await self.client.private_post_exchange(params=action) # CCXT typically uses 'params' for the body
-            else:
-                print(f"Account {self.account_id}: Critical - client does not have a recognized batch order method ('order' or 'private_post_exchange').")
-                # Fallback: try placing only the main order if that's what was working before
-                if order_requests and main_order_req is order_requests[0]: # ensure main_order_req is the first
-                    print(f"Account {self.account_id}: Attempting to place only the main order as a fallback.")
-                    action_single = {"type": "order", "orders": [main_order_req], "grouping": "normal"}
-                    if hasattr(self.client, 'order') and callable(getattr(self.client, 'order')):
-                         result = await self.client.order(action_single)
-                    elif hasattr(self.client, 'private_post_exchange') and callable(getattr(self.client, 'private_post_exchange')):
-                         result = await self.client.private_post_exchange(params=action_single)
-                    else:
-                         return {"status": "error", "message": "No suitable method to place even a single order."}
-                else:
-                    return {"status": "error", "message": "No orders to place or no suitable batch order method."}
+            # Every leg is registered under the parent cloid before sending, so it can be found by tag
+            # and cancelled or modified in place
+            for req, wire in zip(order_requests, wire_orders):
+                self.order_store.register(req.cloid, symbol, cloid, *req.tags, wire=wire, meta=req.meta)
+            if entry_count > 1 or len(wire_orders) > MAX_ORDERS_PER_ACTION:
+                # Split ladders go out in chunked batches, pipelined, with one aggregated result
+                has_legs = len(wire_orders) > entry_count
+                result = await submit_chunked(self, wire_orders, tpsl_start=entry_count if has_legs else None)
+                print(f"Account {self.account_id}: Split order result: {result['status']} in {result['requests']} request(s).")
+                self._forget_rejected(order_requests, result['statuses'])
+                return result
+
+            # Main order, SL and all TPs go out as one signed exchange action (one round trip).
+            # "normalTpsl" lets the exchange link the SL/TP legs to the entry.
+            action = {
+                "type": "order",
+                "orders": wire_orders,
+                "grouping": "normalTpsl" if len(wire_orders) > 1 else "na",
+            }
+            print(f"Account {self.account_id}: Sending {len(wire_orders)} order(s) in one action.")
+            result = await self.submit_action(action)
 
             print(f"Account {self.account_id}: Order placement result: {result}")
+            if isinstance(result, dict) and result.get("status") == "err":
+                self._forget_rejected(order_requests, [{"error": result.get("response")}] * len(order_requests))
+            else:
+                self._forget_rejected(order_requests, response_statuses(result))
             return result
         except Exception as e:
+            for leg in self.order_store.group(cloid):
+                self.order_store.forget(leg)
             print(f"Account {self.account_id}: API error during place_order: {e}")
             import traceback
             traceback.print_exc()
             return {"status": "error", "message": str(e)}
 
+    async def _build_placement(self, symbol: str, side: str, order_type: str, size: float, price: float = None,
+                               sl: float = None, tps: list = None, cloid: str = None, range_percent: float = None,
+                               split_count: int = 1, split_seed: int = None, split_distribution: str = 'uniform',
+                               reduce_only: bool = False, trail_percent: float = None, reference_price: float = None,
+                               leg_size: float = None):
+        """
+        Build the order requests of one placement (entries first, then SL and TPs) and their wire orders.
+        reference_price stands in for the market price of market entries; leg_size (default size) sizes
+        the SL and TPs. Returns (requests, wires, entry count).
+        """
+        leg_size = leg_size or size
+        order_requests = []
+        main_is_buy = side.lower() == 'long'
+        
+        # Determine reference price for SL/TP calculations
+        reference_price_for_sl_tp = price # Default to entry price for limit orders
+        if order_type.lower() == 'market':
+            # For market orders, SL/TP should ideally be based on fill price.
+            # Fetch current market price as a proxy, unless the caller already knows it (armed orders).
+            current_market_price = reference_price or await self.get_market_price(symbol)
+            if current_market_price:
+                reference_price_for_sl_tp = current_market_price
+                print(f"Account {self.account_id}: Using fetched market price {reference_price_for_sl_tp} for SL/TP on market order.")
+            else:
+                print(f"Account {self.account_id}: Warning - Could not fetch market price for SL/TP on market order. SL/TP might be inaccurate or fail.")
+                # If `price` was passed (e.g. from chart click even for market), it might be used as a fallback.
+                if not reference_price_for_sl_tp: # if price was None
+                    print(f"Account {self.account_id}: SL/TP cannot be calculated for market order without a reference price.")
+                    # Do not proceed with SL/TP if no reference_price_for_sl_tp
+        
+        # 1. Construct Main Order
+        main_limit_px = None # Rounded to the market's precision only when the wire order is built
+        if order_type.lower() == 'limit':
+            if price is None:
+                raise ValueError("Price must be provided for limit orders.")
+            main_kind = 'limit'
+            main_limit_px = price
+        elif order_type.lower() == 'market':
+            main_kind = 'market' # Sent as an IOC limit bounded by the slippage price
+        else:
+            raise ValueError(f"Unsupported order_type: {order_type}")
+
+        main_order_req = OrderRequest(symbol, main_is_buy, reduce_only, main_kind, size, main_limit_px,
+                                      cloid=cloid, tags=("entry",))
+        
+        # Handle SL: Attach to main order via tp_sl_spec if possible
+        # Hyperliquid's `OrderRequest` can take a `tp_sl_spec` for the main order.
+        # This is for a single SL/TP attached to the main order.
+        # If multiple TPs are needed, they must be separate trigger orders.
+        # We will prioritize separate trigger orders for TPs for flexibility.
+        # SL can be a trigger order too, or attached if only one SL is used.
+        # For simplicity, let's try to attach SL to the main order if only SL is present (no TPs or only one TP that could also be in tp_sl_spec)
+
+        sl_spec_for_main_order = {}
+        if sl is not None and sl > 0 and reference_price_for_sl_tp is not None:
+            calculated_sl_price = 0.0
+            if main_is_buy: # Long position, SL is below entry
+                calculated_sl_price = reference_price_for_sl_tp * (1 - sl / 100.0)
+            else:  # Short position, SL is above entry
+                calculated_sl_price = reference_price_for_sl_tp * (1 + sl / 100.0)
+            
+            if calculated_sl_price > 0:
+                sl_spec_for_main_order = {
+                    "trigger_px": calculated_sl_price,
+                    "is_market": True, # SL typically triggers a market order
+                    "tpsl": "sl"
+                }
+                # main_order_req["tp_sl_spec"] = {"sl": sl_spec_for_main_order} # Old structure
+                # New structure: SL is a trigger order if not part of a combined tpSl on main order
+                # For Hyperliquid, if we want SL on the main order itself, it's part of a more complex `trigger` field within `order_type`
+                # or a separate `tp_sl_spec` field. The `tp_sl_spec` is simpler.
+                # Let's assume `tp_sl_spec` is for a single SL and/or a single TP.
+                # If we have multiple TPs, we must use separate trigger orders for TPs.
+                # We can still try to put SL on the main order.
+                # Putting the SL on the main order itself would make the main order a trigger order.
+                # Let's assume for now we make SL a separate trigger order for consistency with multiple TPs.
+                # Re-evaluating: The original code had `tp_sl_spec_dict` which implies it's possible.
+                # Let's try to use the `tp_sl_spec` field on the main order for SL.
+                # The `tp_sl_spec` in Hyperliquid is for stop-loss and take-profit that are *not* trigger orders themselves,
+                # but rather conditions on the main order.
+                # This is usually for exchanges that support OCO or SL/TP directly on the order.
+                # Hyperliquid's `OrderRequest` has `trigger: Optional[Trigger]`
+                # `Trigger` has `trigger_px`, `is_market`, `tpsl: Literal[\'tp\', \'sl\']`
+                # This means the main order itself can be a trigger order.
+                # This is not what we want for a simple SL on a non-trigger main order.
+
+                # Let's stick to creating SL as a separate trigger order if `reference_price_for_sl_tp` is valid.
+                # This makes it consistent with how multiple TPs are handled.
+                sl_trigger_order_req = OrderRequest(
+                    symbol,
+                    not main_is_buy, # SL order is opposite to main order to close
+                    True,
+                    'trigger',
+                    leg_size, # SL closes the full size
+                    trigger_px=calculated_sl_price,
+                    is_market=True, # SL triggers a market order to ensure fill
+                    tpsl="sl",
+                    cloid=derive_cloid(cloid, 'sl'),
+                    tags=("sl",),
+                    meta={"trail_percent": trail_percent, "reference_price": reference_price_for_sl_tp} if trail_percent else None,
+                )
+                order_requests.append(sl_trigger_order_req)
+
+
+        entry_requests = [main_order_req]
+        if split_count and split_count > 1:
+            # Range entry: the single entry becomes a ladder of splits; SL/TP legs still cover the full size
+            split_center = price if order_type.lower() == 'limit' else reference_price_for_sl_tp
+            if split_center is None:
+                raise ValueError("Range entry needs an entry price or a market price to split around.")
+            if split_seed is None:
+                split_seed = random.getrandbits(32)
+            tick_size, lot_size = self._tick_and_lot(symbol)
+            levels = None
+            book_ladder = split_distribution in BOOK_DISTRIBUTIONS and order_type.lower() == 'limit'
+            if book_ladder:
+                # Laid out against the resting liquidity on our side of the book
+                bids, asks = await self.get_order_book(symbol)
+                levels = bids if main_is_buy else asks
+            splits = generate_splits(split_center, range_percent or 0.0, split_count, size, order_type=order_type.lower(),
+                                     distribution=split_distribution, seed=split_seed,
+                                     tick_size=tick_size, lot_size=lot_size, is_buy=main_is_buy, levels=levels)
+            if not splits:
+                # Every split snapped to zero lots; the SL/TP legs alone would be a bracket with no entry
+                raise ValueError(f"Order size {size} is below the minimum lot size ({lot_size}).")
+            entry_requests = []
+            for i, (split_price, split_size) in enumerate(splits):
+                split_req = main_order_req.replace(sz=split_size, cloid=derive_cloid(cloid, 'e', i + 1))
+                if order_type.lower() == 'limit':
+                    split_req.limit_px = split_price
+                if book_ladder and split_distribution == 'post_only':
+                    split_req.tif = "Alo" # Rejected rather than filled if it would cross
+                entry_requests.append(split_req)
+            print(f"Account {self.account_id}: Range entry split into {len(entry_requests)} orders ({split_distribution}, seed={split_seed}).")
+        order_requests[0:0] = entry_requests # Entries first
+
+        # 2. Construct TP Orders (as separate trigger orders)
+        if tps and len(tps) > 0 and reference_price_for_sl_tp is not None:
+            order_requests.extend(self._build_tp_requests(symbol, main_is_buy, leg_size, reference_price_for_sl_tp, tps, cloid))
+
+        if not order_requests:
+            return [], [], 0
+        wire_orders = [self._order_to_wire(req, reference_price_for_sl_tp) for req in order_requests]
+        return order_requests, wire_orders, len(entry_requests)
+
+    def _forget_rejected(self, order_requests: list, statuses: list):
+        """Drop order store registrations for legs the exchange rejected."""
+        for req, status in zip(order_requests, statuses):
+            if isinstance(status, dict) and "error" in status:
+                self.order_store.forget(req.cloid)
+
+    def _build_tp_requests(self, symbol: str, main_is_buy: bool, size: float, reference_price: float,
+                           tps: list, parent_cloid: str) -> list:
+        """TP trigger requests closing size in equal parts at each tps profit_perc from reference_price."""
+        requests = []
+        num_tps = len(tps)
+        # Ensure total TP size does not exceed main order size.
+        # For simplicity, let's assume tps are for portions of the main order.
+        # A common strategy: each TP closes a fraction of the initial position.
+        tp_size_each = round(size / num_tps, 8) # Distribute size, round to sensible precision for size
+        if tp_size_each == 0 and size > 0 : # Avoid 0 size if main size is >0
+            print(f"Account {self.account_id}: Warning - TP size per order is 0 due to many TPs or small main size. Adjusting. This might lead to issues.")
+            # Potentially adjust logic: maybe first few TPs get slightly larger size, or error out.
+            # For now, we proceed, but this is a sign of potential issue with too many TPs for small size.
+
+
+        for i, tp_item in enumerate(tps):
+            profit_perc = tp_item.get('profit_perc')
+            if profit_perc is None or profit_perc <= 0:
+                print(f"Account {self.account_id}: Skipping TP {i+1} with invalid profit_perc: {tp_item}")
+                continue
+
+            calculated_tp_price = 0.0
+            if main_is_buy: # Long position, TP is above entry
+                calculated_tp_price = reference_price * (1 + profit_perc / 100.0)
+            else:  # Short position, TP is below entry
+                calculated_tp_price = reference_price * (1 - profit_perc / 100.0)
+
+            if calculated_tp_price <= 0:
+                print(f"Account {self.account_id}: Skipping TP {i+1} with invalid calculated price: {calculated_tp_price}")
+                continue
+
+            # TP order is a trigger limit order (common practice)
+            # Hyperliquid: "trigger": {"trigger_px": "...", "is_market": False, "tpsl": "tp", "limit_px": "..."}
+            # The `limit_px` inside trigger is the price for the limit order placed when trigger_px is hit.
+            # The top-level `limit_px` for the OrderRequest should be set for the triggered limit order.
+
+            tp_order_req = OrderRequest(
+                symbol,
+                not main_is_buy, # TP orders are opposite to main order
+                True,
+                'trigger',
+                tp_size_each,
+                calculated_tp_price, # This is the limit price for the order once triggered (fill at this price or better)
+                trigger_px=calculated_tp_price,
+                is_market=False,
+                tpsl="tp",
+                cloid=derive_cloid(parent_cloid, 'tp', i + 1),
+                tags=("tp", f"tp{i+1}"), # Order store tags; not sent
+            )
+            requests.append(tp_order_req)
+        return requests
+
+    def _probe_submit_path(self):
+        """
+        Work out which client method sends signed exchange actions. Introspection only, so no
+        failing HTTP requests; the answer is cached until the client object is replaced.
+        """
+        client = self.client
+        if self._submit_path is not None and self._submit_path_client is client:
+            return self._submit_path
+        path = None
+        if callable(getattr(client, 'sign_l1_action', None)) and callable(getattr(client, 'private_post_exchange', None)):
+            path = 'signed_exchange' # CCXT client: sign locally, POST /exchange
+        elif callable(getattr(client, 'order', None)):
+            path = 'order' # SDK-style client that signs and posts an action itself
+        self._submit_path = path
+        self._submit_path_client = client
+        return path
+
+    async def submit_action(self, action: dict):
+        """
+        Send one exchange action through the cached submission path.
+        If that path fails, the cache is dropped and the error is raised immediately rather than
+        trying other methods on the order path; the next call probes again.
+        """
+        path = self._probe_submit_path()
+        if path is None:
+            raise RuntimeError("Client has no supported exchange submission method.")
+        try:
+            lane, weight = action_lane(action), action_weight(action)
+            if path == 'signed_exchange':
+                payload = (await self.sign_actions([action]))[0]
+                return await self._request(lane, weight, self.client.private_post_exchange, payload)
+            return await self._request(lane, weight, self.client.order, action)
+        except Exception:
+            self._submit_path = None
+            raise
+
+    def sign_action(self, action: dict):
+        """
+        Sign an exchange action with the next nonce. Returns the /exchange request body, or None when
+        the client signs inside its own submit call (then the action can only be sent by submit_action).
+        """
+        if self._probe_submit_path() != 'signed_exchange':
+            return None
+        nonce = self.nonces.allocate(self.client.milliseconds())
+        self._signed_count += 1
+        return {"action": action, "nonce": nonce, "signature": self._l1_signer()(action, nonce)}
+
+    async def sign_actions(self, actions: list) -> list:
+        """
+        sign_action for several actions, with signing done in the signer pool so a burst of
+        signatures doesn't hold up the event loop. Nonces are reserved as one block, in order.
+        """
+        if self._probe_submit_path() != 'signed_exchange':
+            return [None] * len(actions)
+        first = self.nonces.allocate(self.client.milliseconds(), len(actions))
+        self._signed_count += len(actions)
+        signer = self._l1_signer()
+        signatures = await asyncio.gather(*(self.signer_pool.sign(signer, action, first + i)
+                                            for i, action in enumerate(actions)))
+        return [{"action": action, "nonce": first + i, "signature": signature}
+                for i, (action, signature) in enumerate(zip(actions, signatures))]
+
+    def _l1_signer(self):
+        """Signs with the client's key directly (parsed once) when it has one, else through the client."""
+        if self._signer_client is not self.client:
+            self._signer = L1Signer.for_client(self.client) or self.client.sign_l1_action
+            self._signer_client = self.client
+        return self._signer
+
+    async def prepare_order(self, symbol: str, side: str, order_type: str, size: float,
+                            price: float = None, leverage: int = 10, margin_mode: str = 'cross',
+                            sl: float = None, tps: list = None, cloid: str = None,
+                            range_percent: float = None, split_count: int = 1, split_seed: int = None,
+                            split_distribution: str = 'uniform', reduce_only: bool = False,
+                            trail_percent: float = None, reference_price: float = None) -> dict:
+        """
+        Do all the work of place_order except sending: set leverage, build and format every leg, and
+        sign the actions. reference_price (the trigger price of an armed order) stands in for the
+        market price. fire_prepared() then only has to register the legs and post.
+        """
+        symbol = self.resolve_symbol(symbol)
+        if cloid is None:
+            cloid = new_cloid()
+        await self.set_leverage(symbol, leverage, is_cross=(margin_mode.lower() == 'cross'))
+        order_requests, wire_orders, entry_count = await self._build_placement(
+            symbol, side, order_type, size, price, sl, tps, cloid, range_percent, split_count, split_seed,
+            split_distribution, reduce_only, trail_percent, reference_price=reference_price)
+        if not order_requests:
+            raise ValueError("No valid orders to place.")
+        tpsl_start = entry_count if len(wire_orders) > entry_count else None
+        actions = build_actions(wire_orders, tpsl_start=tpsl_start)
+        return {
+            "symbol": symbol,
+            "cloid": cloid,
+            "requests": order_requests,
+            "wires": wire_orders,
+            "actions": actions,
+            "legs_start": leg_actions_start(len(wire_orders), tpsl_start),
+            "payloads": await self.sign_actions(actions),
+            "signed_count": self._signed_count,
+            "signed_at": time.time(),
+        }
+
+    async def fire_prepared(self, prepared: dict, tick_ns: int = None) -> dict:
+        """
+        Send a placement built by prepare_order. Payloads still within the nonce window go out as signed;
+        the rest are re-signed first. tick_ns (time.perf_counter_ns() of the triggering tick) is used
+        to report tick_to_send_us, the local time from the tick to the first request being handed to the client.
+        """
+        symbol, cloid = prepared["symbol"], prepared["cloid"]
+        stale = (self._signed_count - prepared["signed_count"] >= self.PRESIGN_NONCE_HORIZON
+                 or time.time() - prepared["signed_at"] > self.PRESIGN_MAX_AGE)
+        payloads = prepared["payloads"]
+        if stale or None in payloads:
+            payloads = await self.sign_actions(prepared["actions"])
+        sent_ns = []
+
+        async def post(action, payload):
+            sent_ns.append(time.perf_counter_ns())
+            if payload is None:
+                return await self.submit_action(action)
+            return await self._request(action_lane(action), action_weight(action), self.client.private_post_exchange, payload)
+
+        # Registered before sending, as in place_order, so fills racing the ack still find their legs
+        for req, wire in zip(prepared["requests"], prepared["wires"]):
+            self.order_store.register(req.cloid, symbol, cloid, *req.tags, wire=wire, meta=req.meta)
+        started = time.perf_counter()
+        # SL/TP legs in actions of their own go out once the entries are acknowledged
+        legs_start = prepared.get("legs_start", len(payloads))
+        sends = list(zip(prepared["actions"], payloads))
+        responses = await asyncio.gather(*(post(a, p) for a, p in sends[:legs_start]), return_exceptions=True)
+        responses += await asyncio.gather(*(post(a, p) for a, p in sends[legs_start:]), return_exceptions=True)
+        latency = time.perf_counter() - started
+        statuses, errors = [], []
+        for action, response in zip(prepared["actions"], responses):
+            count = len(action["orders"])
+            if isinstance(response, Exception) or (isinstance(response, dict) and response.get("status") == "err"):
+                error = str(response) if isinstance(response, Exception) else response.get("response")
+                errors.append(error)
+                statuses.extend({"error": error} for _ in range(count))
+            else:
+                action_statuses = response_statuses(response)
+                statuses.extend(action_statuses + [None] * (count - len(action_statuses)))
+        self._forget_rejected(prepared["requests"], statuses)
+        status = "ok" if not errors else ("error" if len(errors) == len(responses) else "partial")
+        result = {"status": status, "statuses": statuses, "errors": errors, "latency": latency,
+                  "resigned": stale, "responses": responses}
+        if tick_ns is not None and sent_ns:
+            result["tick_to_send_us"] = (min(sent_ns) - tick_ns) / 1000.0
+        print(f"Account {self.account_id}: Armed order {cloid} fired: {status} in {latency * 1000:.0f} ms.")
+        return result
+
+    async def send_market_slice(self, symbol: str, is_buy: bool, size: float, cloid: str, parent: str,
+                                reduce_only: bool = False):
+        """
+        Send one market (bounded IOC) child order of a scheduled execution, registered under parent.
+        Leverage and the SL/TP legs are handled by the schedule's first slice, so this is a single
+        action with no other requests.
+        """
+        symbol = self.resolve_symbol(symbol)
+        reference_price = await self.get_market_price(symbol)
+        request = OrderRequest(symbol, is_buy, reduce_only, 'market', size, cloid=cloid, tags=("entry", "slice"))
+        wire = self._order_to_wire(request, reference_price)
+        self.order_store.register(cloid, symbol, parent, *request.tags, wire=wire)
+        try:
+            result = await self.submit_action({"type": "order", "orders": [wire], "grouping": "na"})
+        except Exception as e:
+            self.order_store.forget(cloid)
+            print(f"Account {self.account_id}: Market slice {cloid} failed: {e}")
+            return {"status": "error", "message": str(e)}
+        if isinstance(result, dict) and result.get("status") == "err":
+            self.order_store.forget(cloid)
+        else:
+            self._forget_rejected([request], response_statuses(result))
+        return result
+
+    def resolve_symbol(self, symbol: str) -> str:
+        """
+        Canonical market symbol for any accepted alias ("BTC", "BTC/USDT", "BTCUSDT" -> "BTC/USDC:USDC"),
+        from the market registry's symbol index. Symbols it doesn't know are returned unchanged.
+        """
+        return get_symbol_index(getattr(self.client, 'id', 'hyperliquid')).symbol(symbol)
+
+    def _market(self, symbol: str) -> dict:
+        try:
+            return self.client.market(self.resolve_symbol(symbol))
+        except Exception:
+            return self.client.market(self.client.coin_to_market_id(symbol)) # e.g. "BTC" -> "BTC/USDC:USDC"
+
+    def _template(self, symbol: str) -> OrderTemplate:
+        """symbol's OrderTemplate, built on first use and kept until the client object is replaced."""
+        if self._templates_client is not self.client:
+            self._templates = {}
+            self._templates_client = self.client
+        template = self._templates.get(symbol)
+        if template is None:
+            template = self._templates[symbol] = OrderTemplate(self.client, self._market(symbol))
+        return template
+
+    def _tick_and_lot(self, symbol: str):
+        """(tick size, lot size) for symbol from the loaded market, or (None, None) if unknown."""
+        try:
+            template = self._template(symbol)
+            return template.tick_size, template.lot_size
+        except Exception:
+            return None, None
+
+    def _format_price(self, symbol: str, px: float) -> str:
+        try:
+            return self._template(symbol).format_price(px)
+        except Exception:
+            return f"{px:.8f}".rstrip('0').rstrip('.')
+
+    def _format_size(self, symbol: str, sz: float) -> str:
+        try:
+            return self._template(symbol).format_size(sz)
+        except Exception:
+            return f"{sz:.8f}".rstrip('0').rstrip('.')
+
+    def _order_to_wire(self, order_req: OrderRequest, market_price: float = None) -> dict:
+        """Convert one of place_order's order requests to the exchange wire format."""
+        return order_req.to_wire(self._template(order_req.asset), market_price, self.MARKET_SLIPPAGE)
+
     async def set_leverage(self, symbol: str, leverage: int, is_cross: bool):
-        if not self.connected:
-            await self.connect()
         if not self.client:
             print(f"Account {self.account_id}: Client not initialized. Cannot set leverage.")
             return {"status": "error", "message": "Client not initialized."}
@@ -439,34 +779,284 @@ class TraderAccount:
             print(f"Account {self.account_id}: Error setting leverage: {e}")
             return {"status": "error", "message": str(e)}
 
-    async def cancel_all_orders(self):
-        """Cancels all open orders for the account."""
+    async def cancel_all_orders(self, open_orders: list = None):
+        """
+        Cancels all open orders for the account in one batched exchange action.
+        open_orders (CCXT orders) skips the REST lookup when the caller already has them.
+        """
         if not self.client or not self.is_connected:
             print(f"Account {self.account_id}: Not connected. Cannot cancel orders.")
             return {"status": "error", "message": "Not connected."}
 
         try:
-            # For Hyperliquid, the method to cancel orders might be specific to the client.
-            # This example assumes a direct method on the client for cancelling orders.
-            # If the SDK requires a specific call pattern, like `client.private_post_cancel_all`, that should be used.
+            if open_orders is None:
+                open_orders = self.order_store.open_orders() if self.order_store.live else await self._request(LANE_DATA, 20, self.client.fetch_open_orders)
+            if not open_orders:
+                return {"status": "ok", "message": "No open orders."}
+            cancels = [{"a": int(self._market(o['symbol'])['baseId']), "o": int(o['id'])} for o in open_orders]
+            print(f"Account {self.account_id}: Cancelling {len(cancels)} open order(s) in one action.")
+            return await self.submit_action({"type": "cancel", "cancels": cancels})
+        except Exception as e:
+            print(f"Account {self.account_id}: Error cancelling all orders: {e}")
+            return {"status": "error", "message": str(e)}
 
-            # The original code had a placeholder for canceling all orders.
-            # This is crucial for managing positions and risk.
-            # If orders are not canceled correctly, it might lead to unexpected behavior or losses.
+    async def refresh_positions(self) -> dict:
+        """Fetches open positions from REST into the order store; returns {symbol: position}."""
+        self.order_store.set_positions(await self._request(LANE_DATA, 2, self.client.fetch_positions))
+        return self.order_store.positions
 
-            # This example directly uses the client to cancel all orders, assuming such a method exists.
-            # The actual implementation might vary based on the SDK and how CCXT wraps it.
+    async def close_all_positions(self, symbol: str = None, max_age: float = 2.0):
+        """
+        Closes every open position (or only symbol's) with one batched reduce-only market action.
+        Reads positions from the order store when it is live (or snapshotted within max_age seconds),
+        else refreshes them from REST first.
+        """
+        if not self.client or not self.is_connected:
+            print(f"Account {self.account_id}: Not connected. Cannot close positions.")
+            return {"status": "error", "message": "Not connected."}
+
+        try:
+            if not self.order_store.positions_fresh(max_age):
+                await self.refresh_positions()
+            symbol = self.resolve_symbol(symbol) if symbol else None
+            positions = [p for s, p in self.order_store.positions.items() if symbol is None or s == symbol]
+            if not positions:
+                return {"status": "ok", "message": "No open positions."}
+            # Reference prices bound the IOC closes; served from the price cache when it is warm
+            prices = await asyncio.gather(*(self.get_market_price(p.symbol) for p in positions))
+            wire_orders, skipped = [], []
+            for position, market_price in zip(positions, prices):
+                if not market_price:
+                    skipped.append(position.symbol)
+                    continue
+                close_req = OrderRequest(position.symbol, position.side == 'short', True, 'market', position.contracts)
+                wire_orders.append(self._order_to_wire(close_req, market_price))
+            if not wire_orders:
+                return {"status": "error", "message": f"No price to close {', '.join(skipped)}."}
+            print(f"Account {self.account_id}: Closing {len(wire_orders)} position(s) in one action.")
+            result = await self.submit_action({"type": "order", "orders": wire_orders, "grouping": "na"})
+            if skipped:
+                print(f"Account {self.account_id}: Could not close {', '.join(skipped)}: no market price.")
+            return result
+        except Exception as e:
+            print(f"Account {self.account_id}: Error closing positions: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def cancel_by_cloid(self, symbol: str, cloids: list):
+        """Cancels this account's orders on symbol by client order id, in one exchange action."""
+        return await self._cancel_cloids([(symbol, c) for c in cloids])
 
-            # Example: result = await self.client.cancel_all_orders()
+    async def cancel_tagged(self, tag: str, parent: str = None, symbol: str = None):
+        """
+        Cancels every pending or open leg carrying tag ("entry", "sl", "tp", "tp1".."tp5") from the
+        order store's index, optionally only one parent order's or one symbol's, in one action.
+        """
+        symbol = self.resolve_symbol(symbol) if symbol else None
+        legs = [(s, c) for s, c in self.order_store.tagged_cloids(tag, parent) if symbol is None or s == symbol]
+        return await self._cancel_cloids(legs)
 
-            print(f"Account {self.account_id}: Cancelling all orders.")
-            # Placeholder result, the actual result would come from the client SDK
-            result = {"status": "success", "message": "All orders cancelled."}
+    async def cancel_tps(self, parent: str = None):
+        """Cancels all take-profit legs (or one parent order's) with one cancel-by-cloid request."""
+        return await self.cancel_tagged('tp', parent)
+
+    async def amend_tagged(self, tag: str, price: float, symbol: str = None, all_symbols: bool = False):
+        """
+        Moves every pending or open leg of symbol carrying tag (e.g. "sl", "tp2") to price with one
+        batchModify action. Legs are modified in place by cloid, so there is no cancel/replace round trip.
+        Without a symbol nothing is moved unless all_symbols is set: one price is rarely right for
+        the legs of every market.
+        """
+        if not symbol and not all_symbols:
+            return {"status": "error", "message": f"No symbol given; not moving {tag} orders on every symbol."}
+        symbol = self.resolve_symbol(symbol) if symbol else None
+        legs = [(s, c) for s, c in self.order_store.tagged_cloids(tag) if symbol is None or s == symbol]
+        return await self.amend_legs(legs, price, label=tag)
+
+    async def amend_legs(self, legs: list, price: float, label: str = "leg"):
+        """legs: [(symbol, cloid)] of registered legs. Moves them all to price in one batchModify action."""
+        if not self.client or not self.is_connected:
+            print(f"Account {self.account_id}: Not connected. Cannot amend orders.")
+            return {"status": "error", "message": "Not connected."}
+        try:
+            modifies = []
+            for leg_symbol, cloid in legs:
+                wire = self.order_store.leg_wire(cloid)
+                if wire is not None:
+                    modifies.append((cloid, self._reprice_wire(leg_symbol, wire, price)))
+            if not modifies:
+                return {"status": "ok", "message": f"No {label} orders to amend."}
+            print(f"Account {self.account_id}: Moving {len(modifies)} {label} order(s) to {price} in one action.")
+            result = await self.submit_action({"type": "batchModify",
+                                               "modifies": [{"oid": cloid, "order": wire} for cloid, wire in modifies]})
+            if isinstance(result, dict) and result.get("status") == "ok":
+                statuses = response_statuses(result) or [None] * len(modifies)
+                for (cloid, wire), status in zip(modifies, statuses):
+                    if not (isinstance(status, dict) and "error" in status):
+                        self.order_store.update_wire(cloid, wire)
             return result
         except Exception as e:
-            print(f"Account {self.account_id}: Error cancelling all orders: {e}")
+            print(f"Account {self.account_id}: Error amending {label} orders: {e}")
+            return {"status": "error", "message": str(e)}
+
+    def _reprice_wire(self, symbol: str, wire: dict, price: float) -> dict:
+        """Copy of a wire order moved to price: trigger legs move their trigger, limits their limit price."""
+        wire = dict(wire)
+        order_type = wire["t"]
+        if "trigger" in order_type:
+            trigger = dict(order_type["trigger"], triggerPx=self._format_price(symbol, price))
+            wire["t"] = {"trigger": trigger}
+            if trigger["isMarket"]:
+                price *= 1 + self.MARKET_SLIPPAGE if wire["b"] else 1 - self.MARKET_SLIPPAGE
+        wire["p"] = self._format_price(symbol, price)
+        return wire
+
+    async def reset_tps(self, tps: list, symbol: str = None):
+        """
+        Replaces the TP legs of every open position (or only symbol's) with fresh ones at the
+        given profit percentages from the position's entry price.
+        """
+        if not self.client or not self.is_connected:
+            print(f"Account {self.account_id}: Not connected. Cannot reset TPs.")
+            return {"status": "error", "message": "Not connected."}
+        try:
+            if not self.order_store.positions_fresh(2.0):
+                await self.refresh_positions()
+            symbol = self.resolve_symbol(symbol) if symbol else None
+            positions = [p for s, p in self.order_store.positions.items() if symbol is None or s == symbol]
+            cancel = await self.cancel_tagged('tp', symbol=symbol)
+            requests, wire_orders = [], []
+            for position in positions:
+                parent = new_cloid()
+                legs = self._build_tp_requests(position.symbol, position.side == 'long', position.contracts,
+                                               position.entry_price, tps or [], parent)
+                for req in legs:
+                    wire = self._order_to_wire(req)
+                    self.order_store.register(req.cloid, position.symbol, parent, *req.tags, wire=wire)
+                    requests.append(req)
+                    wire_orders.append(wire)
+            if not requests:
+                return {"status": "ok", "cancel": cancel, "message": "No TPs to place."}
+            print(f"Account {self.account_id}: Placing {len(wire_orders)} new TP order(s) in one action.")
+            result = await self.submit_action({"type": "order", "orders": wire_orders, "grouping": "na"})
+            self._forget_rejected(requests, response_statuses(result))
+            return {"status": "ok", "cancel": cancel, "place": result}
+        except Exception as e:
+            print(f"Account {self.account_id}: Error resetting TPs: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def _cancel_cloids(self, legs: list):
+        """legs: [(symbol, cloid)]. One cancelByCloid action for all of them, across symbols."""
+        if not self.client or not self.is_connected:
+            print(f"Account {self.account_id}: Not connected. Cannot cancel orders.")
+            return {"status": "error", "message": "Not connected."}
+        if not legs:
+            return {"status": "ok", "message": "Nothing to cancel."}
+        try:
+            cancels = [{"asset": int(self._market(symbol)['baseId']), "cloid": cloid} for symbol, cloid in legs]
+            print(f"Account {self.account_id}: Cancelling {len(cancels)} order(s) by cloid in one action.")
+            result = await self.submit_action({"type": "cancelByCloid", "cancels": cancels})
+            for (_, cloid), status in zip(legs, response_statuses(result)):
+                if status == "success":
+                    self.order_store.forget(cloid)
+            return result
+        except Exception as e:
+            print(f"Account {self.account_id}: Error cancelling orders by cloid: {e}")
             return {"status": "error", "message": str(e)}
 
-    async def move_sl_to_previous_tp(self, tp_index):
-        """Move SL to the previous TP when a TP is hit."""
-        print(f"Account {self.account_id}: move_sl_to_previous_tp called (not implemented yet).")
+    def _build_ws(self):
+        return HyperliquidWs({'walletAddress': self.api_key, 'privateKey': self.api_secret})
+
+    async def listen_order_updates(self, callback):
+        """
+        Streams this account's order updates and fills from the user-events WebSocket until cancelled.
+        callback(update) receives {"type": "order" | "fill", "data": <CCXT order or trade>}, plus
+        {"type": "resync"} after the stream recovers from a drop, when events may have been missed.
+        All listeners on the account share one subscription.
+        """
+        self._update_listeners.append(callback)
+        try:
+            if self._update_task is None or self._update_task.done():
+                self._update_task = asyncio.ensure_future(self._run_user_events())
+            await asyncio.shield(self._update_task)
+        finally:
+            self._update_listeners.remove(callback)
+            if not self._update_listeners and self._update_task and not self._update_task.done():
+                self._update_task.cancel()
+
+    async def _run_user_events(self):
+        await asyncio.gather(self._pump_user_events('order'), self._pump_user_events('fill'))
+
+    async def _pump_user_events(self, kind: str):
+        if self.ws is None:
+            self.ws = self._build_ws()
+        attempt = 0
+        while True:
+            try:
+                # CCXT returns only the updates that arrived since the previous call
+                if kind == 'order':
+                    items = await self.ws.watch_orders(params={'user': self.api_key})
+                else:
+                    items = await self.ws.watch_my_trades(params={'user': self.api_key})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = self.connection_manager.backoff_delay(attempt)
+                attempt += 1
+                print(f"Account {self.account_id}: {kind} stream error: {e}. Retrying in {delay:.1f}s.")
+                await asyncio.sleep(delay)
+                continue
+            updates = [{"type": kind, "data": item} for item in items]
+            if attempt:
+                # Back after a drop: events may have been missed, so listeners holding state should reload
+                updates.insert(0, {"type": "resync", "data": {"stream": kind}})
+                attempt = 0
+            for update in updates:
+                for listener in list(self._update_listeners):
+                    try:
+                        listener(update)
+                    except Exception as e:
+                        print(f"Account {self.account_id}: Order update listener failed: {e}")
+
+    def _store_position(self, symbol: str):
+        """Position from the order store, whether symbol is given as a coin ("BTC") or market symbol."""
+        position = self.order_store.position(self.resolve_symbol(symbol))
+        if position is None:
+            try:
+                position = self.order_store.position(self._market(symbol)['symbol'])
+            except Exception:
+                pass
+        return position
+
+    async def move_sl_to_previous_tp(self, tp_index: int, parent: str = None, symbol: str = None):
+        """
+        TP tp_index (1-based) of parent has filled: move the SL of the remaining position to the
+        previous TP's price, or to breakeven (the entry price) after TP1, with a single modify.
+        """
+        if parent is None:
+            print(f"Account {self.account_id}: move_sl_to_previous_tp needs the parent order's cloid.")
+            return {"status": "error", "message": "No parent order given."}
+        entry_wire = self.order_store.leg_wire(parent)
+        sl_cloid = derive_cloid(parent, 'sl')
+        sl_leg = self.order_store.leg(sl_cloid)
+        if sl_leg is not None:
+            symbol = sl_leg['symbol']
+            legs = [(symbol, sl_cloid)]
+        else:
+            # TPs placed by reset_tps have their own parent; fall back to the symbol's open SL legs
+            legs = [(s, c) for s, c in self.order_store.tagged_cloids('sl') if s == symbol] if symbol else []
+        if not legs:
+            print(f"Account {self.account_id}: No open SL to move after TP{tp_index}.")
+            return {"status": "ok", "message": "No open SL."}
+
+        if tp_index <= 1:
+            position = self._store_position(symbol)
+            target = position.entry_price if position and position.entry_price else \
+                (float(entry_wire['p']) if entry_wire else None)
+        else:
+            previous = self.order_store.leg_wire(derive_cloid(parent, 'tp', tp_index - 1))
+            target = float(previous['t']['trigger']['triggerPx']) if previous else None
+        if target is None:
+            print(f"Account {self.account_id}: No price to move the SL to after TP{tp_index}.")
+            return {"status": "error", "message": "No target price."}
+        print(f"Account {self.account_id}: TP{tp_index} filled; moving SL to {target}.")
+        return await self.amend_legs(legs, target, label="sl")
@@ -2,10 +2,15 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from ui.hyperliquid_sniper import HyperliquidSniper
+from core.engine import engine
+from core.signer import signer_pool
 
 def main():
     print("Starting Hyperliquid Sniper UI...")
     app = QApplication(sys.argv)
+    engine.start() # Trading coroutines run on the engine thread, alongside the Qt loop
+    app.aboutToQuit.connect(engine.stop)
+    app.aboutToQuit.connect(signer_pool.shutdown)
     window = HyperliquidSniper()
     window.show()
     sys.exit(app.exec())
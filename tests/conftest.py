@@ -0,0 +1,46 @@
+import pytest
+from core.trader import TraderAccount
+
+class FakeExchange:
+    """Stands in for the CCXT client: records every POST /exchange."""
+    def __init__(self, fail=False):
+        self.posts = []
+        self.fail = fail
+    def market(self, symbol):
+        if symbol != 'BTC/USDC:USDC':
+            raise KeyError(symbol)
+        return {'symbol': 'BTC/USDC:USDC', 'baseId': '0'}
+    def coin_to_market_id(self, coin):
+        return coin + '/USDC:USDC'
+    def price_to_precision(self, symbol, px):
+        return str(round(px, 1))
+    def amount_to_precision(self, symbol, sz):
+        return str(round(sz, 5))
+    def milliseconds(self):
+        return 1700000000000
+    def sign_l1_action(self, action, nonce, vault_address=None):
+        return {'r': '0x1', 's': '0x2', 'v': 27}
+    async def private_post_exchange(self, request):
+        self.posts.append(request)
+        if self.fail:
+            raise ConnectionError('exchange unreachable')
+        return {'status': 'ok'}
+
+def make_trader(client):
+    trader = TraderAccount('key', 'secret', 1)
+    trader.client = client
+    trader.is_connected = True
+    return trader
+
+@pytest.fixture
+def exchange_trader():
+    """A connected TraderAccount whose client is a FakeExchange."""
+    return make_trader(FakeExchange())
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter():
+    """Each test starts with full rate-limit buckets."""
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
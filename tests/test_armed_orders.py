@@ -0,0 +1,65 @@
+import asyncio
+from core.armed_orders import ArmedOrderBook
+from tests.conftest import FakeExchange, make_trader
+
+class FakePrices:
+    def __init__(self, mid=None):
+        self.listeners = []
+        self.mid = mid
+    def subscribe(self, symbol):
+        pass
+    def get_mid(self, symbol, max_age=None):
+        return self.mid
+
+def order(side='long', **kwargs):
+    return dict({'symbol': 'BTC', 'side': side, 'order_type': 'market', 'size': 0.1, 'sl': 2}, **kwargs)
+
+def test_crossed_triggers_fire_presigned_actions_on_every_account():
+    traders = [make_trader(FakeExchange()) for _ in range(3)]
+    for i, trader in enumerate(traders):
+        trader.account_id = i + 1
+    book = ArmedOrderBook(prices=FakePrices(mid=100.0))
+    book.start()
+    fired = []
+    book.listeners.append(fired.append)
+    async def run():
+        breakout = await book.arm('BTC', 101.0, [(t, order()) for t in traders])
+        far = await book.arm('BTC', 110.0, [(traders[0], order())])
+        dip = await book.arm('BTC', 95.0, [(traders[0], order('short'))])
+        assert (breakout.above, dip.above) == (True, False)
+        signed = [prepared['payloads'][0] for _, prepared in breakout.legs]
+        assert all(t.client.posts == [] for t in traders)  # Nothing is sent while armed
+        for listener in book.prices.listeners:
+            listener('BTC', 100.5)
+            listener('BTC', 101.2)
+        await asyncio.gather(*book._tasks)
+        return breakout, far, dip, signed
+    breakout, far, dip, signed = asyncio.run(run())
+    assert fired == [breakout]
+    assert set(book.orders) == {far.armed_id, dip.armed_id}
+    for trader, payload in zip(traders, signed):
+        assert trader.client.posts == [payload]  # Sent exactly as signed at arm time
+        entry = payload['action']['orders'][0]
+        assert entry['t'] == {'limit': {'tif': 'Ioc'}} and entry['p'] == str(round(101.0 * 1.05, 1))
+    assert all(r['status'] == 'ok' and r['tick_to_send_us'] >= 0 for r in breakout.result.values())
+    assert book.latency_stats()['count'] == 3
+
+def test_disarmed_orders_never_fire_and_stale_signatures_are_renewed(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    book = ArmedOrderBook(prices=FakePrices())
+    book.start()
+    async def run():
+        kept = await book.arm('BTC', 99.0, [(trader, order('short'))])
+        dropped = await book.arm('BTC', 98.0, [(trader, order('short'))])
+        assert not kept.above  # No quote yet: shorts wait for the price to fall
+        assert book.disarm(dropped.armed_id) and not book.disarm(dropped.armed_id)
+        trader._signed_count += trader.PRESIGN_NONCE_HORIZON
+        for listener in book.prices.listeners:
+            listener('BTC', 97.0)
+        await asyncio.gather(*book._tasks)
+        return kept
+    kept = asyncio.run(run())
+    assert len(client.posts) == 1
+    assert kept.result[trader.account_id]['resigned']
+    assert client.posts[0]['action'] == kept.legs[0][1]['actions'][0]
+    assert trader.order_store.group(kept.legs[0][1]['cloid'])
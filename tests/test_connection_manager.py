@@ -0,0 +1,63 @@
+import asyncio
+from core.connection_manager import ConnectionManager
+
+class FakeAccount:
+    def __init__(self, account_id, fail_connects=0, fail_ping=False):
+        self.account_id = account_id
+        self.is_connected = False
+        self.fail_connects = fail_connects
+        self.fail_ping = fail_ping
+        self.connect_calls = []
+        self.connection_manager = None
+    async def connect(self, force_new=False):
+        self.connect_calls.append(force_new)
+        if self.fail_connects > 0:
+            self.fail_connects -= 1
+            self.is_connected = False
+            return
+        self.is_connected = True
+        self.connection_manager.mark_up(self.account_id)
+    async def ping(self):
+        if self.fail_ping:
+            raise ConnectionError('reset by peer')
+
+def test_backoff_is_jittered_and_capped():
+    manager = ConnectionManager(base_delay=0.5, max_delay=4.0, rng=lambda: 1.0)
+    assert manager.backoff_delay(1) == 1.0
+    assert manager.backoff_delay(10) == 4.0
+    manager = ConnectionManager(base_delay=0.5, max_delay=4.0, rng=lambda: 0.25)
+    assert manager.backoff_delay(2) == 0.5
+
+def test_prewarm_all_connects_and_reports_health():
+    manager = ConnectionManager()
+    accounts = [FakeAccount(i) for i in range(1, 4)]
+    health = asyncio.run(manager.prewarm_all(accounts))
+    assert all(h['state'] == 'up' for h in health.values())
+    assert all(h['last_latency'] is not None for h in health.values())
+    assert all(a.connect_calls == [False] for a in accounts)
+
+def test_reconnect_retries_in_background_with_fresh_client():
+    manager = ConnectionManager(base_delay=0.001, max_delay=0.001)
+    account = FakeAccount(1, fail_connects=2)
+    manager.register(account)
+    async def run():
+        task = manager.request_reconnect(account)
+        assert manager.request_reconnect(account) is task  # Deduplicated
+        await task
+    asyncio.run(run())
+    assert account.is_connected
+    assert account.connect_calls == [False, True, True]
+    assert manager.get_health(1).state == 'up'
+
+def test_failed_ping_marks_account_down():
+    manager = ConnectionManager(base_delay=0.001, max_delay=0.001)
+    account = FakeAccount(1, fail_ping=True)
+    async def run():
+        manager.register(account)
+        account.is_connected = True
+        ok = await manager.ping(account)
+        assert not ok
+        assert not manager.is_healthy(account)
+        await manager._reconnect_tasks[1]
+    asyncio.run(run())
+    assert account.is_connected
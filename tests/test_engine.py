@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from core.engine import EngineLoop
+
+def test_engine_runs_coroutines_on_its_own_thread():
+    engine = EngineLoop(name='test-engine')
+    async def where():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+    try:
+        assert engine.submit(where()).result(timeout=2) == 'test-engine'
+        assert not engine.in_engine_thread()
+    finally:
+        engine.stop()
+    assert not engine.running
+
+def test_engine_submit_from_many_threads():
+    engine = EngineLoop()
+    results = []
+    async def work(i):
+        return i * 2
+    def submit(i):
+        results.append(engine.submit(work(i)).result(timeout=2))
+    try:
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        engine.stop()
+    assert sorted(results) == [i * 2 for i in range(8)]
+
+def test_engine_stop_cancels_pending_tasks():
+    engine = EngineLoop()
+    future = engine.submit(asyncio.sleep(60))
+    engine.stop()
+    assert future.cancelled()
@@ -0,0 +1,53 @@
+import asyncio
+from core.copy_trading import CopyTradingManager
+from core.equity_snapshot import EquitySnapshot
+
+class EquityAccount:
+    def __init__(self, account_id, equity):
+        self.account_id = account_id
+        self.equity = equity
+        self.balance_calls = 0
+        self.orders = []
+    async def get_account_equity(self):
+        self.balance_calls += 1
+        await asyncio.sleep(0.01)
+        return self.equity
+    async def place_order(self, **kwargs):
+        self.orders.append(kwargs)
+        return {'status': 'ok'}
+
+ORDER = {'symbol': 'BTC', 'side': 'long', 'order_type': 'limit', 'size': 2.0, 'price': 100.0}
+
+def test_snapshot_refreshes_concurrently_and_caches():
+    now = [0.0]
+    snapshot = EquitySnapshot(ttl=5.0, clock=lambda: now[0])
+    accounts = [EquityAccount(i, 1000.0 * i) for i in range(1, 4)]
+    async def run():
+        first = await snapshot.get(accounts)
+        second = await snapshot.get(accounts)
+        return first, second
+    first, second = asyncio.run(run())
+    assert first == second == {1: 1000.0, 2: 2000.0, 3: 3000.0}
+    assert all(a.balance_calls == 1 for a in accounts)
+    now[0] = 6.0
+    assert snapshot.peek(1) is None
+    asyncio.run(snapshot.get(accounts))
+    assert all(a.balance_calls == 2 for a in accounts)
+
+def test_ratio_sizing_scales_by_subscriber_equity():
+    master = EquityAccount(1, 1000.0)
+    subs = [EquityAccount(2, 500.0), EquityAccount(3, 3000.0), EquityAccount(4, None)]
+    manager = CopyTradingManager(master, subs, sizing='ratio', equities=EquitySnapshot())
+    result = asyncio.run(manager.execute(ORDER))
+    assert master.orders[0]['size'] == 2.0
+    assert subs[0].orders[0]['size'] == 1.0
+    assert subs[1].orders[0]['size'] == 6.0
+    assert subs[2].orders == []  # No equity, no order
+    assert len(result['legs']) == 3
+
+def test_notional_sizing_per_account():
+    subs = [EquityAccount(2, 0), EquityAccount(3, 0)]
+    manager = CopyTradingManager(EquityAccount(1, 0), subs, sizing='notional', fixed_notional={2: 500.0, 3: 1000.0})
+    asyncio.run(manager.execute(ORDER, include_master=False))
+    assert subs[0].orders[0]['size'] == 5.0
+    assert subs[1].orders[0]['size'] == 10.0
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from core.exec_scheduler import ExecutionScheduler, TimerWheel
+from core.order_store import OrderStore
+
+class SliceAccount:
+    """Acks every child; fill_ratio of it filled in the ack, or nothing until the stream says so (ack_fills=False)."""
+    def __init__(self, account_id, fill_ratio=1.0, ack_fills=True):
+        self.account_id = account_id
+        self.order_store = OrderStore(self)
+        self.fill_ratio = fill_ratio
+        self.ack_fills = ack_fills
+        self.sent = []  # (time, cloid, size, first)
+    def _ack(self, cloid, size, first):
+        self.sent.append((time.monotonic(), cloid, size, first))
+        self.order_store.register(cloid, 'BTC', 'parent', 'entry')
+        status = {'filled': {'totalSz': str(size * self.fill_ratio)}} if self.ack_fills else {'resting': {'oid': len(self.sent)}}
+        return {'status': 'ok', 'response': {'data': {'statuses': [status]}}}
+    async def place_order(self, **order):
+        self.first_order = order
+        return self._ack(order['cloid'], order['size'], True)
+    async def send_market_slice(self, symbol, is_buy, size, cloid, parent, reduce_only=False):
+        return self._ack(cloid, size, False)
+
+def order(size=1.0):
+    return {'symbol': 'BTC', 'side': 'long', 'order_type': 'market', 'size': size, 'sl': 2, 'cloid': '0x' + 'd' * 32}
+
+def run_until(scheduler, predicate, timeout=2.0):
+    async def wait():
+        started = time.monotonic()
+        while not predicate() and time.monotonic() - started < timeout:
+            await asyncio.sleep(0.005)
+    return wait()
+
+def test_twap_spreads_slices_over_the_horizon():
+    account = SliceAccount(1)
+    scheduler = ExecutionScheduler(TimerWheel(tick=0.01))
+    async def run():
+        group = scheduler.submit([(account, order())], mode='twap', horizon=0.2, slices=4)
+        await run_until(scheduler, lambda: scheduler.status(group)[0]['status'] != 'running')
+        return scheduler.status(group)[0]
+    summary = asyncio.run(run())
+    assert summary['status'] == 'done' and summary['sent'] == 4
+    assert [round(size, 9) for _, _, size, _ in account.sent] == [0.25] * 4
+    assert account.first_order['leg_size'] == 1.0 and account.sent[0][3]  # Legs for the full size, once
+    gaps = [b[0] - a[0] for a, b in zip(account.sent, account.sent[1:])]
+    assert all(0.04 <= gap < 0.1 for gap in gaps)
+
+def test_twap_makes_up_short_fills_with_later_slices():
+    account = SliceAccount(1, fill_ratio=0.5)
+    scheduler = ExecutionScheduler(TimerWheel(tick=0.01))
+    async def run():
+        group = scheduler.submit([(account, order())], mode='twap', horizon=0.04, slices=2)
+        await run_until(scheduler, lambda: scheduler.status(group)[0]['status'] != 'running')
+        return scheduler.status(group)[0]
+    summary = asyncio.run(run())
+    sizes = [size for _, _, size, _ in account.sent]
+    assert sizes == [0.5, 0.75, 0.375]  # Second slice takes the unfilled half; one catch-up slice after
+    assert summary['status'] == 'done' and summary['sent'] == 3
+
+def test_iceberg_refills_on_fills_from_the_stream_and_cancels_midway():
+    account = SliceAccount(1, ack_fills=False)
+    scheduler = ExecutionScheduler(TimerWheel(tick=0.01))
+    def close(cloid, filled):
+        account.order_store.apply({'type': 'order', 'data': {'id': cloid, 'clientOrderId': cloid, 'symbol': 'BTC',
+                                                             'status': 'closed', 'filled': filled}})
+    async def run():
+        group = scheduler.submit([(account, order())], mode='iceberg', slices=4)
+        await asyncio.sleep(0.02)
+        assert len(account.sent) == 1  # Nothing more until the child fills
+        close(account.sent[0][1], 0.25)
+        await asyncio.sleep(0.02)
+        assert len(account.sent) == 2
+        assert scheduler.cancel(group) == 1
+        close(account.sent[1][1], 0.25)
+        await asyncio.sleep(0.02)
+        return scheduler.status(group)[0]
+    summary = asyncio.run(run())
+    assert len(account.sent) == 2
+    assert summary['status'] == 'cancelled' and summary['filled'] == 0.5
+
+def test_hundreds_of_schedules_share_one_wheel():
+    accounts = [SliceAccount(i) for i in range(300)]
+    wheel = TimerWheel(tick=0.01)
+    scheduler = ExecutionScheduler(wheel)
+    async def run():
+        group = scheduler.submit([(a, order()) for a in accounts], mode='twap', horizon=0.1, slices=5)
+        started = time.process_time()
+        await run_until(scheduler, lambda: all(s['status'] == 'done' for s in scheduler.status(group)))
+        return scheduler.status(group), time.process_time() - started
+    statuses, cpu = asyncio.run(run())
+    assert all(s['status'] == 'done' and s['sent'] == 5 for s in statuses)
+    assert all(len(a.sent) == 5 for a in accounts)
+    assert cpu < 1.0
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from core.copy_trading import CopyTradingManager
+from core.fanout import FanoutExecutor
+from core.order_store import OrderStore
+from utils.helpers import derive_cloid, order_cloids
+
+class SlowAccount:
+    def __init__(self, account_id, delay=0.05, result=None, fail=False):
+        self.account_id = account_id
+        self.delay = delay
+        self.result = result or {'status': 'ok'}
+        self.fail = fail
+        self.orders = []
+        self.cancels = []
+    async def cancel_by_cloid(self, symbol, cloids):
+        self.cancels.append((symbol, cloids))
+        return {'status': 'ok'}
+    async def place_order(self, **kwargs):
+        self.orders.append(kwargs)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError('rejected')
+        return self.result
+
+ORDER = {'symbol': 'BTC', 'side': 'long', 'order_type': 'market', 'size': 1}
+
+def test_fanout_to_ten_accounts_takes_one_round_trip():
+    master = SlowAccount(1)
+    subs = [SlowAccount(i) for i in range(2, 11)]
+    manager = CopyTradingManager(master, subs)
+    started = time.perf_counter()
+    result = asyncio.run(manager.execute(ORDER))
+    assert time.perf_counter() - started < 0.05 * 3
+    assert result['status'] == 'ok'
+    assert [leg['account_id'] for leg in result['legs']] == list(range(1, 11))
+    assert result['legs'][0]['role'] == 'master'
+    assert all(leg['ack_latency'] >= 0.05 for leg in result['legs'])
+
+def test_parallelism_is_bounded():
+    accounts = [SlowAccount(i, delay=0.02) for i in range(6)]
+    executor = FanoutExecutor(max_parallel=2)
+    result = asyncio.run(executor.run(None, [(a, ORDER) for a in accounts]))
+    send_latencies = sorted(leg['send_latency'] for leg in result['legs'])
+    assert send_latencies[2] >= 0.02  # Third leg waited for a slot
+
+def test_master_failure_holds_queued_subscribers_and_cancels_sent_ones():
+    master = SlowAccount(1, delay=0.01, result={'status': 'error', 'message': 'margin'})
+    subs = [SlowAccount(i, delay=0.05) for i in range(2, 5)]
+    executor = FanoutExecutor(max_parallel=2)  # Master and account 2 in flight; 3 and 4 queued
+    order = dict(ORDER, cloid='0x' + 'a' * 32, tps=[{'profit_perc': 1}])
+    result = asyncio.run(executor.run((master, order), [(sub, order) for sub in subs]))
+    assert result['status'] == 'error'
+    assert [leg['status'] for leg in result['legs']] == ['error', 'sent_then_cancelled', 'cancelled', 'cancelled']
+    assert subs[0].orders and not subs[1].orders and not subs[2].orders  # The in-flight send was not interrupted
+    legs = [derive_cloid(order['cloid'], 'sl'), derive_cloid(order['cloid'], 'tp', 1)]
+    assert subs[0].cancels == [('BTC', [order['cloid']]), ('BTC', legs)]  # The entry first, then its SL and TP
+    assert result['legs'][1]['cancel'] == [{'status': 'ok'}, {'status': 'ok'}]
+
+def _statuses(*statuses):
+    return {'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': list(statuses)}}}
+
+def test_a_filled_subscriber_leg_keeps_its_position_and_legs_when_the_master_fails():
+    master = SlowAccount(1, delay=0.01, fail=True)
+    sub = SlowAccount(2, delay=0.05, result=_statuses({'filled': {'totalSz': '1', 'avgPx': '100', 'oid': 7}},
+                                                      {'resting': {'oid': 8}}))
+    order = dict(ORDER, cloid='0x' + 'd' * 32, sl=2)
+    result = asyncio.run(FanoutExecutor().run((master, order), [(sub, order)]))
+    assert result['legs'][1]['status'] == 'filled_not_cancellable'
+    assert sub.cancels == [('BTC', [order['cloid']])]  # The SL is left protecting the position
+
+def test_a_resting_entry_that_fills_before_its_cancel_is_reported_filled():
+    class FilledMeanwhile(SlowAccount):
+        async def cancel_by_cloid(self, symbol, cloids):
+            self.cancels.append((symbol, cloids))
+            return {'status': 'ok', 'response': {'type': 'cancel', 'data': {'statuses': [
+                {'error': 'Order was never placed, already canceled, or filled.'}]}}}
+    master = SlowAccount(1, delay=0.01, fail=True)
+    sub = FilledMeanwhile(2, delay=0.05, result=_statuses({'resting': {'oid': 7}}))
+    order = dict(ORDER, cloid='0x' + 'e' * 32, order_type='limit', price=100.0)
+    result = asyncio.run(FanoutExecutor().run((master, order), [(sub, order)]))
+    assert result['legs'][1]['status'] == 'filled_not_cancellable' and len(sub.cancels) == 1
+
+def test_subscriber_legs_without_a_cloid_get_one_to_cancel_by():
+    master = SlowAccount(1, delay=0.01, fail=True)
+    sub = SlowAccount(2, delay=0.05)
+    result = asyncio.run(FanoutExecutor().run((master, ORDER), [(sub, ORDER)]))
+    assert result['legs'][1]['status'] == 'sent_then_cancelled'
+    assert sub.orders[0]['cloid'] in sub.cancels[0][1] and 'cloid' not in ORDER
+
+def test_pair_map_applies_to_subscriber_legs():
+    subs = [SlowAccount(2, delay=0), SlowAccount(3, delay=0)]
+    manager = CopyTradingManager(SlowAccount(1, delay=0), subs, pair_map={3: 'ETH'})
+    asyncio.run(manager.execute(ORDER))
+    assert subs[0].orders[0]['symbol'] == 'BTC'
+    assert subs[1].orders[0]['symbol'] == 'ETH'
+
+def test_subscriber_copies_are_plain_dicts_of_the_set_fields():
+    manager = CopyTradingManager(SlowAccount(1), [SlowAccount(2)], pair_map={2: 'ETH'})
+    (_, leg), = manager.build_subscriber_orders(dict(ORDER, cloid='0x' + 'f' * 32))
+    assert type(leg) is dict and leg == dict(ORDER, symbol='ETH', cloid=derive_cloid('0x' + 'f' * 32, 2))
+
+def test_links_survive_reconfiguring_and_are_pruned_when_their_group_closes():
+    class Master(SlowAccount):
+        def __init__(self, account_id):
+            super().__init__(account_id, delay=0)
+            self.order_store = OrderStore(self)
+    master = Master(1)
+    manager = CopyTradingManager(master, [SlowAccount(2, delay=0)])
+    cloid = '0x' + 'b' * 32
+    asyncio.run(manager.execute(dict(ORDER, cloid=cloid, tps=[{'profit_perc': 1}])))
+    manager.configure(master, [SlowAccount(3, delay=0)], pair_map={3: 'ETH'}, sizing='copy')
+    assert len(manager.linked_cloids) == 3  # Entry, SL and TP, kept across the update
+    for i, leg in enumerate(order_cloids(cloid, 1, 1)):
+        master.order_store.register(leg, 'BTC', cloid)
+        master.order_store.upsert_order({'id': i, 'clientOrderId': leg, 'status': 'open'})
+    master.order_store.upsert_order({'id': 0, 'clientOrderId': cloid, 'status': 'closed'})
+    assert cloid in manager.linked_cloids  # SL and TP still open
+    master.order_store.upsert_order({'id': 1, 'clientOrderId': derive_cloid(cloid, 'sl'), 'status': 'canceled'})
+    master.order_store.upsert_order({'id': 2, 'clientOrderId': derive_cloid(cloid, 'tp', 1), 'status': 'canceled'})
+    assert manager.linked_cloids == {}  # No running loop here, so no retention delay
+
+def test_master_rejection_unlinks_the_order():
+    manager = CopyTradingManager(SlowAccount(1, delay=0, fail=True), [SlowAccount(2, delay=0)])
+    asyncio.run(manager.execute(dict(ORDER, cloid='0x' + 'c' * 32)))
+    assert manager.linked_cloids == {}
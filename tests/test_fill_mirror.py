@@ -0,0 +1,96 @@
+import asyncio
+import re
+from core.copy_trading import CopyTradingManager
+from core.fill_mirror import FillMirror
+from utils.helpers import derive_cloid
+from conftest import make_trader, FakeExchange
+
+CLOID = re.compile(r'^0x[0-9a-f]{32}$')
+
+class FakeAccount:
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self.orders = []
+        self.cancels = []
+    async def place_order(self, **kwargs):
+        self.orders.append(kwargs)
+        return {'status': 'ok'}
+    async def cancel_by_cloid(self, symbol, cloids):
+        self.cancels.append((symbol, cloids))
+        return {'status': 'ok'}
+
+def make_mirror():
+    master, subs = FakeAccount(1), [FakeAccount(2), FakeAccount(3)]
+    mirror = FillMirror(CopyTradingManager(master, subs), clock=lambda: 1000.0)
+    mirror.started_at_ms = 1000000
+    return mirror, subs
+
+def fill(tid, cloid=None, timestamp=1000500, direction='Open Long'):
+    return {'id': str(tid), 'order': 77, 'symbol': 'BTC/USDC:USDC', 'side': 'buy', 'amount': 0.5,
+            'timestamp': timestamp, 'info': {'cloid': cloid, 'dir': direction}}
+
+def test_fill_is_mirrored_once_with_deterministic_cloids():
+    mirror, subs = make_mirror()
+    async def run():
+        first = await mirror.mirror_fill(fill(1))
+        replay = await mirror.mirror_fill(fill(1))  # Same fill redelivered after a reconnect
+        return first, replay
+    first, replay = asyncio.run(run())
+    assert first['status'] == 'ok' and replay is None
+    for sub in subs:
+        assert len(sub.orders) == 1
+        order = sub.orders[0]
+        assert order['side'] == 'long' and order['order_type'] == 'market' and order['size'] == 0.5
+        assert order['reduce_only'] is False
+        assert CLOID.match(order['cloid']) and order['cloid'] == derive_cloid('fill:1', sub.account_id)
+
+def test_closing_fill_is_reduce_only_and_history_is_skipped():
+    mirror, subs = make_mirror()
+    async def run():
+        await mirror.mirror_fill(fill(2, direction='Close Long'))
+        await mirror.mirror_fill(fill(3, timestamp=999000))  # From the snapshot sent on subscribe
+    asyncio.run(run())
+    assert [o['reduce_only'] for o in subs[0].orders] == [True]
+    assert mirror.stats['skipped'] == 1
+
+def test_orders_placed_through_execute_are_not_mirrored_twice_and_cancels_follow():
+    mirror, subs = make_mirror()
+    manager = mirror.manager
+    parent = '0x' + '1' * 32
+    order = {'symbol': 'BTC', 'side': 'long', 'order_type': 'limit', 'size': 1, 'price': 100,
+             'tps': [{'profit_perc': 1}], 'cloid': parent}
+    async def run():
+        await manager.execute(order)
+        await mirror.mirror_fill(fill(4, cloid=parent))
+        await mirror.mirror_cancel({'clientOrderId': derive_cloid(parent, 'tp', 1), 'symbol': 'BTC', 'status': 'canceled'})
+    asyncio.run(run())
+    assert len(subs[0].orders) == 1  # Only the execute() copy
+    sub_parent = subs[0].orders[0]['cloid']
+    assert sub_parent == derive_cloid(parent, 2)
+    assert subs[0].cancels == [('BTC', [derive_cloid(sub_parent, 'tp', 1)])]
+
+class FakeWs:
+    def __init__(self):
+        self.orders = asyncio.Queue()
+    async def watch_orders(self, params={}):
+        return [await self.orders.get()]
+    async def watch_my_trades(self, params={}):
+        await asyncio.sleep(3600)
+
+def test_listeners_share_one_user_event_stream():
+    trader = make_trader(FakeExchange())
+    trader.ws = FakeWs()
+    seen_a, seen_b = [], []
+    async def run():
+        tasks = [asyncio.ensure_future(trader.listen_order_updates(seen_a.append)),
+                 asyncio.ensure_future(trader.listen_order_updates(seen_b.append))]
+        await asyncio.sleep(0)
+        await trader.ws.orders.put({'id': 9, 'status': 'open'})
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        return trader._update_task.done()
+    assert asyncio.run(run())
+    assert seen_a == seen_b == [{'type': 'order', 'data': {'id': 9, 'status': 'open'}}]
@@ -0,0 +1,30 @@
+import asyncio
+from core.copy_trading import CopyTradingManager
+from core.impact import estimate_impact, plan_market_splits
+from core.l2_book import L2Book
+
+class Account:
+    def __init__(self, account_id):
+        self.account_id = account_id
+
+def make_book():
+    book = L2Book('BTC')
+    book.apply_snapshot([[99.9, 5.0]], [[100.0, 1.0], [100.1, 1.0], [100.5, 10.0]])
+    return book
+
+def test_estimate_walks_the_book_from_the_touch():
+    impact = estimate_impact(make_book(), True, 2.0)
+    assert impact['vwap'] == 100.05 and impact['worst_price'] == 100.1 and impact['complete']
+    assert abs(impact['slippage_bps'] - 5.0) < 1e-9
+    assert not estimate_impact(make_book(), False, 6.0)['complete']
+
+def test_orders_over_the_threshold_are_split_within_the_cap():
+    book = make_book()
+    assert plan_market_splits(book, True, 2.0, max_slippage_bps=10)['splits'] == 1
+    plan = plan_market_splits(book, True, 7.0, max_slippage_bps=20)
+    assert plan['exceeds'] and plan['splits'] == 4  # 2.0 rests within 20 bps of the touch
+    assert plan_market_splits(book, True, 1000.0, max_slippage_bps=20)['splits'] == 30
+
+def test_aggregate_size_counts_subscribers_on_the_same_symbol():
+    manager = CopyTradingManager(Account(1), [Account(2), Account(3), Account(4)], pair_map={4: 'ETH'})
+    assert asyncio.run(manager.aggregate_size({'symbol': 'BTC', 'size': 0.5})) == 1.5
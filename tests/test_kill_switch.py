@@ -0,0 +1,50 @@
+import asyncio
+import time
+from core.kill_switch import flatten_all
+from core.price_cache import price_cache
+
+class SlowAccount:
+    def __init__(self, account_id, delay=0.05, hang=False):
+        self.account_id = account_id
+        self.delay = delay
+        self.hang = hang
+        self.calls = []
+    async def cancel_all_orders(self):
+        self.calls.append('cancel')
+        await asyncio.sleep(10 if self.hang else self.delay)
+        return {'status': 'ok'}
+    async def close_all_positions(self):
+        self.calls.append('close')
+        await asyncio.sleep(self.delay)
+        return {'status': 'ok'}
+
+def test_ten_accounts_flatten_in_one_account_of_wall_time():
+    accounts = [SlowAccount(i) for i in range(10)]
+    started = time.perf_counter()
+    result = asyncio.run(flatten_all(accounts))
+    assert time.perf_counter() - started < 0.1 * 2  # One account is cancel + close = 0.1s
+    assert result['status'] == 'ok'
+    assert all(a.calls == ['cancel', 'close'] for a in accounts)
+    assert all(0.1 <= r['elapsed'] < 0.2 for r in result['accounts'])
+
+def test_deadline_reports_stuck_accounts_without_waiting_for_them():
+    accounts = [SlowAccount(1), SlowAccount(2, hang=True)]
+    result = asyncio.run(flatten_all(accounts, deadline=0.2, close_positions=False))
+    assert result['status'] == 'partial'
+    assert [r['status'] for r in result['accounts']] == ['ok', 'timeout']
+    assert accounts[0].calls == ['cancel']
+    assert result['elapsed'] < 0.5
+
+def test_cancel_and_close_are_single_batched_actions(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    trader.order_store.set_positions([{'symbol': 'BTC/USDC:USDC', 'side': 'long', 'contracts': 0.3}])
+    price_cache.update('BTC/USDC:USDC', mid=100.0)
+    orders = [{'symbol': 'BTC/USDC:USDC', 'id': '11'}, {'symbol': 'BTC/USDC:USDC', 'id': '12'}]
+    asyncio.run(trader.cancel_all_orders(open_orders=orders))
+    asyncio.run(trader.close_all_positions())
+    cancel, close = client.posts[0]['action'], client.posts[1]['action']
+    assert cancel == {'type': 'cancel', 'cancels': [{'a': 0, 'o': 11}, {'a': 0, 'o': 12}]}
+    assert close['type'] == 'order' and len(close['orders']) == 1
+    leg = close['orders'][0]
+    assert leg['b'] is False and leg['r'] is True and leg['s'] == '0.3'
+    assert leg['t'] == {'limit': {'tif': 'Ioc'}} and leg['p'] == '95.0'
@@ -0,0 +1,37 @@
+from core.l2_book import L2Book
+from core.price_cache import PriceCache
+
+def make_book():
+    book = L2Book('BTC')
+    book.apply_snapshot([[99.0, 2.0], [100.0, 1.0], [98.0, 5.0]], [[101.0, 1.0], [103.0, 4.0], [102.0, 2.0]])
+    return book
+
+def test_snapshot_and_deltas_keep_levels_sorted_best_first():
+    book = make_book()
+    assert book.bids.levels() == [[100.0, 1.0], [99.0, 2.0], [98.0, 5.0]]
+    assert (book.best_bid(), book.best_ask(), book.mid()) == (100.0, 101.0, 100.5)
+    book.apply_deltas(bids=[[100.5, 3.0], [99.0, 0.0]], asks=[[101.0, 0.0], [102.0, 7.0]])
+    assert book.bids.levels() == [[100.5, 3.0], [100.0, 1.0], [98.0, 5.0]]
+    assert book.asks.levels() == [[102.0, 7.0], [103.0, 4.0]]
+    assert book.asks.to_array().tolist() == [[102.0, 7.0], [103.0, 4.0]]
+
+def test_vwap_and_depth_queries():
+    book = make_book()
+    assert book.vwap(True, 3.0) == ((101.0 + 2 * 102.0) / 3, 3.0)  # A buy walks the asks
+    assert book.vwap(False, 10.0) == ((100.0 + 2 * 99.0 + 5 * 98.0) / 8, 8.0)  # Thinner than asked
+    assert book.price_for_size(True, 3.5) == 103.0
+    assert book.price_for_size(True, 100.0) is None
+    assert book.bids.size_to_price(99.0) == 3.0
+
+def test_hyperliquid_l2_messages_and_price_cache_book():
+    book = L2Book('ETH')
+    book.apply_message({'channel': 'l2Book', 'data': {'coin': 'ETH', 'time': 5, 'levels': [
+        [{'px': '10.0', 'sz': '1.5', 'n': 1}], [{'px': '10.1', 'sz': '2', 'n': 3}]]}})
+    assert (book.best_bid(), book.best_ask(), book.timestamp) == (10.0, 10.1, 5)
+    book.apply_message({'asks': [['10.05', '1']]})
+    assert book.best_ask() == 10.05
+    cache = PriceCache()
+    cache.update_book('ETH', [[10.0, 1.0]], [[10.2, 1.0]])
+    cache.update_book('ETH', [[10.1, 1.0]], [], deltas=True)
+    assert cache.get_book('ETH').bids.levels() == [[10.1, 1.0], [10.0, 1.0]]
+    assert cache.get_mid('ETH') == (10.1 + 10.2) / 2
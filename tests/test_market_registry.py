@@ -0,0 +1,65 @@
+import asyncio
+from core.market_registry import MarketRegistry, MARKETS_WEIGHT
+from core.rate_limiter import LANE_DATA
+
+MARKETS = [{'symbol': 'BTC/USDC:USDC', 'base': 'BTC', 'baseId': 0}]
+
+class FakeClient:
+    def __init__(self):
+        self.fetch_calls = 0
+        self.markets = None
+    async def fetch_markets(self):
+        self.fetch_calls += 1
+        await asyncio.sleep(0)
+        return MARKETS
+    def set_markets(self, markets):
+        self.markets = markets
+
+def test_registry_downloads_once_for_many_accounts(tmp_path):
+    registry = MarketRegistry('hyperliquid', snapshot_path=tmp_path / 'markets.json')
+    fetcher = FakeClient()
+    clients = [FakeClient() for _ in range(10)]
+    async def connect_all():
+        async def connect(client):
+            await registry.ensure_loaded(fetcher)
+            registry.inject(client)
+        await asyncio.gather(*(connect(c) for c in clients))
+    asyncio.run(connect_all())
+    assert fetcher.fetch_calls == 1
+    assert all(c.markets == MARKETS for c in clients)
+    assert (tmp_path / 'markets.json').exists()
+
+def test_registry_cold_start_from_snapshot(tmp_path):
+    path = tmp_path / 'markets.json'
+    first = MarketRegistry('hyperliquid', snapshot_path=path)
+    asyncio.run(first.ensure_loaded(FakeClient()))
+    second = MarketRegistry('hyperliquid', snapshot_path=path)
+    client = FakeClient()
+    asyncio.run(second.ensure_loaded(client))
+    assert client.fetch_calls == 0
+    assert second.markets == MARKETS
+
+def test_stale_snapshot_is_served_and_refreshed_in_background(tmp_path):
+    path = tmp_path / 'markets.json'
+    now = [1000.0]
+    first = MarketRegistry('hyperliquid', snapshot_path=path, clock=lambda: now[0])
+    asyncio.run(first.ensure_loaded(FakeClient()))
+    now[0] += 10_000
+    second = MarketRegistry('hyperliquid', snapshot_path=path, ttl=60, clock=lambda: now[0])
+    client = FakeClient()
+    async def run():
+        await second.ensure_loaded(client)
+        assert second.markets == MARKETS  # Served from disk without waiting
+        await second._refresh_task
+    asyncio.run(run())
+    assert client.fetch_calls == 1
+    assert not second.is_stale()
+
+def test_download_goes_through_the_accounts_request_path(tmp_path):
+    registry = MarketRegistry('hyperliquid', snapshot_path=tmp_path / 'markets.json')
+    requests = []
+    async def request(lane, weight, call, *args, **kwargs):
+        requests.append((lane, weight))
+        return await call(*args, **kwargs)
+    asyncio.run(registry.ensure_loaded(FakeClient(), request))
+    assert requests == [(LANE_DATA, MARKETS_WEIGHT)] and registry.markets == MARKETS
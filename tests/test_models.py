@@ -0,0 +1,43 @@
+from core.models import Fill, Order, OrderRequest, Position
+from core.order_store import OrderStore
+from tests.test_order_store import Account
+
+def test_order_is_a_mapping_of_its_set_fields():
+    order = Order('BTC', 'long', 'limit', 1.0, price=100.0, cloid='0xa')
+    assert dict(order) == {'symbol': 'BTC', 'side': 'long', 'order_type': 'limit', 'size': 1.0, 'price': 100.0,
+                           'cloid': '0xa'}
+    assert order == dict(order) and 'sl' not in order and order.get('sl', 5) == 5
+    def place_order(symbol, side, order_type, size, price=None, leverage=10, cloid=None):
+        return symbol, size, price, leverage, cloid
+    assert place_order(**order) == ('BTC', 1.0, 100.0, 10, '0xa')  # Unset fields keep place_order's defaults
+    copy = order.replace(symbol='ETH', size=2.0)
+    assert (copy.symbol, copy.size, copy.price, order.symbol) == ('ETH', 2.0, 100.0, 'BTC')
+    assert Order.coerce({'symbol': 'BTC', 'side': 'short', 'order_type': 'market', 'size': 1.0}).side == 'short'
+    try:
+        Order('BTC', 'long', 'limit', 1.0, slippage=1)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Unknown fields must be rejected")
+
+def test_order_request_copies_share_nothing_mutable_that_changes():
+    entry = OrderRequest('BTC', True, False, 'limit', 1.0, 100.0, cloid='0xa', tags=('entry',))
+    split = entry.replace(sz=0.5, cloid='0xb')
+    split.tif = 'Alo'
+    assert (entry.sz, entry.cloid, entry.tif) == (1.0, '0xa', 'Gtc')
+    assert (split.sz, split.cloid, split.limit_px, split.tags) == (0.5, '0xb', 100.0, ('entry',))
+
+def test_positions_read_like_ccxt_and_fills_update_them_in_place():
+    store = OrderStore(Account(None))
+    store.set_positions([{'symbol': 'BTC', 'side': 'long', 'contracts': '2', 'entryPrice': '100',
+                          'unrealizedPnl': 4.0, 'leverage': 5}])
+    position = store.position('BTC')
+    assert isinstance(position, Position)
+    assert (position['contracts'], position['entryPrice'], position.get('leverage')) == (2.0, 100.0, 5)
+    assert position.unrealized_pnl == 4.0 and position.liquidation_price is None
+    assert not hasattr(position, '__dict__') and not hasattr(position, 'info')  # The CCXT dict is not kept
+    store.apply_fill(Fill('1', 7, 'BTC', 'buy', 2.0, 110.0))
+    assert store.position('BTC') is position and (position.contracts, position.entry_price) == (4.0, 105.0)
+    store.apply_fill({'symbol': 'BTC', 'side': 'sell', 'amount': 5.0, 'price': 120.0})
+    assert (position.side, position.contracts, position.entry_price) == ('short', 1.0, 120.0)
+    assert position.get('missing', 'x') == 'x'
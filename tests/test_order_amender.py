@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from core.order_amender import OrderAmender
+
+class SlowAccount:
+    def __init__(self, account_id, delay=0.05):
+        self.account_id = account_id
+        self.delay = delay
+        self.amends = []
+    async def amend_tagged(self, tag, price, symbol=None, all_symbols=False):
+        self.amends.append((tag, price))
+        await asyncio.sleep(self.delay)
+        return {'status': 'ok'}
+
+def test_rapid_drags_coalesce_to_the_latest_price():
+    accounts = [SlowAccount(1), SlowAccount(2)]
+    amender = OrderAmender(accounts)
+    async def drag():
+        moves = []
+        for price in (100.0, 101.0, 102.0, 103.0):
+            moves.append(asyncio.ensure_future(amender.amend('sl', price, 'BTC')))
+            await asyncio.sleep(0.005)
+        return await asyncio.gather(*moves)
+    results = asyncio.run(drag())
+    # The first move goes out at once; the rest wait for it and collapse into one send
+    assert accounts[0].amends == [('sl', 100.0), ('sl', 103.0)]
+    assert accounts[1].amends == accounts[0].amends
+    assert all(r['price'] == 103.0 for r in results)
+    assert results[0]['accounts'] == {1: {'status': 'ok'}, 2: {'status': 'ok'}}
+
+def test_legs_are_modified_in_place_with_one_batch(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    tps = [{'profit_perc': 1}, {'profit_perc': 2}]
+    parent = '0x' + 'b' * 32
+    asyncio.run(trader.place_order('BTC', 'long', 'limit', 0.2, price=100.0, sl=2, tps=tps, cloid=parent))
+    asyncio.run(trader.amend_tagged('sl', 97.0, 'BTC'))
+    asyncio.run(trader.amend_tagged('tp2', 105.0, 'BTC'))
+    sl_modify, tp_modify = client.posts[1]['action'], client.posts[2]['action']
+    assert sl_modify['type'] == 'batchModify' and len(sl_modify['modifies']) == 1
+    sl = sl_modify['modifies'][0]
+    assert sl['order']['c'] == sl['oid']
+    assert sl['order']['t']['trigger']['triggerPx'] == '97.0' and sl['order']['p'] == str(round(97.0 * 0.95, 1))  # Market trigger keeps its slippage bound
+    tp = tp_modify['modifies'][0]['order']
+    assert tp['t']['trigger']['triggerPx'] == '105.0' and tp['p'] == '105.0' and tp['s'] == '0.1'
+
+def test_no_symbol_moves_nothing_unless_every_symbol_is_asked_for(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    asyncio.run(trader.place_order('BTC', 'long', 'limit', 0.2, price=100.0, sl=2, cloid='0x' + 'c' * 32))
+    assert asyncio.run(trader.amend_tagged('sl', 97.0))['status'] == 'error'
+    assert len(client.posts) == 1
+    asyncio.run(trader.amend_tagged('sl', 97.0, all_symbols=True))
+    assert client.posts[1]['action']['type'] == 'batchModify'
+    with pytest.raises(ValueError):
+        asyncio.run(OrderAmender([trader]).amend('sl', 97.0))
@@ -1,5 +1,5 @@
 import pytest
-from core.order_splitter import generate_splits
+from core.order_splitter import generate_splits, generate_book_split_arrays
 
 def test_generate_splits_limit():
     entry = 100.0
@@ -21,3 +21,56 @@ def test_generate_splits_market():
     assert len(splits) == split_count
     assert all(price == entry for price, _ in splits)
     assert abs(sum(size for _, size in splits) - total_size) < 1e-6
+
+@pytest.mark.parametrize('distribution', ['depth', 'post_only', 'gaussian'])
+def test_market_splits_ignore_the_distribution(distribution):
+    splits = generate_splits(100.0, 1.0, 4, 2.0, order_type='market', distribution=distribution)
+    assert splits == [(100.0, 0.5)] * 4
+
+def test_generate_splits_seed_is_reproducible():
+    a = generate_splits(100.0, 1.0, 20, 5.0, seed=42)
+    b = generate_splits(100.0, 1.0, 20, 5.0, seed=42)
+    assert a == b
+    assert a != generate_splits(100.0, 1.0, 20, 5.0, seed=43)
+
+@pytest.mark.parametrize('distribution', ['uniform', 'linear', 'geometric', 'gaussian'])
+def test_generate_splits_snaps_to_tick_and_lot(distribution):
+    tick, lot = 0.5, 0.001
+    splits = generate_splits(100.0, 2.0, 37, 1.234, distribution=distribution, seed=7, tick_size=tick, lot_size=lot)
+    assert len(splits) == 37
+    lots = [round(size / lot) for _, size in splits]
+    assert sum(lots) == 1234
+    assert all(abs(size - n * lot) < 1e-12 and n >= 1 for (_, size), n in zip(splits, lots))
+    for price, _ in splits:
+        assert abs(price / tick - round(price / tick)) < 1e-9
+        assert 98.0 <= price <= 102.0
+
+def test_generate_splits_distribution_shapes():
+    linear = generate_splits(100.0, 1.0, 11, 11.0, distribution='linear')
+    gaussian = generate_splits(100.0, 1.0, 11, 11.0, distribution='gaussian')
+    assert [p for p, _ in linear] == sorted(p for p, _ in linear)
+    assert linear[0][1] > linear[5][1]  # Edges heavier than the entry
+    assert gaussian[5][1] > gaussian[0][1]  # Entry heavier than the edges
+    assert abs(sum(s for _, s in gaussian) - 11.0) < 1e-9
+
+BIDS = [[100.0, 0.1], [99.9, 0.1], [99.5, 50.0], [99.2, 0.1], [98.0, 100.0]]
+ASKS = [[100.1, 0.1], [100.6, 50.0]]
+
+def test_depth_ladder_joins_the_liquidity_and_stays_off_the_spread():
+    prices, sizes = generate_book_split_arrays(True, BIDS, 1.0, 4, 4.0, distribution='depth', tick_size=0.01)
+    assert prices.tolist() == [99.5] * 4  # All the depth within 1% of the touch sits at 99.5
+    assert sizes.tolist() == [1.0] * 4
+    prices, _ = generate_book_split_arrays(True, BIDS, 1.0, 4, 4.0, entry_price=101.0, distribution='depth')
+    assert prices.max() <= 100.0  # An entry above the touch is pulled back behind it
+
+def test_post_only_ladder_stays_behind_the_touch_and_weights_by_depth():
+    for is_buy, levels in ((True, BIDS), (False, ASKS)):
+        prices, sizes = generate_book_split_arrays(is_buy, levels, 1.0, 5, 5.0, distribution='post_only',
+                                                   tick_size=0.01, lot_size=0.001)
+        touch = levels[0][0]
+        assert all(p <= touch for p in prices) if is_buy else all(p >= touch for p in prices)
+        assert abs(sizes.sum() - 5.0) < 1e-9
+        assert sizes.argmax() == 2  # The bucket holding the 50-lot level
+    splits = generate_splits(100.0, 1.0, 5, 5.0, distribution='post_only', is_buy=False, levels=ASKS)
+    assert splits[0][0] == 100.1 and len(splits) == 5
+
@@ -0,0 +1,84 @@
+import asyncio
+from core.order_store import OrderStore
+from core.rate_limiter import LANE_DATA
+
+def order(oid, cloid=None, symbol='BTC/USDC:USDC', status='open'):
+    return {'id': oid, 'clientOrderId': cloid, 'symbol': symbol, 'status': status}
+
+def fill(side, amount, price, timestamp=None):
+    return {'symbol': 'BTC/USDC:USDC', 'side': side, 'amount': amount, 'price': price, 'timestamp': timestamp}
+
+class SeedClient:
+    def __init__(self, orders, positions):
+        self.orders, self.positions = orders, positions
+        self.release = asyncio.Event()
+    async def fetch_open_orders(self):
+        await self.release.wait()
+        return self.orders
+    async def fetch_positions(self):
+        return self.positions
+
+class Account:
+    account_id = 1
+    def __init__(self, client):
+        self.client = client
+        self.requests = []
+    async def _request(self, lane, weight, call, *args, **kwargs):
+        self.requests.append((lane, call.__name__))
+        return await call(*args, **kwargs)
+
+def test_orders_are_indexed_by_oid_cloid_symbol_and_tag():
+    store = OrderStore(Account(None))
+    store.tag('0xabc', 'tp1')  # Tagged before the exchange acknowledges it
+    store.apply({'type': 'order', 'data': order(1, '0xabc')})
+    store.apply({'type': 'order', 'data': order(2, symbol='ETH/USDC:USDC')})
+    assert store.get(1)['clientOrderId'] == '0xabc'
+    assert store.get_by_cloid('0xabc')['id'] == 1
+    assert [o['id'] for o in store.open_orders(tag='tp1')] == [1]
+    assert [o['id'] for o in store.open_orders(symbol='ETH/USDC:USDC')] == [2]
+    store.apply({'type': 'order', 'data': order(1, '0xabc', status='canceled')})
+    assert store.get_by_cloid('0xabc') is None and store.open_orders(tag='tp1') == []
+    assert len(store.open_orders()) == 1
+
+def test_fills_move_the_position():
+    store = OrderStore(Account(None))
+    store.apply_fill(fill('buy', 1.0, 100.0))
+    store.apply_fill(fill('buy', 1.0, 110.0))
+    assert store.position('BTC/USDC:USDC')['contracts'] == 2.0
+    assert store.position('BTC/USDC:USDC')['entryPrice'] == 105.0
+    store.apply_fill(fill('sell', 0.5, 120.0))  # Reducing keeps the entry
+    assert store.position('BTC/USDC:USDC')['entryPrice'] == 105.0
+    store.apply_fill(fill('sell', 2.5, 90.0))  # Flips short at the fill price
+    assert store.position('BTC/USDC:USDC')['side'] == 'short'
+    assert store.position('BTC/USDC:USDC')['contracts'] == 1.0 and store.position('BTC/USDC:USDC')['entryPrice'] == 90.0
+    store.apply_fill(fill('buy', 1.0, 95.0))
+    assert store.position('BTC/USDC:USDC') is None
+
+def test_seed_replays_updates_that_arrive_while_it_runs():
+    client = SeedClient([order(1)], [{'symbol': 'BTC/USDC:USDC', 'side': 'long', 'contracts': 1.0, 'entryPrice': 100.0}])
+    account = Account(client)
+    store = OrderStore(account)
+    async def run():
+        seeding = asyncio.ensure_future(store.seed())
+        await asyncio.sleep(0)
+        store.apply({'type': 'order', 'data': order(1, status='closed')})
+        store.apply({'type': 'order', 'data': order(2)})
+        store.apply({'type': 'fill', 'data': fill('buy', 1.0, 100.0, timestamp=0)})  # Already in the snapshot
+        store.apply({'type': 'fill', 'data': fill('buy', 1.0, 100.0, timestamp=1e15)})
+        client.release.set()
+        await seeding
+    asyncio.run(run())
+    assert [o['id'] for o in store.open_orders()] == [2]
+    assert store.position('BTC/USDC:USDC')['contracts'] == 2.0
+    assert store.positions_fresh(max_age=60)
+    assert sorted(account.requests) == [(LANE_DATA, 'fetch_open_orders'), (LANE_DATA, 'fetch_positions')]  # Rate limited
+
+def test_registered_legs_are_found_by_tag_until_they_close():
+    store = OrderStore(Account(None))
+    store.register('0xe', 'BTC', '0xe', 'entry')
+    store.register('0xt1', 'BTC', '0xe', 'tp', 'tp1')
+    store.register('0xt2', 'BTC', '0xe', 'tp', 'tp2')
+    assert sorted(store.tagged_cloids('tp')) == [('BTC', '0xt1'), ('BTC', '0xt2')]
+    store.apply({'type': 'order', 'data': order(5, '0xt1', status='closed')})  # Filled before we saw it open
+    assert store.tagged_cloids('tp', parent='0xe') == [('BTC', '0xt2')]
+    assert set(store.group('0xe')) == {'0xe', '0xt2'}
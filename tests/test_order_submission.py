@@ -0,0 +1,66 @@
+import re
+import asyncio
+from utils.helpers import derive_cloid
+
+def test_entry_sl_and_tps_go_out_in_one_action(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    tps = [{'profit_perc': p} for p in (1, 2, 3, 4, 5)]
+    result = asyncio.run(trader.place_order('BTC', 'long', 'limit', 0.5, price=100.0, sl=2, tps=tps))
+    assert result == {'status': 'ok'}
+    assert len(client.posts) == 1
+    action = client.posts[0]['action']
+    assert action['grouping'] == 'normalTpsl'
+    assert len(action['orders']) == 7
+    entry, sl = action['orders'][0], action['orders'][1]
+    assert re.match(r'^0x[0-9a-f]{32}$', entry.pop('c'))  # Generated parent cloid
+    assert entry == {'a': 0, 'b': True, 'p': '100.0', 's': '0.5', 'r': False, 't': {'limit': {'tif': 'Gtc'}}}
+    assert sl['r'] and not sl['b'] and sl['t']['trigger']['tpsl'] == 'sl'
+    assert sl['t']['trigger']['triggerPx'] == '98.0'
+
+def test_submit_path_is_probed_once_and_fails_fast(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    asyncio.run(trader.place_order('BTC', 'long', 'limit', 1, price=100.0))
+    assert trader._submit_path == 'signed_exchange'
+    assert trader._submit_path_client is client
+    client.fail = True
+    result = asyncio.run(trader.place_order('BTC', 'long', 'limit', 1, price=100.0))
+    assert result['status'] == 'error'
+    assert len(client.posts) == 2  # No fallback requests after the cached path broke
+    assert trader._submit_path is None
+
+def test_market_order_is_bounded_ioc(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    async def price(symbol, max_age=None):
+        return 100.0
+    trader.get_market_price = price
+    asyncio.run(trader.place_order('BTC', 'short', 'market', 1))
+    order = client.posts[0]['action']['orders'][0]
+    assert order['t'] == {'limit': {'tif': 'Ioc'}}
+    assert order['p'] == '95.0'
+
+def test_legs_are_tagged_and_tps_cancel_in_one_request(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    tps = [{'profit_perc': p} for p in (1, 2, 3)]
+    parent = '0x' + 'a' * 32
+    asyncio.run(trader.place_order('BTC', 'long', 'limit', 0.3, price=100.0, sl=2, tps=tps, cloid=parent))
+    sent = [o['c'] for o in client.posts[0]['action']['orders']]
+    group = trader.order_store.group(parent)
+    assert set(group) == set(sent)
+    assert group[parent] == {'entry'} and group[derive_cloid(parent, 'tp', 2)] == {'tp', 'tp2'}
+    asyncio.run(trader.cancel_tps())
+    cancel = client.posts[1]['action']
+    assert cancel['type'] == 'cancelByCloid'
+    assert sorted(c['cloid'] for c in cancel['cancels']) == sorted(derive_cloid(parent, 'tp', i) for i in (1, 2, 3))
+    assert all(c['asset'] == 0 for c in cancel['cancels'])
+
+def test_post_only_ladder_is_built_from_the_book_and_sent_as_alo(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    async def book(symbol, max_age=None, limit=100):
+        return [[100.0, 1.0], [99.5, 5.0]], [[100.5, 1.0]]
+    trader.get_order_book = book
+    asyncio.run(trader.place_order('BTC', 'long', 'limit', 1.0, price=101.0, range_percent=1.0, split_count=3,
+                                   split_distribution='post_only'))
+    entries = client.posts[0]['action']['orders']
+    assert len(entries) == 3
+    assert all(o['t'] == {'limit': {'tif': 'Alo'}} and float(o['p']) <= 100.0 for o in entries)
+
@@ -0,0 +1,40 @@
+import random
+from hyperliquid.ccxt import hyperliquid as HyperliquidSync
+from core.order_templates import OrderTemplate, LIMIT_TYPES
+from tests.conftest import FakeExchange, make_trader
+
+def client_with_market(size_decimals, spot=False):
+    market = {'id': '3', 'symbol': 'X/USDC:USDC', 'base': 'X', 'quote': 'USDC', 'baseId': '3', 'spot': spot,
+              'precision': {'amount': float(f'1e-{size_decimals}') if size_decimals else 1.0, 'price': None}}
+    client = HyperliquidSync({})
+    client.markets = {'X/USDC:USDC': market}
+    client.markets_by_id = {'3': [market]}
+    client.symbols = ['X/USDC:USDC']
+    return client, market
+
+def test_template_formats_like_the_client():
+    rng = random.Random(7)
+    for size_decimals in (0, 2, 5):
+        for spot in (False, True):
+            client, market = client_with_market(size_decimals, spot)
+            template = OrderTemplate(client, market)
+            for _ in range(300):
+                px = rng.choice((rng.uniform(0, 0.01), rng.uniform(1, 2000), rng.uniform(1e5, 1e6), round(rng.uniform(1, 100), 2)))
+                sz = rng.choice((rng.uniform(0, 10), round(rng.uniform(0, 10), size_decimals + 1), float(rng.randint(0, 50))))
+                assert template.format_price(px) == client.price_to_precision('X/USDC:USDC', px)
+                assert template.format_size(sz) == client.amount_to_precision('X/USDC:USDC', sz)
+
+def test_template_wire_and_fallback_to_client_formatting():
+    client = FakeExchange()
+    template = OrderTemplate(client, client.market('BTC/USDC:USDC'))
+    assert template.max_decimals is None  # No precision fields: client methods format
+    wire = template.wire(True, 100.04, 0.123456, False, LIMIT_TYPES['Gtc'], '0xabc')
+    assert wire == {'a': 0, 'b': True, 'p': '100.0', 's': '0.12346', 'r': False, 't': {'limit': {'tif': 'Gtc'}}, 'c': '0xabc'}
+    assert list(wire) == ['a', 'b', 'p', 's', 'r', 't', 'c']
+
+def test_trader_keeps_one_template_per_symbol_until_the_client_changes():
+    trader = make_trader(FakeExchange())
+    first = trader._template('BTC')
+    assert trader._template('BTC') is first
+    trader.client = FakeExchange()
+    assert trader._template('BTC') is not first
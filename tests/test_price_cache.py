@@ -0,0 +1,37 @@
+import asyncio
+from core.price_cache import PriceCache
+from core.trader import TraderAccount
+import core.trader as trader_module
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_price_cache_mid_and_staleness():
+    clock = FakeClock()
+    cache = PriceCache(max_age=1.0, clock=clock)
+    assert cache.get_mid('BTC') is None
+    cache.update('BTC', 100.0, 102.0)
+    assert cache.get_mid('BTC') == 101.0
+    assert cache.get_quote('BTC') == (100.0, 102.0, 101.0)
+    clock.now = 1.5
+    assert cache.get_mid('BTC') is None
+    assert cache.get_mid('BTC', max_age=2.0) == 101.0
+
+def test_price_cache_ignores_one_sided_quotes():
+    cache = PriceCache()
+    cache.update('ETH', bid=10.0)
+    assert cache.get_mid('ETH') is None
+
+def test_get_market_price_reads_cache_without_rest(monkeypatch):
+    cache = PriceCache(max_age=5.0)
+    cache.update('BTC', 99.0, 101.0)
+    monkeypatch.setattr(trader_module, 'price_cache', cache)
+    trader = TraderAccount('key', 'secret', 1)
+    async def fail_fetch_ticker(symbol):
+        raise AssertionError('REST should not be called when the feed is fresh')
+    trader.client = type('C', (), {'fetch_ticker': fail_fetch_ticker})()
+    trader.is_connected = True
+    assert asyncio.run(trader.get_market_price('BTC')) == 100.0
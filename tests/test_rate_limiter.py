@@ -0,0 +1,87 @@
+import asyncio
+from core.rate_limiter import (RateLimiter, LANE_CANCEL, LANE_ORDER, LANE_DATA, action_lane, action_weight,
+                               is_throttle_error)
+from tests.conftest import FakeExchange, make_trader
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_queued_cancels_go_before_orders_and_data():
+    clock = Clock()
+    limiter = RateLimiter(ip_capacity=100, ip_rate=100, account_capacity=2, account_rate=1, clock=clock)
+    granted = []
+    async def request(lane, name):
+        await limiter.acquire('0xa', 1, lane)
+        granted.append(name)
+    async def run():
+        await limiter.acquire('0xa', 2, LANE_ORDER)  # Drains the account bucket
+        tasks = [asyncio.ensure_future(request(lane, name)) for lane, name in
+                 ((LANE_DATA, 'data'), (LANE_ORDER, 'order'), (LANE_CANCEL, 'cancel'))]
+        await asyncio.sleep(0)
+        for _ in range(3):
+            clock.now += 1.0
+            limiter._wake.set()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+    asyncio.run(run())
+    assert granted == ['cancel', 'order', 'data']
+
+def test_ip_bucket_is_shared_but_accounts_are_not():
+    clock = Clock()
+    limiter = RateLimiter(ip_capacity=3, ip_rate=1, account_capacity=2, account_rate=1, clock=clock)
+    async def run():
+        await limiter.acquire('0xa', 2)
+        blocked_account = asyncio.ensure_future(limiter.acquire('0xa', 1))
+        await asyncio.sleep(0.01)
+        assert not blocked_account.done()
+        other = asyncio.ensure_future(limiter.acquire('0xb', 1))  # Own bucket, IP still has 1 token
+        await asyncio.sleep(0.01)
+        assert other.done() and not blocked_account.done()
+        blocked_ip = asyncio.ensure_future(limiter.acquire('0xc', 1))
+        await asyncio.sleep(0.01)
+        assert not blocked_ip.done()
+        clock.now += 2.0
+        limiter._wake.set()
+        await asyncio.gather(blocked_account, blocked_ip)
+    asyncio.run(run())
+    metrics = limiter.metrics()
+    assert metrics['ips']['local']['consumed'] == 5
+    assert metrics['lanes']['order']['granted'] == 4 and metrics['lanes']['order']['waiting'] == 0
+
+def test_throttling_halves_the_rate_and_success_recovers_it():
+    limiter = RateLimiter(account_rate=10)
+    limiter.throttled('0xa')
+    limiter.throttled('0xa')
+    assert limiter.accounts['0xa'].rate == 2.5
+    assert limiter.metrics()['accounts']['0xa']['throttled'] == 2
+    for _ in range(200):
+        limiter.succeeded('0xa')
+    assert limiter.accounts['0xa'].rate == 10
+
+def test_action_lanes_and_weights():
+    assert action_lane({'type': 'cancelByCloid', 'cancels': []}) == LANE_CANCEL
+    assert action_lane({'type': 'order', 'orders': [{'r': True}, {'r': True}]}) == LANE_CANCEL
+    assert action_lane({'type': 'order', 'orders': [{'r': False}, {'r': True}]}) == LANE_ORDER
+    assert action_weight({'type': 'order', 'orders': [{}] * 85}) == 3
+    assert is_throttle_error('429 Too Many Requests') and not is_throttle_error('Insufficient margin')
+
+class ThrottledExchange(FakeExchange):
+    async def private_post_exchange(self, request):
+        self.posts.append(request)
+        raise RuntimeError('429 Too Many Requests')
+
+def test_trader_actions_go_through_the_limiter_and_report_throttling():
+    trader = make_trader(ThrottledExchange())
+    action = {'type': 'cancel', 'cancels': [{'a': 0, 'o': 1}]}
+    async def run():
+        try:
+            await trader.submit_action(action)
+        except RuntimeError:
+            pass
+    asyncio.run(run())
+    metrics = trader.rate_limiter.metrics()
+    assert metrics['lanes']['cancel']['granted'] == 1
+    assert metrics['accounts']['key']['throttled'] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from eth_account import Account
+from hyperliquid.ccxt import hyperliquid as HyperliquidSync
+from hyperliquid.ccxt.static_dependencies.msgpack import packb
+import core.signer as signer_module
+from core.signer import L1Signer, NonceAllocator, SignerPool, pack_action
+from tests.conftest import FakeExchange, make_trader
+
+ACTION = {'type': 'order', 'grouping': 'normalTpsl',
+          'orders': [{'a': 0, 'b': True, 'p': '100000', 's': '0.001', 'r': False, 't': {'limit': {'tif': 'Gtc'}},
+                      'c': '0x' + 'a' * 32},
+                     {'a': 0, 'b': False, 'p': '95000', 's': '0.001', 'r': True,
+                      't': {'trigger': {'isMarket': True, 'triggerPx': '95000', 'tpsl': 'sl'}}}]}
+
+def test_l1_signer_matches_the_client_signature():
+    wallet = Account.from_key('0x' + '11' * 32)
+    client = HyperliquidSync({'walletAddress': wallet.address, 'privateKey': wallet.key.hex()})
+    signer = L1Signer.for_client(client)
+    for nonce in (1700000000000, 1760000000123):
+        assert signer(ACTION, nonce) == client.sign_l1_action(ACTION, nonce)
+    assert L1Signer.for_client(FakeExchange()) is None
+
+def test_nonces_stay_unique_across_threads_and_blocks_are_contiguous():
+    allocator = NonceAllocator()
+    taken = []
+    def worker():
+        for _ in range(500):
+            first = allocator.allocate(1000, 2)
+            taken.extend((first, first + 1))
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(taken)) == len(taken) == 4000
+    assert allocator.allocate(10 ** 6) == 10 ** 6  # Follows the clock once it is ahead
+
+def test_pool_batches_a_burst_and_keeps_results_in_order():
+    calls = []
+    def signer(action, nonce):
+        calls.append(threading.current_thread().name)
+        return {'nonce': nonce}
+    pool = SignerPool(processes=2)
+    async def run():
+        return await asyncio.gather(*(pool.sign(signer, ACTION, n) for n in range(200)))
+    signatures = asyncio.run(run())
+    pool.shutdown()
+    assert [s['nonce'] for s in signatures] == list(range(200))
+    assert pool.batches == 4 and pool.signed == 200  # 100 per worker, at most 50 per batch
+    assert all(name.startswith('signer') for name in calls)
+
+def test_trader_signs_a_block_of_actions_with_consecutive_nonces():
+    trader = make_trader(FakeExchange())
+    other = make_trader(FakeExchange())  # Same address: shares the nonce sequence
+    async def run():
+        payloads = await trader.sign_actions([ACTION, ACTION, ACTION])
+        return payloads, other.sign_action(ACTION)
+    payloads, after = asyncio.run(run())
+    first = payloads[0]['nonce']
+    assert [p['nonce'] for p in payloads] == [first, first + 1, first + 2]
+    assert after['nonce'] == first + 3
+    assert payloads[0]['signature'] == {'r': '0x1', 's': '0x2', 'v': 27}
+
+def test_pack_action_matches_packb():
+    big = {'type': 'order', 'grouping': 'na', 'orders': ACTION['orders'] * 50}
+    cancels = {'type': 'cancel', 'cancels': [{'a': 10001, 'o': 2 ** 40 + i} for i in range(20)]}
+    for action in (ACTION, big, cancels, {'type': 'batchModify', 'modifies': [{'oid': '0x' + 'c' * 32, 'order': ACTION['orders'][0]}]}):
+        assert pack_action(action) == packb(action)
+
+def test_workers_start_once_without_blocking_the_loop(monkeypatch):
+    created = []
+    class SlowPool(ThreadPoolExecutor):
+        def __init__(self, workers, mp_context=None):
+            super().__init__(workers)
+            created.append(self)
+            time.sleep(0.05)  # Spawning processes takes a while
+    monkeypatch.setattr(signer_module, 'ProcessPoolExecutor', SlowPool)
+    pool = SignerPool(processes=2)
+    signer = L1Signer('0x' + '1' * 64)
+    async def run():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+        ticker = asyncio.ensure_future(tick())
+        warm_up = pool.ensure_started()
+        signatures = await asyncio.gather(*(pool.sign(signer, ACTION, n) for n in range(4)))
+        await asyncio.gather(warm_up, pool.ensure_started(), asyncio.get_running_loop().run_in_executor(None, pool.start))
+        ticker.cancel()
+        return signatures, ticks
+    signatures, ticks = asyncio.run(run())
+    pool.shutdown()
+    assert len(created) == 1 and len(signatures) == 4
+    assert ticks > 3  # The loop kept running while the workers started
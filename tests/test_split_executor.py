@@ -0,0 +1,98 @@
+import asyncio
+from core.split_executor import build_actions, chunk_orders, leg_actions_start, submit_chunked
+from core.price_cache import PriceCache
+import core.trader as trader_module
+from tests.conftest import FakeExchange, make_trader
+
+class FakeTrader:
+    def __init__(self, fail_chunk=None):
+        self.actions = []
+        self.fail_chunk = fail_chunk
+        self.in_flight = 0
+        self.max_in_flight = 0
+    async def submit_action(self, action):
+        index = len(self.actions)
+        self.actions.append(action)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if index == self.fail_chunk:
+            raise ConnectionError('timeout')
+        return {'status': 'ok', 'response': {'type': 'order', 'data': {
+            'statuses': [{'resting': {'oid': i}} for i, _ in enumerate(action['orders'])]}}}
+
+def test_chunk_orders():
+    assert [len(c) for c in chunk_orders(list(range(100)), 40)] == [40, 40, 20]
+    assert chunk_orders([], 40) == []
+
+def test_hundred_splits_land_in_three_pipelined_requests():
+    trader = FakeTrader()
+    result = asyncio.run(submit_chunked(trader, [{'n': i} for i in range(100)], max_in_flight=4))
+    assert result['status'] == 'ok'
+    assert result['requests'] == 3
+    assert len(result['statuses']) == 100
+    assert trader.max_in_flight == 3
+    assert all(a['grouping'] == 'na' for a in trader.actions)
+
+def test_tpsl_chunk_grouping_and_partial_failure():
+    trader = FakeTrader(fail_chunk=0)
+    result = asyncio.run(submit_chunked(trader, [{'n': i} for i in range(45)], tpsl_start=42, chunk_size=40))
+    # The legs cover the whole ladder, so they get their own action rather than bracketing one chunk
+    assert [(len(a['orders']), a['grouping']) for a in trader.actions] == [(40, 'na'), (2, 'na'), (3, 'na')]
+    assert result['status'] == 'partial'
+    assert len(result['errors']) == 1
+    assert result['statuses'][0] == {'error': 'timeout'}
+    assert result['statuses'][40] == {'resting': {'oid': 0}}
+
+def test_place_order_range_entry_uses_splits(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    result = asyncio.run(trader.place_order('BTC', 'long', 'limit', 10, price=100.0, sl=2,
+                                            range_percent=1.0, split_count=100))
+    assert result['requests'] == 4  # 3 entry chunks, then the SL on its own
+    orders = [o for post in client.posts for o in post['action']['orders']]
+    assert len(orders) == 101  # 100 entries + SL
+    assert len({post['nonce'] for post in client.posts}) == 4
+    assert client.posts[-1]['action']['orders'][0]['r'] and client.posts[-1]['action']['grouping'] == 'na'
+    entry_prices = [float(o['p']) for o in orders if not o['r']]
+    assert all(99.0 <= p <= 101.0 for p in entry_prices)
+
+def test_rejected_chunk_forgets_its_legs():
+    class RejectingExchange(FakeExchange):
+        async def private_post_exchange(self, request):
+            self.posts.append(request)
+            if len(self.posts) == 2:
+                return {'status': 'err', 'response': 'Insufficient margin'}
+            return {'status': 'ok', 'response': {'type': 'order', 'data': {
+                'statuses': [{'resting': {'oid': i}} for i, _ in enumerate(request['action']['orders'])]}}}
+    trader = make_trader(RejectingExchange())
+    result = asyncio.run(trader.place_order('BTC', 'long', 'limit', 10, price=100.0, range_percent=1.0,
+                                            split_count=100, cloid='0x' + 'a' * 32))
+    assert result['status'] == 'partial'
+    assert result['statuses'][40:80] == [{'error': 'Insufficient margin'}] * 40
+    assert len(trader.order_store.group('0x' + 'a' * 32)) == 60  # The rejected chunk's legs are not left registered
+
+def test_legs_bracket_the_entries_only_when_they_share_one_action():
+    assert [a['grouping'] for a in build_actions(list(range(10)), tpsl_start=6)] == ['normalTpsl']
+    actions = build_actions(list(range(84)), tpsl_start=80)
+    assert [(a['orders'][0], len(a['orders']), a['grouping']) for a in actions] == [(0, 40, 'na'), (40, 40, 'na'), (80, 4, 'na')]
+    assert leg_actions_start(84, 80) == 2 and leg_actions_start(10, 6) == 1 and leg_actions_start(100, None) == 3
+
+def test_market_split_with_a_book_distribution_places_equal_splits(monkeypatch):
+    cache = PriceCache(max_age=5.0)
+    cache.update('BTC/USDC:USDC', 99.0, 101.0)
+    monkeypatch.setattr(trader_module, 'price_cache', cache)
+    trader = make_trader(FakeExchange())
+    result = asyncio.run(trader.place_order('BTC/USDC:USDC', 'long', 'market', 4, split_count=4,
+                                            split_distribution='depth'))
+    assert result['status'] == 'ok'
+    orders = trader.client.posts[0]['action']['orders']
+    assert [o['s'] for o in orders] == ['1.0'] * 4 and all(o['t'] == {'limit': {'tif': 'Ioc'}} for o in orders)
+
+def test_split_size_below_one_lot_is_refused_before_any_leg_is_sent():
+    trader = make_trader(FakeExchange())
+    trader._tick_and_lot = lambda symbol: (0.1, 0.001)
+    result = asyncio.run(trader.place_order('BTC/USDC:USDC', 'long', 'limit', 0.0004, price=100.0, sl=2,
+                                            tps=[{'profit_perc': 1}], range_percent=1.0, split_count=5))
+    assert result['status'] == 'error' and 'below the minimum lot size' in result['message']
+    assert trader.client.posts == []  # No reduce-only SL/TP bracket without an entry
@@ -0,0 +1,72 @@
+import asyncio
+from core.stop_manager import StopManager
+from utils.helpers import derive_cloid
+
+class FakePrices:
+    def __init__(self):
+        self.listeners = []
+        self.subscribed = set()
+    def subscribe(self, symbol):
+        self.subscribed.add(symbol)
+    def get_mid(self, symbol, max_age=None):
+        return None
+
+PARENT = '0x' + 'c' * 32
+TPS = [{'profit_perc': p} for p in (1, 2, 3)]
+
+def place(trader, **kwargs):
+    return asyncio.run(trader.place_order('BTC', 'long', 'limit', 0.3, price=100.0, sl=2, tps=TPS, cloid=PARENT, **kwargs))
+
+def fill_leg(trader, manager, cloid):
+    async def run():
+        trader.order_store.apply({'type': 'order', 'data': {'id': 1, 'clientOrderId': cloid, 'symbol': 'BTC', 'status': 'closed'}})
+        await asyncio.gather(*manager._tasks)
+    asyncio.run(run())
+
+def test_tp_fill_moves_sl_to_previous_tp(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    manager = StopManager([trader], prices=FakePrices())
+    manager.start()
+    place(trader)
+    fill_leg(trader, manager, derive_cloid(PARENT, 'tp', 1))
+    fill_leg(trader, manager, derive_cloid(PARENT, 'tp', 2))
+    breakeven, to_tp1 = client.posts[1]['action'], client.posts[2]['action']
+    assert breakeven['type'] == 'batchModify' and len(breakeven['modifies']) == 1
+    assert breakeven['modifies'][0]['oid'] == derive_cloid(PARENT, 'sl')
+    assert breakeven['modifies'][0]['order']['t']['trigger']['triggerPx'] == '100.0'
+    assert to_tp1['modifies'][0]['order']['t']['trigger']['triggerPx'] == '101.0'
+
+def test_cancelled_tp_does_not_move_the_stop(exchange_trader):
+    trader, client = exchange_trader, exchange_trader.client
+    manager = StopManager([trader], prices=FakePrices())
+    manager.start()
+    place(trader)
+    async def run():
+        trader.order_store.apply({'type': 'order', 'data': {'id': 1, 'clientOrderId': derive_cloid(PARENT, 'tp', 1),
+                                                            'symbol': 'BTC', 'status': 'canceled'}})
+        await asyncio.gather(*manager._tasks)
+    asyncio.run(run())
+    assert len(client.posts) == 1
+
+def test_trailing_follows_ticks_and_coalesces_modifies(exchange_trader):
+    trader = exchange_trader
+    prices = FakePrices()
+    manager = StopManager([trader], prices=prices)
+    manager.start()
+    place(trader, trail_percent=1.0)
+    sent = []
+    async def slow_amend(legs, price, label="leg"):
+        sent.append(round(price, 4))
+        await asyncio.sleep(0.02)
+    trader.amend_legs = slow_amend
+    async def run():
+        for mid in (99.0, 100.5, 100.4, 101.0, 102.0, 101.5):
+            for listener in prices.listeners:
+                listener('BTC', mid)
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+    asyncio.run(run())
+    # 100.5 goes out at once; 101.0 and 102.0 arrive while it is in flight and collapse into 102.0
+    assert sent == [round(100.5 * 0.99, 4), round(102.0 * 0.99, 4)]
+    assert 'BTC' in prices.subscribed
+    assert manager.trailers['BTC'][derive_cloid(PARENT, 'sl')].stop == 102.0 * 0.99
@@ -0,0 +1,72 @@
+import asyncio
+from core.copy_trading import CopyTradingManager
+from core.market_registry import MarketRegistry, get_market_registry
+from core.price_cache import PriceCache
+from core.symbols import SymbolIndex
+import core.trader as trader_module
+from tests.conftest import FakeExchange, make_trader
+
+MARKETS = [
+    {'id': '0', 'symbol': 'BTC/USDC:USDC', 'base': 'BTC', 'quote': 'USDC', 'baseId': 0, 'spot': False, 'swap': True,
+     'precision': {'amount': 1e-05, 'price': 1.0}, 'info': {'name': 'BTC'}},
+    {'id': '1', 'symbol': 'KPEPE/USDC:USDC', 'base': 'KPEPE', 'quote': 'USDC', 'baseId': 1, 'spot': False, 'swap': True,
+     'precision': {'amount': 1.0, 'price': 1e-06}, 'info': {'name': 'kPEPE'}},
+    {'id': '@1', 'symbol': 'BTC/USDC', 'base': 'BTC', 'quote': 'USDC', 'baseId': 10001, 'spot': True, 'swap': False,
+     'precision': {'amount': 0.001, 'price': 0.01}, 'info': {'name': '@1'}},
+]
+
+class FakeClient:
+    async def fetch_markets(self):
+        return MARKETS
+    def set_markets(self, markets):
+        pass
+
+def test_aliases_resolve_to_one_market():
+    index = SymbolIndex(MARKETS)
+    for alias in ('BTC', 'btc', 'BTC/USDT', 'BTCUSDT', 'BTC-PERP', 'BTC/USDC:USDC', 0):
+        info = index.resolve(alias)
+        assert (info.coin, info.symbol, info.asset, info.tick_size, info.lot_size) == ('BTC', 'BTC/USDC:USDC', 0, 1.0, 1e-05)
+    assert index.resolve('kpepeusdt').coin == 'kPEPE'
+    assert index.resolve('BTC/USDC').spot and index.resolve('@1').asset == 10001  # Exact spot symbol beats the perp alias
+    assert index.symbol('DOGEUSDT') == 'DOGEUSDT' and 'DOGE' not in index
+    assert index.by_asset(1).symbol == 'KPEPE/USDC:USDC'
+
+def test_registry_rebuilds_the_index_with_its_markets(tmp_path):
+    registry = MarketRegistry('hyperliquid', snapshot_path=tmp_path / 'markets.json')
+    assert registry.symbols.resolve('BTC') is None
+    asyncio.run(registry.ensure_loaded(FakeClient()))
+    assert registry.symbols.symbol('BTCUSDT') == 'BTC/USDC:USDC'
+    cold = MarketRegistry('hyperliquid', snapshot_path=tmp_path / 'markets.json')
+    assert cold.load_snapshot() and len(cold.symbols) == 3
+
+def test_trader_and_pair_map_use_canonical_symbols(monkeypatch):
+    monkeypatch.setattr(get_market_registry('hyperliquid'), 'symbols', SymbolIndex(MARKETS))
+    trader = make_trader(FakeExchange())
+    assert trader.resolve_symbol('BTCUSDT') == 'BTC/USDC:USDC'
+    assert trader._market('BTC/USDT')['symbol'] == 'BTC/USDC:USDC'
+    manager = CopyTradingManager(trader, [], pair_map={2: 'btcusdt', 3: 'ETH'})
+    assert manager.pair_map == {2: 'BTC/USDC:USDC', 3: 'ETH'}
+
+def test_price_and_book_reads_are_keyed_by_the_market_symbol(monkeypatch):
+    monkeypatch.setattr(get_market_registry('hyperliquid'), 'symbols', SymbolIndex(MARKETS))
+    cache = PriceCache(max_age=5.0)
+    cache.update_book('BTC/USDC:USDC', [[99.0, 1.0]], [[101.0, 2.0]])
+    monkeypatch.setattr(trader_module, 'price_cache', cache)
+    trader = make_trader(FakeExchange())  # No REST methods: both reads must hit the cache
+    assert asyncio.run(trader.get_market_price('BTCUSDT')) == 100.0
+    bids, asks = asyncio.run(trader.get_order_book('btc'))
+    assert bids.tolist() == [[99.0, 1.0]] and asks.tolist() == [[101.0, 2.0]]
+
+def test_pair_map_configured_before_markets_load_resolves_once_they_do(monkeypatch):
+    registry = get_market_registry('hyperliquid')
+    monkeypatch.setattr(registry, 'symbols', SymbolIndex())  # Markets not loaded yet
+    class Account:
+        def __init__(self, account_id):
+            self.account_id = account_id
+    manager = CopyTradingManager(Account(1), [Account(2), Account(3)], pair_map={2: 'BTCUSDT', 3: 'ETH'})
+    assert manager.pair_map == {2: 'BTCUSDT', 3: 'ETH'}
+    registry.symbols = SymbolIndex(MARKETS)
+    assert manager.pair_map == {2: 'BTC/USDC:USDC', 3: 'ETH'}
+    assert manager.pair_map is manager.pair_map  # Resolved once per market load, not per read
+    order = {'symbol': 'BTC', 'side': 'long', 'order_type': 'market', 'size': 1.0}
+    assert asyncio.run(manager.aggregate_size(order)) == 2.0  # Account 2 trades the same market; 3 doesn't
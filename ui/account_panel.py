@@ -2,6 +2,9 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QGroupBox, QListWidget, QListWidgetItem
 from ui.status_log import StatusLog
 from core.trader import TraderAccount
+from ui.async_bridge import get_bridge
+from core.price_cache import price_cache
+from PyQt6.QtCore import QTimer
 
 class AccountPanel(QWidget):
     def __init__(self, account_id=1, trader_account=None, parent=None):
@@ -34,17 +37,17 @@ class AccountPanel(QWidget):
             self.test_btn.clicked.connect(self.test_connect)
             layout.addWidget(self.test_btn)
             # Start real-time order updates
-            import asyncio
+            bridge = get_bridge()
             async def listen_updates():
                 def on_update(update):
-                    self.log_status(f"Order update: {update}")
+                    bridge.post(self.log_status, f"Order update: {update}")
                 await self.trader_account.listen_order_updates(on_update)
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.create_task(listen_updates())
+            if hasattr(self.trader_account, 'listen_order_updates'):
+                bridge.run(listen_updates(), on_error=lambda e: self.log_status(f"Order update stream stopped: {e}"))
+            # Positions are read from the account's local order store; refreshing costs no network calls
+            self.positions_timer = QTimer(self)
+            self.positions_timer.timeout.connect(self.refresh_positions)
+            self.positions_timer.start(1000)
 
     def log_status(self, message: str):
         self.status_log.append(message)
@@ -58,6 +61,17 @@ class AccountPanel(QWidget):
             )
             self.positions_list.addItem(item)
 
+    def refresh_positions(self):
+        rows = []
+        for p in list(self.trader_account.order_store.positions.values()):
+            entry = p.entry_price or 0.0
+            size = p.contracts
+            mid = price_cache.get_mid(p.symbol)
+            pnl = (mid - entry) * size * (1 if p.side == 'long' else -1) if mid else (p.unrealized_pnl or 0.0)
+            rows.append({'symbol': p.symbol, 'side': p.side, 'size': size, 'entry': entry,
+                         'leverage': p.leverage or '-', 'pnl': pnl})
+        self.update_positions(rows)
+
     def log_trade(self, trade_info: str):
         self.history_list.addItem(trade_info)
 
@@ -69,28 +83,23 @@ class AccountPanel(QWidget):
 
     def trigger_order(self, symbol, side, order_type, size, price=None):
         if self.trader_account:
-            import asyncio
+            bridge = get_bridge()
             async def do_order():
                 try:
                     result = await self.trader_account.place_order(symbol, side, order_type, size, price)
-                    self.log_status(f"Order result: {result}")
-                    self.log_trade(f"Order: {order_type} {side} {symbol} {size} @ {price if price else 'MKT'} | Result: {result}")
+                    bridge.post(self.log_status, f"Order result: {result}")
+                    bridge.post(self.log_trade, f"Order: {order_type} {side} {symbol} {size} @ {price if price else 'MKT'} | Result: {result}")
                 except Exception as e:
-                    self.log_status(f"Order error: {e}")
-            asyncio.create_task(do_order())
+                    bridge.post(self.log_status, f"Order error: {e}")
+            bridge.run(do_order())
 
     def test_connect(self):
         if self.trader_account:
-            import asyncio
+            bridge = get_bridge()
             async def do_connect():
                 try:
                     await self.trader_account.connect()
-                    self.log_status("Connected to Hyperliquid API!")
+                    bridge.post(self.log_status, "Connected to Hyperliquid API!")
                 except Exception as e:
-                    self.log_status(f"Connection error: {e}")
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.create_task(do_connect())
+                    bridge.post(self.log_status, f"Connection error: {e}")
+            bridge.run(do_connect())
@@ -0,0 +1,52 @@
+# ui/async_bridge.py
+from PyQt6.QtCore import QObject, pyqtSignal
+from core.engine import engine
+
+
+class AsyncBridge(QObject):
+    """
+    Connects Qt widgets to the engine loop.
+    run() submits a coroutine to the engine thread; results, errors and any UI callbacks
+    posted from engine code are delivered back on the GUI thread through a queued signal.
+    """
+    dispatch = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dispatch.connect(self._on_dispatch)
+
+    def _on_dispatch(self, callback):
+        callback()
+
+    def post(self, fn, *args):
+        """Run fn(*args) on the GUI thread. Safe to call from the engine thread."""
+        self.dispatch.emit(lambda: fn(*args))
+
+    def run(self, coro, on_result=None, on_error=None):
+        """Submit coro to the engine loop and return its concurrent.futures.Future."""
+        future = engine.submit(coro)
+
+        def done(fut):
+            if fut.cancelled():
+                return
+            error = fut.exception()
+            if error is not None:
+                if on_error:
+                    self.post(on_error, error)
+                else:
+                    print(f"AsyncBridge: Unhandled engine error: {error}")
+            elif on_result:
+                self.post(on_result, fut.result())
+
+        future.add_done_callback(done)
+        return future
+
+
+_bridge = None
+
+def get_bridge() -> AsyncBridge:
+    """Returns the shared bridge. The first call must happen on the GUI thread."""
+    global _bridge
+    if _bridge is None:
+        _bridge = AsyncBridge()
+    return _bridge
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from PyQt6.QtWidgets import (
@@ -5,6 +6,15 @@ from PyQt6.QtWidgets import (
     QCheckBox, QSpinBox, QDoubleSpinBox, QGroupBox, QPushButton
 )
 from PyQt6.QtCore import Qt
+from ui.async_bridge import get_bridge
+from core.equity_snapshot import equity_snapshot
+from core.armed_orders import armed_orders
+from core.price_cache import price_cache
+from core.impact import plan_market_splits, DEFAULT_MAX_SLIPPAGE_BPS
+from core.exec_scheduler import execution_scheduler
+from core.models import Order
+from core.market_registry import get_symbol_index
+from utils.helpers import new_cloid
 
 # Setup logging
 log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
@@ -21,6 +31,7 @@ class ControlsPanel(QWidget):
         super().__init__(parent)
         self.initUI()
         self.entry_price = None # Initialize entry_price, to be set by chart click
+        self.sl_price = None # Absolute SL price from the chart, if set there
 
     def initUI(self):
         layout = QVBoxLayout(self)
@@ -63,8 +74,18 @@ class ControlsPanel(QWidget):
         self.position_size_input.setRange(1, 100)
         self.position_size_input.setValue(10)
 
+        # Trailing SL: 0 keeps a fixed stop
+        self.trail_input = QDoubleSpinBox()
+        self.trail_input.setSuffix(" %")
+        self.trail_input.setDecimals(2)
+        self.trail_input.setRange(0.0, 50.0)
+        self.trail_input.setValue(0.0)
+        self.trail_input.setToolTip("Trail the stop loss this far behind the best price (0 = off)")
+
         sl_layout.addWidget(QLabel("SL %:"))
         sl_layout.addWidget(self.sl_input)
+        sl_layout.addWidget(QLabel("Trail:"))
+        sl_layout.addWidget(self.trail_input)
         sl_layout.addWidget(QLabel("Leverage:"))
         sl_layout.addWidget(self.leverage_input)
         sl_layout.addWidget(QLabel("Position Size:"))
@@ -111,9 +132,43 @@ class ControlsPanel(QWidget):
         self.range_inputs.addWidget(QLabel("Splits:"))
         self.range_inputs.addWidget(self.split_count)
 
+        # Ladder shape; Depth and Post Only place splits against the live order book
+        self.split_distribution = QComboBox()
+        self.split_distribution.addItems(["Uniform", "Linear", "Geometric", "Gaussian", "Depth", "Post Only"])
+        self.range_inputs.addWidget(QLabel("Ladder:"))
+        self.range_inputs.addWidget(self.split_distribution)
+
         range_layout.addWidget(self.range_checkbox)
         range_layout.addLayout(self.range_inputs)
 
+        # Pre-trade impact check for market orders, against the local order book
+        impact_layout = QHBoxLayout()
+        self.max_slippage_input = QDoubleSpinBox()
+        self.max_slippage_input.setSuffix(" bps")
+        self.max_slippage_input.setDecimals(1)
+        self.max_slippage_input.setRange(0.0, 1000.0)
+        self.max_slippage_input.setValue(DEFAULT_MAX_SLIPPAGE_BPS)
+        self.auto_split_checkbox = QCheckBox("Auto-split")
+        self.auto_split_checkbox.setChecked(True)
+        impact_layout.addWidget(QLabel("Max Slippage:"))
+        impact_layout.addWidget(self.max_slippage_input)
+        impact_layout.addWidget(self.auto_split_checkbox)
+
+        # Market splits can be worked over time instead of sent at once
+        self.execution_mode = QComboBox()
+        self.execution_mode.addItems(["All at Once", "TWAP", "Iceberg"])
+        self.execution_horizon = QDoubleSpinBox()
+        self.execution_horizon.setSuffix(" s")
+        self.execution_horizon.setRange(1.0, 3600.0)
+        self.execution_horizon.setValue(60.0)
+        self.stop_schedules_btn = QPushButton("Stop Schedules")
+        self.stop_schedules_btn.clicked.connect(self.on_stop_schedules)
+        impact_layout.addWidget(QLabel("Execution:"))
+        impact_layout.addWidget(self.execution_mode)
+        impact_layout.addWidget(QLabel("Over:"))
+        impact_layout.addWidget(self.execution_horizon)
+        impact_layout.addWidget(self.stop_schedules_btn)
+
         # Hide range inputs initially
         self.toggle_range_inputs(0)
 
@@ -125,6 +180,7 @@ class ControlsPanel(QWidget):
         group_layout.addWidget(self.margin_mode)
         group_layout.addLayout(tp_layout)
         group_layout.addLayout(range_layout)
+        group_layout.addLayout(impact_layout)
 
         group_box.setLayout(group_layout)
         layout.addWidget(group_box)
@@ -134,6 +190,16 @@ class ControlsPanel(QWidget):
         layout.addWidget(self.place_order_btn)
         self.place_order_btn.clicked.connect(self.on_place_order)
 
+        # Armed entries: pre-signed now, sent when the price crosses the chart price
+        arm_layout = QHBoxLayout()
+        self.arm_order_btn = QPushButton("Arm at Chart Price")
+        self.disarm_btn = QPushButton("Disarm All")
+        arm_layout.addWidget(self.arm_order_btn)
+        arm_layout.addWidget(self.disarm_btn)
+        layout.addLayout(arm_layout)
+        self.arm_order_btn.clicked.connect(self.on_arm_order)
+        self.disarm_btn.clicked.connect(self.on_disarm_all)
+
         # Add Cancel/Reset TP and Add-to-Position buttons
         self.cancel_tp_btn = QPushButton("Cancel TPs")
         self.reset_tp_btn = QPushButton("Reset TPs")
@@ -164,7 +230,15 @@ class ControlsPanel(QWidget):
         self.range_checkbox.setToolTip("Enable range entry for split orders")
         self.range_percent.setToolTip("Set range percentage for split orders")
         self.split_count.setToolTip("Set number of splits for range entry")
+        self.max_slippage_input.setToolTip("Expected slippage of the combined market order (all mirrored accounts) that triggers a warning (0 = off)")
+        self.auto_split_checkbox.setToolTip("Split market orders over the slippage limit into up to 30 market splits")
+        self.execution_mode.setToolTip("How market splits go out: all at once, evenly over the horizon (TWAP), or one at a time as each fills (Iceberg)")
+        self.execution_horizon.setToolTip("TWAP horizon; Iceberg spaces refills by horizon / splits")
+        self.stop_schedules_btn.setToolTip("Stop sending the remaining slices of every running TWAP/Iceberg execution")
+        self.split_distribution.setToolTip("Ladder shape: Depth puts equal book liquidity between splits, Post Only stays behind the touch")
         self.place_order_btn.setToolTip("Place the order with the current settings")
+        self.arm_order_btn.setToolTip("Prepare a market entry on all accounts that fires when the price crosses the chart price")
+        self.disarm_btn.setToolTip("Drop all armed entries")
         self.cancel_tp_btn.setToolTip("Cancel all Take Profits for all accounts")
         self.reset_tp_btn.setToolTip("Reset all Take Profits for all accounts")
         self.add_to_position_btn.setToolTip("Add to the current position (capped at 100%)")
@@ -179,6 +253,23 @@ class ControlsPanel(QWidget):
         logging.info(f"ControlsPanel: Entry price set to {price}")
         self.show_notification(f"Chart entry price updated: {price:.2f}")
 
+    def set_sl_price(self, price: float):
+        """Sets the SL from a chart marker, shown as a percentage from the entry price."""
+        self.sl_price = price
+        if self.entry_price:
+            self.sl_input.setValue(abs(self.entry_price - price) / self.entry_price * 100.0)
+        logging.info(f"ControlsPanel: SL price set to {price}")
+        self.show_notification(f"Chart SL price updated: {price:.2f}")
+
+    def set_tp_price(self, index: int, price: float):
+        """Sets TP index (0-based) from a chart marker, shown as a percentage from the entry price."""
+        if not 0 <= index < len(self.tp_inputs):
+            return
+        if self.entry_price:
+            self.tp_inputs[index].setValue(abs(price - self.entry_price) / self.entry_price * 100.0)
+        logging.info(f"ControlsPanel: TP{index + 1} price set to {price}")
+        self.show_notification(f"Chart TP{index + 1} price updated: {price:.2f}")
+
     def toggle_range_inputs(self, state):
         is_enabled = state == Qt.CheckState.Checked.value
         for i in range(self.range_inputs.count()):
@@ -192,70 +283,80 @@ class ControlsPanel(QWidget):
             self.status_bar.showMessage(message, 5000)  # Show for 5 seconds
 
     def on_place_order(self):
-        # Wrap the core logic in an async function to allow await calls
-        async def determine_and_place_order():
-            # Get symbol from the new input field
-            symbol = self.symbol_input.text().upper().strip()
-            if not symbol:
-                self.log_and_show_error("Symbol cannot be empty. Please enter a trading symbol.")
-                return
-            
-            # 1. Get UI inputs
-            # Clicked chart price is now self.entry_price, set by set_entry_price via handle_chart_event
-            if self.entry_price is None and self.order_type.currentText().lower() == 'limit':
-                self.log_and_show_error("Limit order selected, but no entry price set from chart.")
-                return
-
-            clicked_chart_price = self.entry_price if self.entry_price is not None else 0.0 # Default if not set, for safety
-
-            ui_order_type = self.order_type.currentText().lower()
-            ui_direction = self.direction.currentText().lower()
-            ui_price_context = self.price_context.currentText() # "At Market", "Above Market", "Below Market"
-
-            sl_percent = self.sl_input.value()
-            leverage_val = self.leverage_input.value()
-            position_size_percent = self.position_size_input.value()
-            margin_mode = self.margin_mode.currentText().lower()
-            tps_percents = [tp.value() for tp in self.tp_inputs if tp.value() > 0]
-            
-            # Validators (already present in original code, ensure they are called)
-            from utils.validators import validate_splits, validate_tp_values, validate_sl_value # Assuming these are available
-            use_range = self.range_checkbox.isChecked()
-            split_count = self.split_count.value()
-            if use_range and not validate_splits(ui_order_type, split_count):
-                from PyQt6.QtWidgets import QMessageBox
-                QMessageBox.warning(self, "Invalid Input", f"Split count exceeds allowed limit for {ui_order_type} orders.")
-                return
-            if not validate_tp_values(tps_percents): # Pass the list of values
-                from PyQt6.QtWidgets import QMessageBox
-                QMessageBox.warning(self, "Invalid Input", "TP values must be positive and in ascending order.")
-                return
-            if sl_percent > 0 and not validate_sl_value(sl_percent): # SL can be 0 if not used
-                from PyQt6.QtWidgets import QMessageBox
-                QMessageBox.warning(self, "Invalid Input", "SL value must be positive if set.")
-                return
-
-
-            # 2. Get active trader account for operations
-            main_window = self.parent()
-            while main_window and not hasattr(main_window, "account_panels"):
-                main_window = main_window.parent()
-            
-            active_trader = None
-            if main_window:
-                if hasattr(main_window, "copy_trading_manager") and main_window.copy_trading_manager:
-                    active_trader = main_window.copy_trading_manager.master
-                elif hasattr(main_window, "account_panels") and main_window.account_panels:
-                    active_trader = main_window.account_panels[0].trader_account # Fallback
-            
-            if not active_trader:
-                self.log_and_show_error("No active trader account available.")
-                return
+        # 1. Get UI inputs on the GUI thread; only network work runs on the engine loop
+        # Get symbol from the new input field
+        symbol = get_symbol_index().symbol(self.symbol_input.text().upper().strip()) # e.g. "BTC/USDC:USDC" once markets are loaded
+        if not symbol:
+            self.log_and_show_error("Symbol cannot be empty. Please enter a trading symbol.")
+            return
+
+        # Clicked chart price is now self.entry_price, set by set_entry_price via handle_chart_event
+        if self.entry_price is None and self.order_type.currentText().lower() == 'limit':
+            self.log_and_show_error("Limit order selected, but no entry price set from chart.")
+            return
+
+        clicked_chart_price = self.entry_price if self.entry_price is not None else 0.0 # Default if not set, for safety
+
+        ui_order_type = self.order_type.currentText().lower()
+        ui_direction = self.direction.currentText().lower()
+        ui_price_context = self.price_context.currentText() # "At Market", "Above Market", "Below Market"
+
+        sl_percent = self.sl_input.value()
+        trail_percent = self.trail_input.value()
+        leverage_val = self.leverage_input.value()
+        position_size_percent = self.position_size_input.value()
+        margin_mode = self.margin_mode.currentText().lower()
+        tps_percents = [tp.value() for tp in self.tp_inputs if tp.value() > 0]
+
+        # Validators (already present in original code, ensure they are called)
+        from utils.validators import validate_splits, validate_tp_values, validate_sl_value # Assuming these are available
+        use_range = self.range_checkbox.isChecked()
+        split_count = self.split_count.value()
+        range_percent = self.range_percent.value()
+        split_distribution = self.split_distribution.currentText().lower().replace(' ', '_')
+        max_slippage_bps = self.max_slippage_input.value()
+        auto_split = self.auto_split_checkbox.isChecked()
+        execution_mode = self.execution_mode.currentText().lower()
+        execution_horizon = self.execution_horizon.value()
+        if use_range and not validate_splits(ui_order_type, split_count):
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(self, "Invalid Input", f"Split count exceeds allowed limit for {ui_order_type} orders.")
+            return
+        if not validate_tp_values(tps_percents): # Pass the list of values
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(self, "Invalid Input", "TP values must be positive and in ascending order.")
+            return
+        if sl_percent > 0 and not validate_sl_value(sl_percent): # SL can be 0 if not used
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(self, "Invalid Input", "SL value must be positive if set.")
+            return
+
+        # 2. Get active trader account for operations
+        main_window = self.parent()
+        while main_window and not hasattr(main_window, "account_panels"):
+            main_window = main_window.parent()
+
+        active_trader = None
+        copy_trading_manager = None
+        if main_window:
+            if hasattr(main_window, "copy_trading_manager") and main_window.copy_trading_manager:
+                copy_trading_manager = main_window.copy_trading_manager
+                active_trader = copy_trading_manager.master
+            elif hasattr(main_window, "account_panels") and main_window.account_panels:
+                active_trader = main_window.account_panels[0].trader_account # Fallback
+
+        if not active_trader:
+            self.log_and_show_error("No active trader account available.")
+            return
+
+        bridge = get_bridge()
+        ui = bridge.post # UI updates from the engine thread go back through the bridge
 
+        async def determine_and_place_order():
             # 3. Fetch current market price
             current_market_price = await active_trader.get_market_price(symbol)
             if current_market_price is None:
-                self.log_and_show_error(f"Could not fetch market price for {symbol}.")
+                ui(self.log_and_show_error, f"Could not fetch market price for {symbol}.")
                 return
 
             # 4. Determine final order parameters
@@ -267,92 +368,178 @@ class ControlsPanel(QWidget):
                 final_order_type = 'market'
                 final_side = ui_direction
                 final_price = None # Market order price is None
-                self.show_notification(f"Preparing {final_side.upper()} MARKET order for {symbol}.")
+                ui(self.show_notification, f"Preparing {final_side.upper()} MARKET order for {symbol}.")
             else: # ui_order_type is 'limit' and ui_price_context is "Above Market" or "Below Market"
-                if self.entry_price is None: # Should have been caught earlier, but double check
-                    self.log_and_show_error("Limit order requires an entry price from the chart.")
-                    return
                 final_order_type = 'limit'
                 final_price = clicked_chart_price # Price is from chart click
 
                 if clicked_chart_price > current_market_price:
                     if ui_direction == 'long':
                         final_side = 'long'
-                        self.show_notification(f"Intending LONG, click {clicked_chart_price:.2f} > market {current_market_price:.2f}. LIMIT BUY.")
+                        ui(self.show_notification, f"Intending LONG, click {clicked_chart_price:.2f} > market {current_market_price:.2f}. LIMIT BUY.")
                     else: # ui_direction == 'short'
                         final_side = 'short'
-                        self.show_notification(f"Intending SHORT, click {clicked_chart_price:.2f} > market {current_market_price:.2f}. LIMIT SELL.")
+                        ui(self.show_notification, f"Intending SHORT, click {clicked_chart_price:.2f} > market {current_market_price:.2f}. LIMIT SELL.")
                 elif clicked_chart_price < current_market_price:
                     if ui_direction == 'long':
                         final_side = 'long'
-                        self.show_notification(f"Intending LONG, click {clicked_chart_price:.2f} < market {current_market_price:.2f}. LIMIT BUY.")
+                        ui(self.show_notification, f"Intending LONG, click {clicked_chart_price:.2f} < market {current_market_price:.2f}. LIMIT BUY.")
                     else: # ui_direction == 'short'
                         final_side = 'short'
-                        self.show_notification(f"Intending SHORT, click {clicked_chart_price:.2f} < market {current_market_price:.2f}. LIMIT SELL.")
+                        ui(self.show_notification, f"Intending SHORT, click {clicked_chart_price:.2f} < market {current_market_price:.2f}. LIMIT SELL.")
                 else: # clicked_chart_price == current_market_price
                     final_side = ui_direction
-                    self.show_notification(f"Click {clicked_chart_price:.2f} == market {current_market_price:.2f}. LIMIT {final_side.upper()}.")
-            
+                    ui(self.show_notification, f"Click {clicked_chart_price:.2f} == market {current_market_price:.2f}. LIMIT {final_side.upper()}.")
+
             # 5. Calculate asset size
             calculated_asset_size = 0
             price_for_size_calc = final_price if final_order_type == 'limit' else current_market_price
 
             if price_for_size_calc is not None and price_for_size_calc > 0:
-                account_equity = await active_trader.get_account_equity()
+                # One concurrent equity pass for all accounts; copy trading sizes subscribers from the same snapshot
+                snapshot_accounts = [active_trader] + (list(copy_trading_manager.subscribers) if copy_trading_manager else [])
+                account_equity = (await equity_snapshot.get(snapshot_accounts)).get(active_trader.account_id)
                 if account_equity is not None and account_equity > 0:
                     margin_to_allocate = account_equity * (position_size_percent / 100.0)
-                    calculated_asset_size = (margin_to_allocate * leverage_val) / price_for_size_calc
+                    calculated_asset_size = active_trader.calculate_position_size(margin_to_allocate, leverage_val, price_for_size_calc)
                     logging.info(f"Calculated asset size: {calculated_asset_size} (Equity: {account_equity}, %Size: {position_size_percent}%, Leverage: {leverage_val}, Price: {price_for_size_calc})")
                 else:
-                    self.log_and_show_error("Could not calculate asset size: Invalid account equity.")
+                    ui(self.log_and_show_error, "Could not calculate asset size: Invalid account equity.")
                     return
             else:
-                self.log_and_show_error("Could not calculate asset size: Invalid price for calculation.")
+                ui(self.log_and_show_error, "Could not calculate asset size: Invalid price for calculation.")
                 return
 
             if calculated_asset_size <= 0:
-                self.log_and_show_error(f"Calculated asset size is not positive: {calculated_asset_size}. Check inputs.")
+                ui(self.log_and_show_error, f"Calculated asset size is not positive: {calculated_asset_size}. Check inputs.")
                 return
 
-            # 6. Construct order_data
-            order_data = {
-                'symbol': symbol,
-                'side': final_side,
-                'order_type': final_order_type,
-                'size': calculated_asset_size,
-                'price': final_price,
-                'leverage': leverage_val,
-                'margin_mode': margin_mode,
-                'sl': sl_percent if sl_percent > 0 else None,
-                'tps': [{'profit_perc': tp_val} for tp_val in tps_percents] if tps_percents else None,
-            }
+            # 6. Pre-trade impact of the combined size across mirrored accounts; reads the local book only
+            final_split_count = split_count if use_range else 1
+            book = price_cache.get_book(symbol) if final_order_type == 'market' and max_slippage_bps > 0 else None
+            if book is not None:
+                aggregate_size = calculated_asset_size
+                if copy_trading_manager:
+                    aggregate_size = await copy_trading_manager.aggregate_size({'symbol': symbol, 'size': calculated_asset_size,
+                                                                                'price': current_market_price})
+                impact = plan_market_splits(book, final_side == 'long', aggregate_size, max_slippage_bps)
+                logging.info(f"Pre-trade impact: {impact}")
+                if impact['exceeds']:
+                    slippage = f"{impact['slippage_bps']:.1f} bps" if impact['complete'] else "more than the visible book"
+                    if auto_split and impact['splits'] > final_split_count:
+                        final_split_count = impact['splits']
+                        ui(self.show_notification, f"Expected slippage {slippage} on {aggregate_size:.4f} {symbol}: splitting into {final_split_count} market orders.")
+                    else:
+                        ui(self.show_notification, f"Warning: expected slippage {slippage} on {aggregate_size:.4f} {symbol}.")
+
+            # 7. Construct order_data
+            order_data = Order(
+                symbol=symbol,
+                side=final_side,
+                order_type=final_order_type,
+                size=calculated_asset_size,
+                price=final_price,
+                leverage=leverage_val,
+                margin_mode=margin_mode,
+                sl=sl_percent if sl_percent > 0 else None,
+                tps=[{'profit_perc': tp_val} for tp_val in tps_percents] if tps_percents else None,
+                # Range entry: place_order lays the entry out as a split ladder sent in chunked batches
+                range_percent=range_percent if use_range else None,
+                split_count=final_split_count,
+                split_distribution=split_distribution,
+                trail_percent=trail_percent if sl_percent > 0 and trail_percent > 0 else None,
+                # Subscriber copies and SL/TP legs derive their cloids from this one
+                cloid=new_cloid(),
+            )
             logging.info(f"Intelligent Chart Trading decision: Clicked={clicked_chart_price}, Market={current_market_price}, UI Direction={ui_direction}, UI Context={ui_price_context} -> Order: {order_data}")
 
-            # 7. Place order (via copy trading manager or directly)
-            if main_window and hasattr(main_window, "copy_trading_manager") and main_window.copy_trading_manager:
-                main_window.copy_trading_manager.mirror_order(order_data)
-                self.show_notification(f"Order mirrored: {final_side.upper()} {final_order_type.upper()} for {symbol}")
-            elif active_trader: # Fallback to direct placement on active_trader
+            # 8. Place order (scheduled over time, via copy trading manager or directly)
+            if final_order_type == 'market' and final_split_count > 1 and execution_mode in ('twap', 'iceberg'):
+                # Each account works its share as market slices on the shared timer wheel
+                legs = await copy_trading_manager.legs_for(order_data, final_split_count + 1) if copy_trading_manager \
+                    else [(active_trader, order_data)]
+                refill_delay = execution_horizon / final_split_count if execution_mode == 'iceberg' else 0.0
+                group_id = execution_scheduler.submit([(account, dict(order, split_count=1)) for account, order in legs],
+                                                      mode=execution_mode, horizon=execution_horizon,
+                                                      slices=final_split_count, refill_delay=refill_delay)
+                ui(self.show_notification, f"{execution_mode.upper()} #{group_id}: {final_split_count} slices of {symbol} on {len(legs)} account(s) over {execution_horizon:.0f}s.")
+            elif copy_trading_manager:
+                # Master and subscribers are sent concurrently; one summary comes back when all have acked
+                fanout = await copy_trading_manager.execute(order_data)
+                ok = sum(1 for leg in fanout['legs'] if leg['status'] == 'ok')
+                logging.info(f"Fan-out result: {fanout}")
+                ui(self.show_notification, f"Order mirrored: {final_side.upper()} {final_order_type.upper()} for {symbol} - {ok}/{len(fanout['legs'])} accounts OK in {fanout['elapsed'] * 1000:.0f} ms")
+            else: # Fallback to direct placement on active_trader
                 try:
                     result = await active_trader.place_order(**order_data)
-                    self.show_notification(f"Order placed on Acct {active_trader.account_id}: {result.get('status', 'Unknown status') if isinstance(result, dict) else result}")
+                    ui(self.show_notification, f"Order placed on Acct {active_trader.account_id}: {result.get('status', 'Unknown status') if isinstance(result, dict) else result}")
                     logging.info(f"Direct order placement result: {result}")
                 except Exception as e_place:
-                    self.log_and_show_error(f"Error placing order directly: {e_place}")
-            else:
-                self.log_and_show_error("No mechanism to place order (no copy manager or active trader).")
-
-        # Run the async function
-        try:
-            import asyncio
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.create_task(determine_and_place_order())
-        except Exception as e:
-            self.log_and_show_error(f"Error initiating order placement: {e}")
+                    ui(self.log_and_show_error, f"Error placing order directly: {e_place}")
+
+        # Run the async function on the engine loop
+        bridge.run(determine_and_place_order(),
+                   on_error=lambda e: self.log_and_show_error(f"Error initiating order placement: {e}"))
+
+    def on_arm_order(self):
+        symbol = get_symbol_index().symbol(self.symbol_input.text().upper().strip()) # e.g. "BTC/USDC:USDC" once markets are loaded
+        if not symbol or self.entry_price is None:
+            self.log_and_show_error("Set a symbol and click a trigger price on the chart before arming.")
+            return
+        trigger_px = self.entry_price
+        side = self.direction.currentText().lower()
+        sl_percent = self.sl_input.value()
+        trail_percent = self.trail_input.value()
+        leverage_val = self.leverage_input.value()
+        position_size_percent = self.position_size_input.value()
+        tps_percents = [tp.value() for tp in self.tp_inputs if tp.value() > 0]
+        order_data = Order(
+            symbol=symbol,
+            side=side,
+            order_type='market', # Crossing the trigger takes liquidity, bounded by the slippage price
+            leverage=leverage_val,
+            margin_mode=self.margin_mode.currentText().lower(),
+            sl=sl_percent if sl_percent > 0 else None,
+            tps=[{'profit_perc': tp_val} for tp_val in tps_percents] if tps_percents else None,
+            trail_percent=trail_percent if sl_percent > 0 and trail_percent > 0 else None,
+            cloid=new_cloid(),
+        )
+
+        main_window = self.parent()
+        while main_window and not hasattr(main_window, "account_panels"):
+            main_window = main_window.parent()
+        copy_trading_manager = getattr(main_window, "copy_trading_manager", None)
+        active_trader = copy_trading_manager.master if copy_trading_manager else (
+            main_window.account_panels[0].trader_account if main_window and main_window.account_panels else None)
+        if not active_trader:
+            self.log_and_show_error("No active trader account available.")
+            return
+
+        bridge = get_bridge()
+        async def arm():
+            snapshot_accounts = [active_trader] + (list(copy_trading_manager.subscribers) if copy_trading_manager else [])
+            equity = (await equity_snapshot.get(snapshot_accounts)).get(active_trader.account_id)
+            if not equity or equity <= 0:
+                raise ValueError("Invalid account equity.")
+            order_data.size = active_trader.calculate_position_size(equity * position_size_percent / 100.0, leverage_val, trigger_px)
+            legs = [(active_trader, order_data)]
+            if copy_trading_manager:
+                legs = await copy_trading_manager.legs_for(order_data)
+            return await armed_orders.arm(symbol, trigger_px, legs)
+        bridge.run(arm(),
+                   on_result=lambda armed: self.show_notification(
+                       f"Armed #{armed.armed_id}: {side.upper()} {symbol} at {trigger_px:.2f} on {len(armed.legs)} account(s)."),
+                   on_error=lambda e: self.log_and_show_error(f"Arm order error: {e}"))
+
+    def on_disarm_all(self):
+        async def disarm_all():
+            return sum(armed_orders.disarm(armed_id) for armed_id in list(armed_orders.orders))
+        get_bridge().run(disarm_all(), on_result=lambda count: self.show_notification(f"Disarmed {count} order(s)."))
+
+    def on_stop_schedules(self):
+        async def stop_all():
+            return execution_scheduler.cancel_all()
+        get_bridge().run(stop_all(), on_result=lambda count: self.show_notification(f"Stopped {count} scheduled execution(s)."))
 
     def update_tp_pnls(self):
         try:
@@ -370,32 +557,32 @@ class ControlsPanel(QWidget):
                 label.setText("PnL: -")
 
     def on_cancel_tps(self):
-        try:
-            parent = self.parent()
-            while parent and not hasattr(parent, "account_panels"):
-                parent = parent.parent()
-            if parent and hasattr(parent, "account_panels"):
-                for panel in parent.account_panels:
-                    if hasattr(panel.trader_account, 'cancel_tps'):
-                        panel.trader_account.cancel_tps()
-                    panel.log_status("TPs cancelled.")
-            self.show_notification("TPs cancelled.")
-        except Exception as e:
-            self.log_and_show_error(f"Cancel TPs error: {e}")
+        panels = self._account_panels()
+        async def cancel_all():
+            # One cancel-by-cloid request per account, all accounts at once
+            return await asyncio.gather(*(p.trader_account.cancel_tps() for p in panels), return_exceptions=True)
+        self._run_on_accounts(panels, cancel_all(), "TPs cancelled", "Cancel TPs")
 
     def on_reset_tps(self):
-        try:
-            parent = self.parent()
-            while parent and not hasattr(parent, "account_panels"):
-                parent = parent.parent()
-            if parent and hasattr(parent, "account_panels"):
-                for panel in parent.account_panels:
-                    if hasattr(panel.trader_account, 'reset_tps'):
-                        panel.trader_account.reset_tps()
-                    panel.log_status("TPs reset.")
-            self.show_notification("TPs reset.")
-        except Exception as e:
-            self.log_and_show_error(f"Reset TPs error: {e}")
+        panels = self._account_panels()
+        tps = [{'profit_perc': tp.value()} for tp in self.tp_inputs if tp.value() > 0]
+        async def reset_all():
+            return await asyncio.gather(*(p.trader_account.reset_tps(tps) for p in panels), return_exceptions=True)
+        self._run_on_accounts(panels, reset_all(), "TPs reset", "Reset TPs")
+
+    def _account_panels(self):
+        parent = self.parent()
+        while parent and not hasattr(parent, "account_panels"):
+            parent = parent.parent()
+        return [p for p in getattr(parent, "account_panels", []) if p.trader_account]
+
+    def _run_on_accounts(self, panels, coro, done_message, error_label):
+        def on_done(results):
+            for panel, result in zip(panels, results):
+                panel.log_status(f"{done_message}: {result}")
+            self.show_notification(f"{done_message} on {len(panels)} account(s).")
+        get_bridge().run(coro, on_result=on_done,
+                         on_error=lambda e: self.log_and_show_error(f"{error_label} error: {e}"))
 
     def on_add_to_position(self):
         try:
@@ -403,21 +590,17 @@ class ControlsPanel(QWidget):
             while parent and not hasattr(parent, "account_panels"):
                 parent = parent.parent()
             if parent and hasattr(parent, "account_panels"):
+                bridge = get_bridge()
+                add_percent = self.position_size_input.value()
                 for panel in parent.account_panels:
                     if hasattr(panel.trader_account, 'add_to_position'):
-                        import asyncio
-                        async def do_add():
+                        async def do_add(panel=panel):
                             try:
-                                await panel.trader_account.add_to_position(self.position_size_input.value())
-                                panel.log_status("Added to position (capped at 100%).")
+                                await panel.trader_account.add_to_position(add_percent)
+                                bridge.post(panel.log_status, "Added to position (capped at 100%).")
                             except Exception as e:
-                                panel.log_status(f"Add to position error: {e}")
-                        try:
-                            loop = asyncio.get_running_loop()
-                        except RuntimeError:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                        loop.create_task(do_add())
+                                bridge.post(panel.log_status, f"Add to position error: {e}")
+                        bridge.run(do_add())
             self.show_notification("Added to position (capped at 100%).")
         except Exception as e:
             self.log_and_show_error(f"Add to position error: {e}")
@@ -176,6 +176,18 @@ class HyperliquidSniper(QMainWindow):
         # Set minimum sizes for better small screen support
         content_widget.setMinimumWidth(900)
         content_widget.setMinimumHeight(600)
+        self.start_accounts()
+
+    def start_accounts(self):
+        """Connect every account and follow its orders and positions, which the info tabs read."""
+        from core.connection_manager import connection_manager
+        from ui.async_bridge import get_bridge
+        accounts = self.trader_accounts
+        async def start_connections():
+            connection_manager.start(accounts)
+            for account in accounts:
+                account.order_store.start() # Seeds once connected, then follows the user-event stream
+        get_bridge().run(start_connections())
 
     def create_header_bar(self):
         """Create the top header bar"""
@@ -373,7 +385,8 @@ class HyperliquidSniper(QMainWindow):
         info_tabs.addTab(balances_widget, "Balances")
         
         # Other tabs
-        for tab_name in ["Positions", "Open Orders", "Trade History", "Funding History", "Order History"]:
+        self.info_texts = {}
+        for tab_name in ["Positions", "Open Orders", "Trade History", "Funding History", "Order History", "Rate Limits"]:
             tab_widget = QWidget()
             tab_layout = QVBoxLayout()
             tab_text = QTextEdit()
@@ -383,6 +396,12 @@ class HyperliquidSniper(QMainWindow):
             tab_layout.addWidget(tab_text)
             tab_widget.setLayout(tab_layout)
             info_tabs.addTab(tab_widget, tab_name)
+            self.info_texts[tab_name] = tab_text
+
+        # Positions and open orders come from each account's local order store; no polling of the exchange
+        self.info_timer = QTimer(self)
+        self.info_timer.timeout.connect(self.refresh_info_tabs)
+        self.info_timer.start(1000)
 
         center_layout.addWidget(info_tabs, 1)
         return center_layout
@@ -637,6 +656,26 @@ class HyperliquidSniper(QMainWindow):
         </html>
         '''
 
+    def refresh_info_tabs(self):
+        positions, orders = [], []
+        for trader in getattr(self, 'trader_accounts', []):
+            store = trader.order_store
+            for p in list(store.positions.values()):
+                positions.append(f"Acct {trader.account_id}: {p['symbol']} {p['side'].upper()} {p['contracts']} @ {p.get('entryPrice')}")
+            for o in store.open_orders():
+                orders.append(f"Acct {trader.account_id}: {o.get('symbol')} {o.get('side')} {o.get('amount')} @ {o.get('price')} ({o.get('type')})")
+        self.info_texts["Positions"].setPlainText("\n".join(positions) or "No open positions")
+        self.info_texts["Open Orders"].setPlainText("\n".join(orders) or "No open orders")
+        from core.rate_limiter import rate_limiter
+        metrics = rate_limiter.metrics()
+        limits = [f"IP {ip}: {m['utilization']:.0%} used, {m['rate']:.1f}/{m['base_rate']:.1f} per s, {m['throttled']} throttled"
+                  for ip, m in metrics['ips'].items()]
+        limits += [f"Account {address[:10]}: {m['utilization']:.0%} used, {m['rate']:.1f}/{m['base_rate']:.1f} per s, {m['throttled']} throttled"
+                   for address, m in metrics['accounts'].items()]
+        limits += [f"Lane {lane}: {m['granted']} sent, {m['waiting']} waiting, avg wait {m['avg_wait'] * 1000:.0f} ms"
+                   for lane, m in metrics['lanes'].items()]
+        self.info_texts["Rate Limits"].setPlainText("\n".join(limits))
+
     def place_long_order(self):
         self.place_order(direction="buy")
 
@@ -646,7 +685,8 @@ class HyperliquidSniper(QMainWindow):
     def place_order(self, direction):
         # Example: place order for all loaded accounts (can be refined for per-account)
         from core.order_splitter import generate_splits
-        import asyncio
+        from ui.async_bridge import get_bridge
+        bridge = get_bridge()
         order_type = "market" if self.market_btn.isChecked() else "limit"
         size = 1.0  # TODO: get from UI
         price = None  # TODO: get from UI if limit
@@ -654,12 +694,7 @@ class HyperliquidSniper(QMainWindow):
         for trader in getattr(self, 'trader_accounts', []):
             async def do_order(trader=trader):
                 await trader.place_order(symbol, direction, order_type, size, price)
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.create_task(do_order())
+            bridge.run(do_order())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 # ui/main_window.py
 from PyQt6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QLabel, QFrame, QScrollArea, QSpacerItem, QSizePolicy, QHBoxLayout, QPushButton, QComboBox, QStatusBar, QDialog, QFormLayout, QLineEdit
+    QMainWindow, QWidget, QVBoxLayout, QLabel, QFrame, QScrollArea, QSpacerItem, QSizePolicy, QHBoxLayout, QPushButton, QComboBox, QStatusBar, QDialog, QFormLayout, QLineEdit, QCheckBox
 )
 from PyQt6.QtCore import Qt
 from ui.account_panel import AccountPanel
@@ -12,6 +12,14 @@ from utils.config_loader import load_api_keys
 from ui.controls_panel import ControlsPanel
 from ui.chart_view import ChartView
 from core.copy_trading import CopyTradingManager
+from core.fill_mirror import FillMirror
+from core.kill_switch import flatten_all
+from core.order_amender import OrderAmender
+from core.stop_manager import StopManager
+from core.armed_orders import armed_orders
+from core.signer import signer_pool
+from core.connection_manager import connection_manager
+from ui.async_bridge import get_bridge
 
 
 
@@ -98,12 +106,16 @@ class MainWindow(QMainWindow):
         button_layout = QHBoxLayout()
         self.close_all_btn = QPushButton("Close All")
         self.cancel_all_btn = QPushButton("Cancel All")
+        self.prewarm_btn = QPushButton("Pre-warm Accounts")
+        self.prewarm_btn.setToolTip("Open and warm every account's connection before a planned snipe")
         button_layout.addWidget(self.close_all_btn)
         button_layout.addWidget(self.cancel_all_btn)
+        button_layout.addWidget(self.prewarm_btn)
         layout.addLayout(button_layout)
         # Connect button signals to stub methods
         self.close_all_btn.clicked.connect(self.close_all_positions)
         self.cancel_all_btn.clicked.connect(self.cancel_all_orders)
+        self.prewarm_btn.clicked.connect(self.prewarm_accounts)
 
         # Master account selection
         self.master_selector = QComboBox()
@@ -114,6 +126,21 @@ class MainWindow(QMainWindow):
         self.master_selector.currentIndexChanged.connect(self.update_copy_trading_manager)
         self.copy_trading_manager = None
 
+        # Subscriber sizing: same size as the master, or scaled by each account's equity
+        self.sizing_selector = QComboBox()
+        self.sizing_selector.addItem("Same Size as Master", "copy")
+        self.sizing_selector.addItem("Scale by Account Equity", "ratio")
+        layout.addWidget(QLabel("Subscriber Sizing:"))
+        layout.addWidget(self.sizing_selector)
+        self.sizing_selector.currentIndexChanged.connect(self.update_copy_trading_manager)
+
+        # Copy every master fill (web trades, TP/SL triggers) from the master's user-event stream
+        self.fill_mirror = None
+        self.mirror_fills_checkbox = QCheckBox("Mirror All Master Fills")
+        self.mirror_fills_checkbox.setToolTip("Copy fills on the master from any source, not only orders placed here")
+        layout.addWidget(self.mirror_fills_checkbox)
+        self.mirror_fills_checkbox.toggled.connect(self.update_copy_trading_manager)
+
         # Pair mapping button
         self.pair_map_btn = QPushButton("Configure Pair Mapping")
         self.pair_map_btn.clicked.connect(self.open_pair_mapping_dialog)
@@ -121,12 +148,27 @@ class MainWindow(QMainWindow):
         self.pair_map = {}
 
         self.update_copy_trading_manager()
+        self.order_amender = OrderAmender(lambda: [p.trader_account for p in self.account_panels if p.trader_account])
+        self.stop_manager = StopManager([p.trader_account for p in self.account_panels if p.trader_account])
 
         # Add status bar for notifications
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.controls_panel.set_status_bar(self.status_bar)
 
+        # Connect every account in the background and keep the sessions warm
+        accounts = [panel.trader_account for panel in self.account_panels]
+        async def start_connections():
+            connection_manager.start(accounts)
+            for account in accounts:
+                account.order_store.start() # Seeds once connected, then follows the user-event stream
+            # TP fills move the SL up the ladder; trailing SLs follow the price feed
+            self.stop_manager.start()
+            armed_orders.start() # Armed entries are checked on every price tick
+            # Signing workers start in the background so the first burst of orders doesn't wait for them
+            await signer_pool.ensure_started()
+        get_bridge().run(start_connections())
+
     def open_pair_mapping_dialog(self):
         dlg = PairMappingDialog(self.account_panels, self)
         if dlg.exec():
@@ -137,7 +179,27 @@ class MainWindow(QMainWindow):
         master_idx = self.master_selector.currentIndex()
         master = self.account_panels[master_idx].trader_account
         subscribers = [p.trader_account for i, p in enumerate(self.account_panels) if i != master_idx]
-        self.copy_trading_manager = CopyTradingManager(master, subscribers, pair_map=self.pair_map)
+        sizing = self.sizing_selector.currentData()
+        # Updated in place: rebuilding would forget which master orders were already copied
+        # (linked cloids) and which fills the mirror handled, and mirror those fills again
+        manager = self.copy_trading_manager
+        master_changed = manager is None or manager.master is not master
+        if manager is None:
+            manager = self.copy_trading_manager = CopyTradingManager(master, subscribers, pair_map=self.pair_map,
+                                                                     sizing=sizing)
+        else:
+            manager.configure(master, subscribers, pair_map=self.pair_map, sizing=sizing)
+        if self.fill_mirror is None:
+            self.fill_mirror = FillMirror(manager)
+        mirror, enabled = self.fill_mirror, self.mirror_fills_checkbox.isChecked()
+        async def sync_mirror():
+            if not enabled:
+                await mirror.stop()
+            elif master_changed:
+                await mirror.restart()
+            else:
+                mirror.start()  # No-op while already listening
+        get_bridge().run(sync_mirror(), on_error=lambda e: self.status_bar.showMessage(f"Fill mirror error: {e}", 5000))
 
     def handle_chart_event(self, marker_type, price):
         # Update controls based on marker_type
@@ -154,57 +216,47 @@ class MainWindow(QMainWindow):
         # Log to all account panels
         for panel in self.account_panels:
             panel.log_status(f"Chart click: {marker_type} at price {price:.2f}")
-        # TODO: Update controls or backend with entry/SL/TP as needed
-        # Optionally, update backend for copy trading
-        pass
+        # Live SL/TP legs on every account follow the marker with in-place modifies
+        if marker_type == 'sl' or marker_type.startswith('tp'):
+            symbol = self.controls_panel.symbol_input.text().upper().strip()
+            if not symbol:
+                # Without a symbol the move would hit this leg on every market
+                self.status_bar.showMessage(f"Set a symbol to move live {marker_type.upper()} orders.", 5000)
+                return
+            def on_amended(result):
+                for panel in self.account_panels:
+                    outcome = result['accounts'].get(panel.trader_account.account_id)
+                    panel.log_status(f"{result['tag'].upper()} moved to {result['price']:.2f}: {outcome}")
+            get_bridge().run(self.order_amender.amend(marker_type, price, symbol), on_result=on_amended,
+                             on_error=lambda e: self.status_bar.showMessage(f"Amend error: {e}", 5000))
 
     def close_all_positions(self):
         print("Close All clicked")
-        # Iterate through all account panels and call their trader_account's close_all_positions
-        # Assuming the UI should close positions for ALL symbols for ALL accounts when this button is clicked.
-        # If a specific symbol is needed, the UI should provide it.
-        # For now, we'll call close_all_positions without a symbol, which the modified trader.py function will handle as "all symbols for that account"
-        import asyncio
-        for panel in self.account_panels:
-            if panel.trader_account:
-                async def do_close_positions(trader_acc=panel.trader_account):
-                    try:
-                        result = await trader_acc.close_all_positions() # No symbol, so closes all for this account
-                        panel.log_status(f"Close all positions result: {result}")
-                        self.status_bar.showMessage(f"Account {trader_acc.account_id}: Close all positions initiated.", 5000)
-                    except Exception as e:
-                        error_msg = f"Error closing positions for account {trader_acc.account_id}: {e}"
-                        panel.log_status(error_msg)
-                        self.status_bar.showMessage(error_msg, 5000)
-                
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                loop.create_task(do_close_positions())
+        # Kill switch: every account cancels its orders and closes its positions concurrently
+        self._flatten(close_positions=True)
 
     def cancel_all_orders(self):
         print("Cancel All clicked")
-        # Iterate through all account panels and call their trader_account's cancel_all_orders
-        # Assuming the UI should cancel orders for ALL symbols for ALL accounts when this button is clicked.
-        import asyncio
-        for panel in self.account_panels:
-            if panel.trader_account:
-                async def do_cancel_orders(trader_acc=panel.trader_account):
-                    try:
-                        result = await trader_acc.cancel_all_orders() # No symbol, so cancels all for this account
-                        panel.log_status(f"Cancel all orders result: {result}")
-                        self.status_bar.showMessage(f"Account {trader_acc.account_id}: Cancel all orders initiated.", 5000)
-                    except Exception as e:
-                        error_msg = f"Error cancelling orders for account {trader_acc.account_id}: {e}"
-                        panel.log_status(error_msg)
-                        self.status_bar.showMessage(error_msg, 5000)
-                
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                loop.create_task(do_cancel_orders())
+        self._flatten(close_positions=False)
+
+    def _flatten(self, close_positions):
+        panels = {panel.trader_account.account_id: panel for panel in self.account_panels if panel.trader_account}
+        action = "Close all" if close_positions else "Cancel all"
+        def on_done(result):
+            for report in result['accounts']:
+                panel = panels[report['account_id']]
+                detail = report['error'] or f"cancel: {report['cancel']}" + (f", close: {report['close']}" if close_positions else "")
+                panel.log_status(f"{action} {report['status']} in {report['elapsed'] * 1000:.0f} ms - {detail}")
+            ok = sum(1 for report in result['accounts'] if report['status'] == 'ok')
+            self.status_bar.showMessage(f"{action}: {ok}/{len(result['accounts'])} accounts done in {result['elapsed'] * 1000:.0f} ms", 5000)
+        get_bridge().run(flatten_all([panel.trader_account for panel in panels.values()], close_positions=close_positions),
+                         on_result=on_done,
+                         on_error=lambda e: self.status_bar.showMessage(f"{action} error: {e}", 5000))
 
+    def prewarm_accounts(self):
+        accounts = [panel.trader_account for panel in self.account_panels if panel.trader_account]
+        def on_done(health):
+            up = sum(1 for h in health.values() if h['state'] == 'up')
+            self.status_bar.showMessage(f"Pre-warm complete: {up}/{len(accounts)} accounts connected.", 5000)
+        get_bridge().run(connection_manager.prewarm_all(accounts), on_result=on_done,
+                         on_error=lambda e: self.status_bar.showMessage(f"Pre-warm error: {e}", 5000))
@@ -0,0 +1,28 @@
+import hashlib
+import secrets
+
+def new_cloid() -> str:
+    """
+    Random client order id in the exchange's format (128-bit hex, 0x-prefixed).
+    """
+    return '0x' + secrets.token_hex(16)
+
+def derive_cloid(parent: str, *parts) -> str:
+    """
+    Deterministic child cloid, e.g. derive_cloid(entry_cloid, 'sl') or derive_cloid(fill_id, account_id).
+    The same inputs always give the same id, so replays and retries reuse it instead of double-sending.
+    """
+    key = ':'.join([str(parent)] + [str(p) for p in parts])
+    return '0x' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+def order_cloids(parent: str, split_count: int = 1, tp_count: int = 0) -> dict:
+    """
+    Every cloid TraderAccount.place_order uses for one placement, mapped to (parent, parts)
+    such that cloid == derive_cloid(parent, *parts); the parent itself maps to (parent, ()).
+    """
+    legs = [('sl',)] + [('tp', i + 1) for i in range(tp_count)]
+    if split_count and split_count > 1:
+        legs += [('e', i + 1) for i in range(split_count)]
+    cloids = {parent: (parent, ())}
+    cloids.update({derive_cloid(parent, *parts): (parent, parts) for parts in legs})
+    return cloids
@@ -1,11 +1,14 @@
+MAX_LIMIT_SPLITS = 100
+MAX_MARKET_SPLITS = 30
+
 def validate_splits(order_type: str, split_count: int) -> bool:
     """
     Validate split count based on order type.
     Limit: up to 100 splits, Market: up to 30 splits.
     """
-    if order_type == 'limit' and split_count > 100:
+    if order_type == 'limit' and split_count > MAX_LIMIT_SPLITS:
         return False
-    if order_type == 'market' and split_count > 30:
+    if order_type == 'market' and split_count > MAX_MARKET_SPLITS:
         return False
     return True
 